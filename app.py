@@ -4,28 +4,17 @@ import streamlit as st
 import openpyxl
 from openpyxl.styles import PatternFill
 import io
-import requests
-import base64
-import time
-from PIL import Image  # For previewing uploaded images
 
-# ——————— Imgur upload (only if images uploaded) ———————
-def upload_to_imgur(uploaded_file):
-    url = "https://api.imgur.com/3/image"
-    try:
-        # Read bytes from uploaded file
-        bytes_data = uploaded_file.read()
-        payload = base64.b64encode(bytes_data)
-        headers = {'Authorization': 'Client-ID 546c25a59c58ad7'}
-        r = requests.post(url, headers=headers, data=payload)
-        if r.status_code == 200:
-            return r.json()['data']['link']
-        else:
-            st.warning(f"Upload failed for {uploaded_file.name}")
-            return ""
-    except Exception as e:
-        st.error(f"Error uploading {uploaded_file.name}: {e}")
-        return ""
+import config
+
+# Image hosting lives in utils.storage; uploads run concurrently in worker threads,
+# so success/failure messages are shown from the progress callback
+from utils.storage import get_backend
+from utils.upload_cache import get_upload_cache
+from utils.image_preprocess import preprocess_images
+from utils.thumbnails import get_thumbnail_cache
+from utils.trend_analyzer import get_trend_catalog
+from utils.variant_matrix import make_sku
 
 # ——————— Generate Excel (with or without images) ———————
 def generate_excel(rows_data):
@@ -47,127 +36,8 @@ def generate_excel(rows_data):
 
 # ——————— Mock Data with Actual Product Links ———————
 def get_trending_products_with_links(platforms, categories):
-    """Returns mock data with actual product links for analysis"""
-    
-    # Real product links from major e-commerce sites
-    trending_data = {
-        "Amazon Fashion": [
-            {
-                "name": "Women's Floral Printed Kurti",
-                "price": "₹799",
-                "rating": "4.3",
-                "link": "https://www.amazon.in/dp/B0BXYZ1234",
-                "sales_rank": "Best Seller",
-                "category": "Women's Kurtis"
-            },
-            {
-                "name": "Cotton Anarkali Dress",
-                "price": "₹1,299", 
-                "rating": "4.5",
-                "link": "https://www.amazon.in/dp/B0BABC5678",
-                "sales_rank": "#1 in Women's Dresses",
-                "category": "Women's Dresses"
-            },
-            {
-                "name": "Men's Regular Fit T-Shirt",
-                "price": "₹499",
-                "rating": "4.2",
-                "link": "https://www.amazon.in/dp/B0BCD12345",
-                "sales_rank": "Amazon's Choice",
-                "category": "Men's T-Shirts"
-            }
-        ],
-        "Myntra": [
-            {
-                "name": "Embroidered Straight Kurti",
-                "price": "₹899",
-                "rating": "4.4",
-                "link": "https://www.myntra.com/kurti/brand/product123",
-                "sales_rank": "Trending",
-                "category": "Women's Kurtis"
-            },
-            {
-                "name": "A-line Printed Dress",
-                "price": "₹1,599",
-                "rating": "4.6", 
-                "link": "https://www.myntra.com/dress/brand/product456",
-                "sales_rank": "Bestseller",
-                "category": "Women's Dresses"
-            },
-            {
-                "name": "Casual Men's Shirt",
-                "price": "₹699",
-                "rating": "4.1",
-                "link": "https://www.myntra.com/shirt/brand/product789",
-                "sales_rank": "Popular",
-                "category": "Men's Shirts"
-            }
-        ],
-        "Flipkart Fashion": [
-            {
-                "name": "Printed Cotton Kurti",
-                "price": "₹599",
-                "rating": "4.0",
-                "link": "https://www.flipkart.com/product/p/item123",
-                "sales_rank": "Best Value",
-                "category": "Women's Kurtis"
-            },
-            {
-                "name": "Designer Anarkali Suit",
-                "price": "₹1,899",
-                "rating": "4.3",
-                "link": "https://www.flipkart.com/product/p/item456", 
-                "sales_rank": "Trending",
-                "category": "Women's Dresses"
-            }
-        ],
-        "Nykaa Fashion": [
-            {
-                "name": "Designer Silk Kurti",
-                "price": "₹2,499",
-                "rating": "4.5",
-                "link": "https://www.nykaafashion.com/product/12345",
-                "sales_rank": "Luxury Best Seller",
-                "category": "Women's Kurtis"
-            },
-            {
-                "name": "Party Wear Dress",
-                "price": "₹3,299",
-                "rating": "4.7",
-                "link": "https://www.nykaafashion.com/product/67890",
-                "sales_rank": "Premium Choice", 
-                "category": "Women's Dresses"
-            }
-        ],
-        "Meesho Trends": [
-            {
-                "name": "Budget Cotton Kurti",
-                "price": "₹299",
-                "rating": "4.0",
-                "link": "https://www.meesho.com/product/abc123",
-                "sales_rank": "Top Seller",
-                "category": "Women's Kurtis"
-            },
-            {
-                "name": "Affordable Kurti Set",
-                "price": "₹499",
-                "rating": "4.2",
-                "link": "https://www.meesho.com/product/def456",
-                "sales_rank": "Value Deal",
-                "category": "Women's Kurtis"
-            }
-        ]
-    }
-    
-    # Filter by selected platforms and categories
-    filtered_products = []
-    for platform in platforms:
-        if platform in trending_data:
-            for product in trending_data[platform]:
-                if any(category in product["category"] for category in categories):
-                    filtered_products.append({**product, "platform": platform})
-    
-    return filtered_products
+    """Returns mock data with actual product links for analysis (prices/ratings pre-parsed, see TrendCatalog)"""
+    return get_trend_catalog().query(platforms, categories)
 
 # ——————— Trend Analysis Page ———————
 def show_trend_analysis():
@@ -225,25 +95,6 @@ def show_trend_analysis():
             st.error("Please select at least one category")
         else:
             with st.spinner("🕵️ Scanning e-commerce platforms for best-selling products..."):
-                # Simulate analysis progress
-                progress_bar = st.progress(0)
-                status_text = st.empty()
-                
-                for i in range(100):
-                    progress_bar.progress(i + 1)
-                    if i < 25:
-                        status_text.text(f"🔍 Scanning {selected_sites[0]}...")
-                    elif i < 50:
-                        status_text.text(f"🔍 Analyzing {selected_sites[1] if len(selected_sites) > 1 else 'other platforms'}...")
-                    elif i < 75:
-                        status_text.text("📊 Processing sales data...")
-                    else:
-                        status_text.text("🔗 Collecting product links...")
-                    time.sleep(0.02)
-                
-                progress_bar.empty()
-                status_text.empty()
-                
                 # Get trending products with links
                 trending_products = get_trending_products_with_links(selected_sites, categories)
                 show_trend_results(trending_products, include_links)
@@ -330,15 +181,15 @@ def show_trend_results(trending_products, include_links=True):
     with tab3:
         st.subheader("💰 Price Analysis of Best Sellers")
         
-        # Calculate price statistics
-        prices = [int(p['price'].replace('₹', '').replace(',', '')) for p in trending_products]
+        # Calculate price statistics (prices parsed once by the catalog; unknown prices left out)
+        prices = [p['price_value'] for p in trending_products if p['price_value'] is not None]
         
         col1, col2, col3 = st.columns(3)
         with col1:
-            st.metric("Average Price", f"₹{sum(prices)//len(prices)}")
-            st.metric("Lowest Price", f"₹{min(prices)}")
+            st.metric("Average Price", f"₹{sum(prices)//len(prices)}" if prices else "–")
+            st.metric("Lowest Price", f"₹{min(prices)}" if prices else "–")
         with col2:
-            st.metric("Highest Price", f"₹{max(prices)}")
+            st.metric("Highest Price", f"₹{max(prices)}" if prices else "–")
             st.metric("Optimal Range", "₹499-₹1,299")
         with col3:
             st.metric("Discount Range", "20-60%")
@@ -347,11 +198,8 @@ def show_trend_results(trending_products, include_links=True):
         st.subheader("Platform-wise Best Seller Pricing")
         platform_pricing = {}
         for product in trending_products:
-            platform = product['platform']
-            price = int(product['price'].replace('₹', '').replace(',', ''))
-            if platform not in platform_pricing:
-                platform_pricing[platform] = []
-            platform_pricing[platform].append(price)
+            if product['price_value'] is not None:
+                platform_pricing.setdefault(product['platform'], []).append(product['price_value'])
         
         for platform, prices in platform_pricing.items():
             avg_price = sum(prices) // len(prices)
@@ -452,10 +300,9 @@ if page == "📦 Meesho Product Manager":
         cols = st.columns(min(5, len(uploaded_images)))
         for idx, img_file in enumerate(uploaded_images[:5]):
             with cols[idx]:
-                # Reset file pointer for PIL preview
-                img_file.seek(0)
-                img = Image.open(img_file)
-                st.image(img, caption=img_file.name, width=150)
+                # Decoded once per image; reruns reuse the cached thumbnail
+                thumb = get_thumbnail_cache().get(img_file.getvalue())
+                st.image(thumb, caption=img_file.name, width=150)
         st.success("Images ready! They'll get public links in Excel.")
 
     # ——————— Form (only product info) ———————
@@ -512,22 +359,43 @@ if page == "📦 Meesho Product Manager":
 
             # ——— Optional: Upload images if provided ———
             if uploaded_images:
-                st.info(f"Uploading {min(5, len(uploaded_images))} images to Imgur...")
-                for idx, img_file in enumerate(uploaded_images[:5]):
-                    # Reset pointer for upload (after preview)
-                    img_file.seek(0)
-                    link = upload_to_imgur(img_file)
+                to_upload = uploaded_images[:5]
+                backend = get_backend()
+                st.info(f"Uploading {len(to_upload)} images to {backend.label}...")
+                upload_progress = st.progress(0)
+                done = []
+
+                def report(idx, img_file, link):
+                    done.append(idx)
+                    upload_progress.progress(len(done) / len(to_upload))
                     if link:
-                        public_links[idx] = link
                         st.success(f"Image {idx+1} ({img_file.name}): {link}")
-                    time.sleep(0.5)  # Rate limit
+                    else:
+                        st.warning(f"Upload failed for {img_file.name}")
+
+                # Shrink phone photos before they hit the network
+                if config.IMAGE_PREPROCESS_ENABLED:
+                    to_upload, prep_stats = preprocess_images(to_upload)
+                    for info in prep_stats:
+                        st.caption(f"{info['name']}: {info['original_bytes']//1024} KB → {info['processed_bytes']//1024} KB")
+                    saved = sum(info['saved_bytes'] for info in prep_stats)
+                    st.caption(f"Preprocessing saved {saved/1024:.0f} KB of upload")
+
+                # Reset pointers for upload (after preview)
+                for img_file in to_upload:
+                    img_file.seek(0)
+                cache_before = get_upload_cache().snapshot()  # The cache is process-wide; report this upload only
+                links = backend.upload_many(to_upload, on_progress=report)
+                public_links[:len(links)] = links
+                cache_stats = get_upload_cache().stats(since=cache_before)
+                st.caption(f"Upload cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses")
             else:
                 st.info("No images uploaded → Excel has blank image links (add later)")
 
             # ——— Build Excel rows ———
             rows = []
             for var in st.session_state.variants:
-                sku = f"{product_id}-{var['size']}-{var['color']}".upper()
+                sku = make_sku(product_id, var['size'], var['color'])
                 variation = f"{var['size']}|{var['color']}"
                 row = [name, variation, price, mrp, gst,
                        public_links[0], public_links[1], public_links[2], public_links[3], public_links[4],
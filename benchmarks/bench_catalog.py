@@ -0,0 +1,219 @@
+# benchmarks/bench_catalog.py
+"""Headless benchmarks for the catalog generation path
+
+Runs without Streamlit and without network (uploads go to utils.stub_server).
+Each case runs in a fresh process so peak RSS is per case.
+
+    python benchmarks/bench_catalog.py                       # all cases → JSON on stdout
+    python benchmarks/bench_catalog.py -o before.json
+    python benchmarks/bench_catalog.py --rows 10 1000 --images 5 --compare before.json
+"""
+import argparse
+import io
+import json
+import multiprocessing
+import os
+import platform
+import queue as queue_module
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+DEFAULT_ROWS = [10, 1000, 10000, 100000]
+DEFAULT_IMAGES = [1, 5, 10, 50]
+CASE_TIMEOUT = 600  # Seconds before a case process is considered hung
+
+PRODUCT = {"product_id": "KURTI001", "name": "Floral Cotton Kurti", "brand": "Generic", "price": 399,
+           "mrp": 999, "gst": 5, "description": "Premium quality cotton kurti...",
+           "keywords": "kurti, cotton, women, ethnic", "hsn": "61091000", "weight": 280}
+LINKS = ["https://i.imgur.com/abcdefg.jpg"] * 5
+
+
+def variants(n):
+    return [{"size": f"S{i // 40}", "color": f"C{i % 40}"} for i in range(n)]
+
+
+# ——————— cases ———————
+def case_build_rows(n):
+    from utils.excel_generator import build_rows
+    return len(build_rows(PRODUCT, variants(n), LINKS))
+
+
+def case_generate_excel(n):
+    from utils.excel_generator import build_rows, generate_excel
+    return len(generate_excel(build_rows(PRODUCT, variants(n), LINKS), streaming=False).getvalue())
+
+
+def case_generate_excel_streaming(n):
+    from utils.excel_generator import build_rows, generate_excel_streaming
+    out = generate_excel_streaming(build_rows(PRODUCT, [v], LINKS)[0] for v in variants(n))
+    return len(out.read())
+
+
+def _image_files(n):
+    files = []
+    for i in range(n):
+        f = io.BytesIO(os.urandom(200 * 1024))  # ~a preprocessed phone photo
+        f.name = f"img{i}.jpg"
+        files.append(f)
+    return files
+
+
+def case_upload_sequential(n):
+    """upload_to_imgur one file at a time (the original submit loop, minus the sleep)"""
+    from utils.imgur_upload import upload_to_imgur
+    from utils.stub_server import StubImageHost
+    with StubImageHost(latency=0.05) as srv:
+        import config
+        config.IMGUR_UPLOAD_URL = srv.url
+        return sum(1 for f in _image_files(n) if upload_to_imgur(f, cache=False))
+
+
+def case_upload_pool(n):
+    """ImgurBackend.upload_many through the rate-limited pool (rate limit lifted)"""
+    import config
+    from utils.storage import ImgurBackend
+    from utils.stub_server import StubImageHost
+    config.UPLOAD_RATE_PER_SEC = 1000
+    config.UPLOAD_BURST = 1000
+    with StubImageHost(latency=0.05) as srv:
+        backend = ImgurBackend(url=srv.url, cache=False)
+        return sum(1 for link in backend.upload_many(_image_files(n)) if link)
+
+
+ROW_CASES = ["build_rows", "generate_excel", "generate_excel_streaming"]
+IMAGE_CASES = ["upload_sequential", "upload_pool"]
+
+
+# ——————— measurement ———————
+def _peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024  # bytes on macOS, KiB on Linux
+
+
+def _warm_imports():
+    # Import everything up front so module loading is not timed as part of a case
+    import utils.excel_generator, utils.imgur_upload, utils.storage, utils.stub_server  # noqa: F401
+
+
+def _run_case(name, n, track_allocations, queue):
+    try:
+        fn = globals()[f"case_{name}"]
+        _warm_imports()
+        baseline_rss = _peak_rss_mb()
+        start = time.perf_counter()
+        output = fn(n)
+        wall = time.perf_counter() - start
+        result = {"wall_s": round(wall, 4), "peak_rss_mb": round(_peak_rss_mb(), 1),
+                  "rss_growth_mb": round(_peak_rss_mb() - baseline_rss, 1), "output": output}
+
+        if track_allocations:
+            # Second run under tracemalloc: it slows Python down, so it is not timed
+            tracemalloc.start()
+            fn(n)
+            current, peak = tracemalloc.get_traced_memory()
+            blocks = sum(stat.count for stat in tracemalloc.take_snapshot().statistics("filename"))
+            tracemalloc.stop()
+            result.update({"alloc_peak_mb": round(peak / (1024 * 1024), 2), "alloc_live_blocks": blocks})
+    except Exception as e:  # Report instead of leaving the parent waiting on the queue
+        result = {"error": f"{type(e).__name__}: {e}"}
+    queue.put(result)
+
+
+def run_case(name, n, track_allocations=True, timeout=None):
+    """Run one case in a fresh process; {"error": ...} if it fails, crashes or exceeds `timeout` seconds"""
+    ctx = multiprocessing.get_context("spawn")
+    queue = ctx.Queue()
+    proc = ctx.Process(target=_run_case, args=(name, n, track_allocations, queue))
+    proc.start()
+    deadline = time.monotonic() + (timeout or CASE_TIMEOUT)
+    result = None
+    while result is None:
+        try:
+            result = queue.get(timeout=1)
+        except queue_module.Empty:
+            if not proc.is_alive():  # Died without reporting (e.g. killed, or a crash in C code)
+                result = {"error": f"case process exited with code {proc.exitcode}"}
+            elif time.monotonic() > deadline:
+                proc.terminate()
+                result = {"error": f"timed out after {timeout or CASE_TIMEOUT}s"}
+    proc.join()
+    return {"case": name, "n": n, **result}
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current, baseline_path):
+    """Print wall-time and memory ratios against an earlier results file"""
+    with open(baseline_path) as f:
+        baseline = {(r["case"], r["n"]): r for r in json.load(f)["results"]}
+    print(f"{'case':28} {'n':>7} {'wall':>8} {'rss':>8}", file=sys.stderr)
+    for r in current["results"]:
+        old = baseline.get((r["case"], r["n"]))
+        if not old or "error" in r or "error" in old:
+            continue
+        wall = r["wall_s"] / old["wall_s"] if old["wall_s"] else float("nan")
+        rss = r["peak_rss_mb"] / old["peak_rss_mb"] if old["peak_rss_mb"] else float("nan")
+        flag = "  <-- slower" if wall > 1.2 else ""
+        print(f"{r['case']:28} {r['n']:>7} {wall:>7.2f}x {rss:>7.2f}x{flag}", file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="*", default=DEFAULT_ROWS)
+    parser.add_argument("--images", type=int, nargs="*", default=DEFAULT_IMAGES)
+    parser.add_argument("--cases", nargs="*", default=ROW_CASES + IMAGE_CASES)
+    parser.add_argument("--no-alloc", action="store_true", help="skip the tracemalloc pass")
+    parser.add_argument("-o", "--output", help="write JSON here instead of stdout")
+    parser.add_argument("--compare", help="earlier JSON results to compare against")
+    args = parser.parse_args(argv)
+
+    results = []
+    failed = False
+    for name in args.cases:
+        sizes = args.rows if name in ROW_CASES else args.images
+        for n in sizes:
+            result = run_case(name, n, not args.no_alloc)
+            results.append(result)
+            if "error" in result:
+                failed = True
+                print(f"{name:28} n={n:<7} FAILED: {result['error']}", file=sys.stderr)
+                continue
+            print(f"{name:28} n={n:<7} {result['wall_s']:.3f}s  {result['peak_rss_mb']} MB", file=sys.stderr)
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    else:
+        print(text)
+    if args.compare:
+        compare(report, args.compare)
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+# benchmarks/bench_trends.py
+"""Offline load test for the trend pipeline (scrape → process → aggregate)
+
+No network and no Gemini key: pages come from utils.stub_server.StubPageHost
+and model calls from utils.replay.FakeLLM (or a replayed recording). The
+product total is fixed and spread over the sites, so runs at different site
+counts compare throughput for the same amount of data. Each case runs in a
+fresh process.
+
+    python benchmarks/bench_trends.py                              # all cases → JSON on stdout
+    python benchmarks/bench_trends.py --sites 1 50 --llm-latency 0.2
+    python benchmarks/bench_trends.py -o after.json --compare before.json
+"""
+import argparse
+import json
+import logging
+import math
+import multiprocessing
+import platform
+import queue as queue_module
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+from bench_catalog import ROOT, _peak_rss_mb, compare, git_commit
+
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+DEFAULT_SITES = [1, 5, 10, 25, 50]
+DEFAULT_PRODUCTS = 10000
+CATEGORIES = ["Kurtis", "Sarees", "Dresses", "Tops"]
+CASE_TIMEOUT = 600  # Seconds before a case process is considered hung
+
+
+# ——————— setup ———————
+def _site_names(n):
+    return [f"site{i:02d}" for i in range(n)]
+
+
+def _serve_pages(host, scraper, sites, per_page):
+    """Synthetic pages for every site/category; every other page carries JSON-LD"""
+    from utils.replay import page_path, synthetic_page
+    for site in sites:
+        for i, (category, url) in enumerate(scraper.site_pages(site, CATEGORIES)):
+            host.pages[page_path(url)] = synthetic_page(site, category, per_page, structured=i % 2 == 0)
+
+
+def _run_pipeline(scraper, sites, opts):
+    start = time.perf_counter()
+    trends = scraper.scrape_trends_for_manufacturing(sites, CATEGORIES, max_concurrency=opts["concurrency"])
+    elapsed = time.perf_counter() - start
+    products = len(trends["all_products"])
+    return {
+        "pipeline_s": round(elapsed, 4),
+        "products": products,
+        "products_per_s": round(products / elapsed, 1) if elapsed else None,
+        "sites_ok": sum(1 for s in trends["site_status"].values() if s == "ok"),
+        "llm_calls": sum(c["calls_made"] for c in trends["llm_calls"].values() if c),
+    }
+
+
+# ——————— cases ———————
+def case_pipeline(n, opts):
+    """Pages over HTTP from the stand-in, model calls to FakeLLM with the configured latency"""
+    import config
+    from ecom_trend_scrapper import EcomTrendScraper
+    from utils.replay import FakeLLM
+    from utils.stub_server import StubPageHost
+    from utils.trend_history import TrendHistory
+
+    sites = _site_names(n)
+    per_page = math.ceil(opts["products"] / (n * len(CATEGORIES)))
+    llm = FakeLLM(latency=opts["llm_latency"], products_per_page=per_page)
+    with StubPageHost(latency=opts["page_latency"]) as host:
+        config.TREND_SITE_URL = host.site_url
+        scraper = EcomTrendScraper(cache=False, history=TrendHistory(":memory:"), llm=llm)
+        _serve_pages(host, scraper, sites, per_page)
+        return _run_pipeline(scraper, sites, opts)
+
+
+def case_replay(n, opts):
+    """Same run recorded once (untimed), then replayed from disk: pipeline cost without model latency"""
+    import config
+    from ecom_trend_scrapper import EcomTrendScraper, fetch_html
+    from utils.replay import FakeLLM, Recorder, Replayer, ReplayStore
+    from utils.stub_server import StubPageHost
+
+    sites = _site_names(n)
+    per_page = math.ceil(opts["products"] / (n * len(CATEGORIES)))
+    store = ReplayStore(tempfile.mkdtemp(prefix="trend-replay-"))
+    with StubPageHost() as host:
+        config.TREND_SITE_URL = host.site_url
+        recorder = Recorder(store, FakeLLM(products_per_page=per_page), fetch_html)
+        scraper = EcomTrendScraper(cache=False, history=False, llm=recorder.llm, fetch=recorder.fetch)
+        _serve_pages(host, scraper, sites, per_page)
+        scraper.scrape_trends_for_manufacturing(sites, CATEGORIES, max_concurrency=opts["concurrency"])
+    replayer = Replayer(store)
+    scraper = EcomTrendScraper(cache=False, history=False, llm=replayer.llm, fetch=replayer.fetch)
+    result = _run_pipeline(scraper, sites, opts)
+    result["replay"] = replayer.stats()
+    return result
+
+
+CASES = ["pipeline", "replay"]
+
+
+# ——————— measurement ———————
+def _warm_imports():
+    import ecom_trend_scrapper, utils.replay, utils.stub_server  # noqa: F401
+    logging.getLogger("streamlit").setLevel(logging.ERROR)  # Bare-mode st.* calls warn on every call
+    for name in list(logging.root.manager.loggerDict):
+        if name.startswith("streamlit"):
+            logging.getLogger(name).setLevel(logging.ERROR)
+
+
+def _run_case(name, n, opts, track_allocations, queue):
+    try:
+        fn = globals()[f"case_{name}"]
+        _warm_imports()
+        baseline_rss = _peak_rss_mb()
+        start = time.perf_counter()
+        output = fn(n, opts)
+        wall = time.perf_counter() - start
+        result = {"wall_s": round(wall, 4), "peak_rss_mb": round(_peak_rss_mb(), 1),
+                  "rss_growth_mb": round(_peak_rss_mb() - baseline_rss, 1), "output": output}
+
+        if track_allocations:
+            tracemalloc.start()
+            fn(n, opts)
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            result["alloc_peak_mb"] = round(peak / (1024 * 1024), 2)
+    except Exception as e:  # Report instead of leaving the parent waiting on the queue
+        result = {"error": f"{type(e).__name__}: {e}"}
+    queue.put(result)
+
+
+def run_case(name, n, opts, track_allocations=True, timeout=None):
+    """Run one case in a fresh process; {"error": ...} if it fails, crashes or exceeds `timeout` seconds"""
+    ctx = multiprocessing.get_context("spawn")
+    queue = ctx.Queue()
+    proc = ctx.Process(target=_run_case, args=(name, n, opts, track_allocations, queue))
+    proc.start()
+    deadline = time.monotonic() + (timeout or CASE_TIMEOUT)
+    result = None
+    while result is None:
+        try:
+            result = queue.get(timeout=1)
+        except queue_module.Empty:
+            if proc.exitcode is not None:  # Died without reporting (e.g. killed, or a crash in C code)
+                result = {"error": f"case process exited with code {proc.exitcode}"}
+            elif time.monotonic() > deadline:
+                proc.terminate()
+                result = {"error": f"timed out after {timeout or CASE_TIMEOUT}s"}
+    proc.join()
+    return {"case": name, "n": n, **result}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sites", type=int, nargs="*", default=DEFAULT_SITES)
+    parser.add_argument("--products", type=int, default=DEFAULT_PRODUCTS, help="total across all sites")
+    parser.add_argument("--cases", nargs="*", default=CASES)
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="seconds per fake model call")
+    parser.add_argument("--page-latency", type=float, default=0.01, help="seconds per stand-in page")
+    parser.add_argument("--concurrency", type=int, default=None, help="default: config.TREND_MAX_CONCURRENCY")
+    parser.add_argument("--no-alloc", action="store_true", help="skip the tracemalloc pass")
+    parser.add_argument("-o", "--output", help="write JSON here instead of stdout")
+    parser.add_argument("--compare", help="earlier JSON results to compare against")
+    args = parser.parse_args(argv)
+    opts = {"products": args.products, "llm_latency": args.llm_latency, "page_latency": args.page_latency,
+            "concurrency": args.concurrency}
+
+    results = []
+    failed = False
+    for name in args.cases:
+        for n in args.sites:
+            result = run_case(name, n, opts, not args.no_alloc)
+            results.append(result)
+            if "error" in result:
+                failed = True
+                print(f"{name:10} sites={n:<4} FAILED: {result['error']}", file=sys.stderr)
+                continue
+            out = result["output"]
+            print(f"{name:10} sites={n:<4} {out['pipeline_s']:.3f}s  {out['products']} products  "
+                  f"{out['products_per_s']}/s  {out['llm_calls']} LLM calls  {result['peak_rss_mb']} MB",
+                  file=sys.stderr)
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "options": opts,
+        },
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    else:
+        print(text)
+    if args.compare:
+        compare({"results": [r for r in results if "error" not in r]}, args.compare)
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
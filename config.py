@@ -0,0 +1,76 @@
+# config.py
+# Shared settings for the dashboard pages and utils
+import os
+
+# ——————— Image uploads ———————
+UPLOAD_MAX_WORKERS = 5      # Parallel uploads in flight
+UPLOAD_RATE_PER_SEC = 2.0   # Sustained uploads per second (token bucket refill)
+UPLOAD_BURST = 5            # Uploads allowed back-to-back before the rate kicks in
+
+# ——————— Upload cache ———————
+UPLOAD_CACHE_ENABLED = True
+UPLOAD_CACHE_PATH = ".cache/uploads.sqlite3"
+UPLOAD_CACHE_TTL = 0        # Seconds before a cached link is re-uploaded; 0 = never expire
+
+# ——————— Image preprocessing ———————
+IMAGE_PREPROCESS_ENABLED = True
+IMAGE_MAX_SIZE = (1500, 1500)           # Meesho recommends square images, at least 1000 px
+IMAGE_TARGET_BYTES = 500 * 1024         # Recompress until the JPEG fits this budget
+IMAGE_MIN_QUALITY = 60
+IMAGE_PREPROCESS_WORKERS = None         # None = one process per CPU core
+
+# ——————— Image host / HTTP ———————
+IMGUR_UPLOAD_URL = os.getenv("IMGUR_UPLOAD_URL", "https://api.imgur.com/3/image")
+IMGUR_CLIENT_ID = os.getenv("IMGUR_CLIENT_ID", "546c25a59c58ad7")
+HTTP_POOL_SIZE = 10         # Keep-alive connections kept per host
+HTTP_CONNECT_TIMEOUT = 5    # Seconds
+HTTP_READ_TIMEOUT = 30      # Seconds
+HTTP_RETRIES = 3            # Extra attempts on 429/5xx and connection errors
+HTTP_BACKOFF = 0.5          # Base delay (s) for exponential backoff with full jitter
+HTTP_MAX_BACKOFF = 30       # Cap for a single wait, including Retry-After
+
+# ——————— Preview thumbnails ———————
+THUMBNAIL_SIZE = (300, 300)             # 2x the 150 px preview width for sharp display
+THUMBNAIL_FORMAT = "WEBP"
+THUMBNAIL_CACHE_MAX_BYTES = 32 * 1024 * 1024
+
+# ——————— Image storage backend ———————
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "imgur")    # "imgur" or "local"
+LOCAL_STORAGE_DIR = ".cache/images"
+LOCAL_STORAGE_URL = os.getenv("LOCAL_STORAGE_URL", "")    # e.g. http://localhost:8000; default file:// URIs
+
+# ——————— Excel generation ———————
+SKU_NORMALIZE = False   # True: SKU parts keep only A-Z/0-9 ("Navy Blue" → NAVY-BLUE); False: legacy "{id}-{size}-{color}".upper()
+EXCEL_STREAMING_MIN_ROWS = 5000         # Switch to the write-only writer above this many rows
+EXCEL_SPOOL_MAX_BYTES = 16 * 1024 * 1024  # Finished workbooks larger than this go to a temp file
+
+# ——————— Trend scraping ———————
+TREND_MAX_CONCURRENCY = 4   # Sites scraped at the same time
+TREND_SITE_TIMEOUT = 90     # Seconds one site may take before it is skipped
+TREND_DEADLINE = 240        # Seconds for the whole run; unfinished sites are dropped
+TREND_SITE_URL = os.getenv("TREND_SITE_URL", "https://{site}.com")  # Point at utils.stub_server.StubPageHost offline
+
+# ——————— Scrape result cache ———————
+SCRAPE_CACHE_ENABLED = True
+SCRAPE_CACHE_PATH = ".cache/scrapes.sqlite3"
+SCRAPE_CACHE_TTL = 6 * 60 * 60              # Seconds a scrape result stays fresh
+SCRAPE_CACHE_MAX_BYTES = 50 * 1024 * 1024   # Least recently used results are evicted past this
+
+# ——————— Structured-data extraction ———————
+STRUCTURED_DATA_ENABLED = True  # Read JSON-LD/microdata/OpenGraph before asking the LLM
+
+# ——————— LLM extraction batching ———————
+LLM_TOKEN_BUDGET = 24000        # Estimated input tokens per extraction call (prompt + page text)
+LLM_MAX_PAGES_PER_CALL = 6      # Category pages packed into one call at most
+
+# ——————— Keyword heuristics ———————
+KEYWORD_TAXONOMY_PATH = os.getenv("KEYWORD_TAXONOMY_PATH")  # Optional JSON overriding keyword_engine.DEFAULT_TAXONOMY sections
+KEYWORD_CACHE_SIZE = 100_000     # Memoized per-product heuristic results
+
+# ——————— Trend history ———————
+TREND_HISTORY_ENABLED = True
+TREND_HISTORY_PATH = ".cache/trend_history.sqlite3"
+
+# ——————— Performance tracing ———————
+PERF_ENABLED = os.getenv("PERF_TRACE", "0") == "1"  # Spans/counters in trend runs (the Trend Analysis page always traces)
+PERF_MAX_SPANS = 200_000                            # Spans kept per tracer; later ones are dropped
@@ -1,14 +1,46 @@
 # ecom_trend_scraper.py
 import os
-from scrapegraphai import SmartScraper
-import pandas as pd
 from datetime import datetime
+from collections import Counter
 import json
 import re
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+import requests
 import streamlit as st
 
+import config
+from utils.attribute_index import AttributeIndex, AttributeNormalizer
+from utils.extraction_planner import ExtractionPlanner, batch_prompt, batch_source, estimate_tokens, split_batch_response, visible_text
+from utils.http_session import request_with_retries
+from utils.json_extract import JsonExtractor
+from utils.keyword_engine import ProductHeuristics
+from utils.perf import Tracer
+from utils.product_store import ProductStore
+from utils.streaming_stats import TrendAggregator
+from utils.trend_history import get_trend_history
+from utils.scrape_cache import get_scrape_cache, scrape_key
+from utils.structured_data import PRODUCT_FIELDS, extract_products, merge_llm_fields, missing_fields
+
+def fetch_html(url):
+    """Page HTML for the structured-data pass, or "" if it cannot be fetched"""
+    try:
+        response = request_with_retries("GET", url, retries=0)
+    except requests.RequestException:
+        return ""
+    if not response.ok or "html" not in response.headers.get("Content-Type", "text/html"):
+        return ""
+    return response.text
+
+
+def smart_scraper_llm(source, prompt, config):
+    """Run SmartScraper (the live Gemini backend) on a URL or page text"""
+    from scrapegraphai import SmartScraper  # Only needed for live runs (see live_scraping_available)
+    return SmartScraper(prompt=prompt, source=source, config=config).run()
+
+
 class EcomTrendScraper:
-    def __init__(self):
+    def __init__(self, cache=None, history=None, llm=None, fetch=None, perf=None):
         self.config = {
             "llm": {
                 "api_key": os.getenv("GEMINI_API_KEY"),
@@ -67,70 +99,393 @@ class EcomTrendScraper:
             Provide JSON output for manufacturing insights.
             """
         }
+        
+        # Raw SmartScraper results, keyed by URL + prompt + model config (False disables)
+        if cache is None:
+            cache = get_scrape_cache() if config.SCRAPE_CACHE_ENABLED else False
+        self.cache = cache
+        # Run-over-run snapshots for trend queries (False disables)
+        if history is None:
+            history = get_trend_history() if config.TREND_HISTORY_ENABLED else False
+        self.history = history
+        # Backends, swappable for offline runs (utils.replay records/replays or fakes them)
+        self.llm = llm or smart_scraper_llm
+        self.fetch = fetch or fetch_html
+        # Stage timings and per-site counters (no-op unless enabled, see utils.perf)
+        self.perf = perf or Tracer()
+        self.planner = ExtractionPlanner()
+        self.heuristics = ProductHeuristics()
+        self.attributes = AttributeNormalizer()
+        self.json = JsonExtractor()
+    
+    def fetch_page(self, url):
+        """Page HTML for the structured-data pass, or "" if it cannot be fetched"""
+        return self.fetch(url) or ""
+    
+    def run_smart_scraper(self, source, prompt, force_refresh=False, label=None, site=None):
+        """SmartScraper result for a prompt, served from the scrape cache when fresh
+        
+        `force_refresh` skips the lookup and overwrites the cached entry;
+        `label` is what the cache records as the source (page text sources are long).
+        """
+        key = scrape_key(source, prompt, self.config) if self.cache else None
+        result = self.cache.get(key) if key and not force_refresh else None
+        if result is not None:
+            self.perf.count("llm.cache_hits", site=site)
+        else:
+            with self.perf.span("llm.call", site=site, tokens=estimate_tokens(source) + estimate_tokens(prompt)):
+                result = self.llm(source, prompt, self.config)
+            self.perf.count("llm.calls", site=site)
+            if key:
+                self.cache.put(key, result, source=label or source)
+        return result
+    
+    def gap_prompt(self, products, fields):
+        """Prompt asking the LLM only for the fields structured data left empty"""
+        names = "\n".join(f"- {p['name']}" for p in products if missing_fields(p))
+        return (
+            f"For each of these products on the page:\n{names}\n"
+            f"extract only: {', '.join(fields)}.\n"
+            'Return JSON as {"products": [{"name": ..., ' + ", ".join(f'"{f}": ...' for f in fields) + "}]} "
+            "using the product names exactly as given."
+        )
+    
+    def site_pages(self, site, categories=None):
+        """(category, url) for every page to read on a site; category is None without categories"""
+        # Placeholder paths under config.TREND_SITE_URL (a StubPageHost when offline)
+        base = config.TREND_SITE_URL.format(site=site).rstrip("/")
+        if not categories:
+            return [(None, f"{base}/trending-fashion")]
+        return [(c, f"{base}/{re.sub(r'[^a-z0-9]+', '-', c.lower()).strip('-')}") for c in categories]
+    
+    def parse_answer(self, answer):
+        """LLM reply → dict (fences, prose and truncation tolerated; {} if unusable)"""
+        with self.perf.span("json.extract"):
+            answer = self.json.extract(answer)
+        return answer if isinstance(answer, dict) else {}
+    
+    @staticmethod
+    def merge_design_elements(into, other):
+        """Union list-valued design elements (keeping first-seen order); first scalar wins"""
+        for key, values in other.items():
+            if isinstance(values, list):
+                existing = into.setdefault(key, [])
+                if isinstance(existing, list):
+                    existing.extend(v for v in values if v not in existing)
+            else:
+                into.setdefault(key, values)
+        return into
+    
+    def scrape_site(self, site, force_refresh=False, categories=None):
+        """Scrape and process one site (runs in a worker thread – no Streamlit calls)
+        
+        Each category page is read for JSON-LD/microdata/OpenGraph products
+        first; the LLM is only asked for the fields those leave empty. Pages
+        with no structured data are packed by the planner into as few LLM calls
+        as the token budget allows, and each answer is split back per category.
+        The result adds 'categories' ({category: products}), 'extraction'
+        ("structured", "structured+llm" or "llm") and 'llm_calls'. A failed
+        gap-filling call keeps the structured products as they are and is
+        counted in llm_calls['gap_failures'].
+        """
+        prompt = self.trend_prompts.get(site, self.trend_prompts["amazon"])
+        
+        sections = {}
+        def section(category):
+            return sections.setdefault(category, {"products": [], "trends": [], "design_elements": {}})
+        
+        llm_pages, structured_pages, gap_calls, gap_failures = [], 0, 0, 0
+        for category, url in self.site_pages(site, categories):
+            section(category)  # Keeps categories in the order given
+            with self.perf.span("fetch", site=site, category=category):
+                html = self.fetch_page(url)
+            self.perf.count("pages", site=site)
+            with self.perf.span("structured_data", site=site, category=category):
+                products = extract_products(html) if html and config.STRUCTURED_DATA_ENABLED else []
+            if not products:
+                llm_pages.append({"category": category, "url": url, "text": visible_text(html) if html else None})
+                continue
+            
+            structured_pages += 1
+            gaps = [f for f in PRODUCT_FIELDS if any(f in missing_fields(p) for p in products)]
+            if gaps:
+                gap_calls += 1
+                try:
+                    answer = self.parse_answer(self.run_smart_scraper(url, self.gap_prompt(products, gaps),
+                                                                      force_refresh, site=site))
+                except Exception:
+                    # The structured products stand on their own; only the gaps stay empty
+                    gap_failures += 1
+                    self.perf.count("llm.gap_failures", site=site)
+                else:
+                    products = merge_llm_fields(products, answer.get('products', []))
+            colors = list(dict.fromkeys(c for p in products for c in p.get('colors', [])))
+            section(category)["products"].extend(products)
+            section(category)["design_elements"].setdefault("colors", []).extend(colors)
+        
+        batches = self.planner.plan(llm_pages, estimate_tokens(prompt))
+        for batch in batches:
+            label = " ".join(page["url"] for page in batch)
+            answer = self.run_smart_scraper(batch_source(batch), batch_prompt(prompt, batch), force_refresh, label, site)
+            for category, part in split_batch_response(self.parse_answer(answer), batch).items():
+                target = section(category)
+                target["products"].extend(part["products"])
+                target["trends"].extend(part["trends"])
+                self.merge_design_elements(target["design_elements"], part["design_elements"])
+        
+        design_elements = {}
+        for part in sections.values():
+            self.merge_design_elements(design_elements, part["design_elements"])
+        for category, part in sections.items():
+            if category is not None:
+                for product in part["products"]:
+                    product['category'] = category
+        
+        processed = self.process_for_manufacturing({
+            "products": [p for part in sections.values() for p in part["products"]],
+            "trends": [t for part in sections.values() for t in part["trends"]],
+            "design_elements": design_elements,
+        }, site)
+        processed['categories'] = {c: [] for c in sections if c is not None}
+        for product in processed['products']:
+            if product.get('category') in processed['categories']:
+                processed['categories'][product['category']].append(product)
+        processed['extraction'] = ("llm" if not structured_pages else
+                                   "structured" if not llm_pages and not gap_calls else "structured+llm")
+        processed['llm_calls'] = {
+            "pages": len(llm_pages),
+            "calls_made": len(batches) + gap_calls,
+            "calls_saved": len(llm_pages) - len(batches) + structured_pages - gap_calls,
+            "gap_failures": gap_failures,
+        }
+        return processed
+    
+    def iter_sites_concurrently(self, sites, site_timeout=None, deadline=None, max_concurrency=None,
+                                force_refresh=False, categories=None):
+        """Run scrape_site for every site on a thread pool, yielding each outcome as it lands
+        
+        Each site gets `site_timeout` seconds from when it starts; the whole run
+        gets `deadline` seconds. Yields (site, "ok", processed_data) |
+        (site, "timeout", None) | (site, "error", message) in completion
+        order; processed_data carries an 'aggregate' TrendAggregator for the
+        site. A timed-out site's thread is abandoned, not killed, so it cannot
+        hold up the others. Closing the generator early abandons the rest.
+        """
+        site_timeout = site_timeout or config.TREND_SITE_TIMEOUT
+        deadline = deadline or config.TREND_DEADLINE
+        max_concurrency = max_concurrency or config.TREND_MAX_CONCURRENCY
+        
+        if not sites:
+            return
+        started = {}
+        
+        position = {site: i for i, site in enumerate(sites)}
+        
+        def run(site):
+            started[site] = time.monotonic()
+            with self.perf.span("site", site=site):
+                result = self.scrape_site(site, force_refresh, categories)
+            # Partial rollup built on the worker; merged by the caller
+            with self.perf.span("aggregate.site", site=site, products=len(result['products'])):
+                result['aggregate'] = TrendAggregator().add_all(result['products'], site, position[site])
+            return result
+        
+        end = time.monotonic() + deadline
+        executor = ThreadPoolExecutor(max_workers=min(max_concurrency, len(sites)))
+        pending = {executor.submit(run, site): site for site in sites}
+        try:
+            while pending:
+                now = time.monotonic()
+                wake = min([end] + [started[s] + site_timeout for s in pending.values() if s in started])
+                if any(s not in started for s in pending.values()):
+                    wake = min(wake, now + 0.1)  # A queued site may start (and start its clock) any moment
+                done, _ = wait(pending, timeout=max(0, wake - now), return_when=FIRST_COMPLETED)
+                for future in done:
+                    site = pending.pop(future)
+                    try:
+                        outcome = ("ok", future.result())
+                    except Exception as e:
+                        outcome = ("error", str(e))
+                    yield (site, *outcome)
+                
+                now = time.monotonic()
+                for future, site in list(pending.items()):
+                    if now >= end or (site in started and now - started[site] >= site_timeout):
+                        future.cancel()
+                        del pending[future]
+                        yield site, "timeout", None
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
     
-    def scrape_trends_for_manufacturing(self, sites, categories, max_products=20, price_range=(0, 10000), min_rating=4.0):
-        """Enhanced scraping specifically for manufacturing insights"""
+    def scrape_sites_concurrently(self, sites, site_timeout=None, deadline=None, max_concurrency=None,
+                                  force_refresh=False, categories=None):
+        """{site: ("ok", processed_data) | ("timeout", None) | ("error", message)} once every site is settled"""
+        return {site: (status, payload) for site, status, payload in self.iter_sites_concurrently(
+            sites, site_timeout, deadline, max_concurrency, force_refresh, categories)}
+    
+    def stream_trends(self, sites, categories=None, site_timeout=None, deadline=None, max_concurrency=None,
+                      force_refresh=False):
+        """Yield one update per site as soon as it finishes (no Streamlit calls)
+        
+        Each update is {"site", "status", "result" (processed data, error
+        message or None), "done", "total", "aggregate"}, where "aggregate" is
+        a TrendAggregator over every site finished so far, so callers can show
+        running top products and price stats. Time to the first update is the
+        fastest site's latency. A fully consumed stream is recorded in the
+        trend history.
+        """
+        running = TrendAggregator()
+        site_products = {}
+        for done, (site, status, payload) in enumerate(self.iter_sites_concurrently(
+                sites, site_timeout, deadline, max_concurrency, force_refresh, categories), 1):
+            if status == "ok" and 'aggregate' in payload:
+                running.merge(payload['aggregate'])
+                site_products[site] = payload['products']
+            yield {"site": site, "status": status, "result": payload,
+                   "done": done, "total": len(sites), "aggregate": running}
+        
+        if self.history and site_products:  # Only once the stream has been read to the end
+            with self.perf.span("history.record"):
+                self.history.record_run(site_products, {'competitor_pricing': running.price_stats()})
+    
+    def scrape_trends_for_manufacturing(self, sites, categories, max_products=20, price_range=(0, 10000), min_rating=4.0,
+                                        site_timeout=None, deadline=None, max_concurrency=None, force_refresh=False):
+        """Enhanced scraping specifically for manufacturing insights
+        
+        Sites are scraped concurrently (see scrape_sites_concurrently); results
+        are merged in the order of `sites`, so output does not depend on which
+        site finished first. With `categories`, each site's category pages are
+        batched into shared LLM calls and products are also grouped in
+        all_trends['category_products']. Pass `force_refresh=True` to bypass
+        cached scrapes; this run's cache counters end up in all_trends['cache_stats'] and
+        per-site LLM call counts in all_trends['llm_calls']. The run is saved
+        to the trend history as a delta (counts in all_trends['history']).
+        Stage spans and per-site counters are in all_trends['perf'] (a
+        utils.perf.Tracer; empty unless tracing is enabled).
+        """
         
         all_trends = {
             'all_products': [],
             'design_analysis': {},
-            'color_analysis': [],
+            'color_analysis': Counter(),
             'price_analysis': {},
             'manufacturing_recommendations': {},
-            'competitor_pricing': {}
+            'competitor_pricing': {},
+            'site_status': {},
+            'extraction': {},
+            'category_products': {},
+            'llm_calls': {}
         }
         
+        json_before = self.json.snapshot()  # The extractor is shared; report only this run
+        cache_before = self.cache.snapshot() if self.cache else None  # So is the scrape cache
+        st.write(f"🔍 Analyzing {', '.join(sites)}...")
+        outcomes = self.scrape_sites_concurrently(sites, site_timeout, deadline, max_concurrency, force_refresh,
+                                                  categories)
+        
+        site_products = []
+        aggregate = TrendAggregator()
         for site in sites:
+            status, payload = outcomes.get(site, ("timeout", None))
+            all_trends['site_status'][site] = status
+            if status == "timeout":
+                st.warning(f"⏱️ {site} took too long and was skipped")
+                continue
+            if status == "error":
+                st.error(f"Error analyzing {site}: {payload}")
+                continue
+            
+            all_trends['extraction'][site] = payload.get('extraction')
+            all_trends['llm_calls'][site] = payload.get('llm_calls')
+            for category, products in payload.get('categories', {}).items():
+                all_trends['category_products'].setdefault(category, []).extend(products)
             try:
-                st.write(f"🔍 Analyzing {site}...")
-                
-                # Simulated scraping - replace with actual URLs
-                mock_url = f"https://{site}.com/trending-fashion"
-                prompt = self.trend_prompts.get(site, self.trend_prompts["amazon"])
-                
-                scraper = SmartScraper(
-                    prompt=prompt,
-                    source=mock_url,
-                    config=self.config
-                )
-                
-                result = scraper.run()
-                processed_data = self.process_for_manufacturing(result, site)
-                all_trends['all_products'].extend(processed_data['products'])
+                all_trends['all_products'].extend(payload['products'])
+                site_products.append((site, payload['products']))
+                if 'aggregate' in payload:
+                    aggregate.merge(payload['aggregate'])
                 
                 # Aggregate insights
-                self.aggregate_insights(all_trends, processed_data, site)
+                with self.perf.span("aggregate_insights", site=site):
+                    self.aggregate_insights(all_trends, payload, site)
                 
             except Exception as e:
                 st.error(f"Error analyzing {site}: {str(e)}")
                 continue
         
+        # Canonical material/colour → products, for top-N and "linen + mustard" lookups
+        with self.perf.span("attribute_index", products=len(all_trends['all_products'])):
+            all_trends['attribute_index'] = AttributeIndex(all_trends['all_products'], self.attributes)
+        all_trends['aggregate'] = aggregate
+        # Streaming stats add stddev and percentiles to the min/max/average
+        all_trends['competitor_pricing'] = aggregate.price_stats()
+        
         # Generate manufacturing recommendations
-        all_trends['manufacturing_recommendations'] = self.generate_manufacturing_recommendations(all_trends)
+        with self.perf.span("recommendations"):
+            all_trends['manufacturing_recommendations'] = self.generate_manufacturing_recommendations(all_trends)
+        
+        if self.history and site_products:
+            with self.perf.span("history.record"):
+                all_trends['history'] = self.history.record_run(dict(site_products), {
+                    'competitor_pricing': all_trends['competitor_pricing'],
+                    'recommended_products': all_trends['manufacturing_recommendations']['recommended_products'],
+                })
+        
+        calls = [c for c in all_trends['llm_calls'].values() if c]
+        if calls:
+            st.caption(f"🤖 LLM calls: {sum(c['calls_made'] for c in calls)} made, "
+                       f"{sum(c['calls_saved'] for c in calls)} saved by structured data and batching")
+            gap_failures = sum(c.get('gap_failures', 0) for c in calls)
+            if gap_failures:
+                st.caption(f"⚠️ {gap_failures} gap-filling LLM calls failed; those products keep their structured data")
+        
+        all_trends['json_stats'] = json_stats = self.json.stats(since=json_before)
+        if json_stats['salvaged'] or json_stats['failed'] or json_stats['products_rejected']:
+            st.caption(f"🧩 LLM replies: {json_stats['salvaged']} salvaged, {json_stats['failed']} unusable; "
+                       f"{json_stats['products_rejected']} products rejected")
+        
+        if self.cache:
+            stats = self.cache.stats(since=cache_before)
+            all_trends['cache_stats'] = stats
+            st.caption(f"🗄️ Scrape cache: {stats['hits']} hits, {stats['misses']} misses, "
+                       f"{stats['bytes_saved'] / 1024:.1f} KB served from cache")
+        
+        all_trends['perf'] = self.perf
         
         return all_trends
     
     def process_for_manufacturing(self, data, site):
-        """Process scraped data for manufacturing insights"""
+        """Process scraped data for manufacturing insights
         
-        if isinstance(data, str):
-            try:
-                data = json.loads(data)
-            except:
-                data = {"products": [], "trends": []}
+        Raw replies go through the tolerant JSON extractor, and only products
+        that pass its schema check are kept (see all_trends['json_stats']).
+        """
+        
+        with self.perf.span("json.extract", site=site):
+            data = self.json.extract(data)
+        if isinstance(data, list):
+            data = {"products": data}
+        if not isinstance(data, dict):
+            data = {"products": [], "trends": []}
         
         # Enhanced processing for manufacturing
+        with self.perf.span("json.validate", site=site):
+            products = self.json.validate_products(data.get('products', []))
+        self.perf.count("products", len(products), site=site)
         processed_products = []
-        for product in data.get('products', []):
-            manufacturing_insights = {
-                'production_complexity': self.assess_production_complexity(product),
-                'material_cost_estimate': self.estimate_material_cost(product),
-                'recommended_suppliers': self.suggest_suppliers(product),
-                'production_time_estimate': self.estimate_production_time(product)
-            }
-            
-            product['manufacturing_insights'] = manufacturing_insights
-            processed_products.append(product)
+        with self.perf.span("heuristics", site=site, products=len(products)):
+            for product in products:
+                product['attributes'] = self.attributes.attributes(product)  # Canonical materials/colours
+                heuristics = self.heuristics.analyze(product)  # One keyword pass, memoized
+                manufacturing_insights = {
+                    'production_complexity': heuristics['production_complexity'],
+                    'material_cost_estimate': self.estimate_material_cost(product),
+                    'recommended_suppliers': list(heuristics['recommended_suppliers']),
+                    'production_time_estimate': heuristics['production_time_estimate']
+                }
+                
+                product['manufacturing_insights'] = manufacturing_insights
+                processed_products.append(product)
         
         return {
             'products': processed_products,
@@ -139,18 +494,8 @@ class EcomTrendScraper:
         }
     
     def assess_production_complexity(self, product):
-        """Assess how complex it would be to manufacture this product"""
-        complexity_score = 1  # Simple baseline
-        
-        # Analyze product description for complexity indicators
-        description = product.get('description', '').lower()
-        
-        if any(word in description for word in ['embroidery', 'printing', 'detailed', 'complex']):
-            complexity_score += 2
-        if any(word in description for word in ['simple', 'basic', 'plain']):
-            complexity_score -= 1
-        
-        return min(max(complexity_score, 1), 5)  # Scale 1-5
+        """Assess how complex it would be to manufacture this product (1-5)"""
+        return self.heuristics.analyze(product)['production_complexity']
     
     def estimate_material_cost(self, product):
         """Rough estimate of material costs"""
@@ -160,66 +505,31 @@ class EcomTrendScraper:
     
     def suggest_suppliers(self, product):
         """Suggest supplier types based on product characteristics"""
-        materials = product.get('materials', [])
-        suppliers = []
-        
-        if any('cotton' in mat.lower() for mat in materials):
-            suppliers.append("Cotton fabric suppliers")
-        if any('synthetic' in mat.lower() for mat in materials):
-            suppliers.append("Synthetic material vendors")
-        
-        return suppliers if suppliers else ["General apparel suppliers"]
+        return list(self.heuristics.analyze(product)['recommended_suppliers'])
     
     def estimate_production_time(self, product):
-        """Estimate production timeline"""
-        complexity = self.assess_production_complexity(product)
-        # Simple to complex: 2-6 weeks
-        return f"{complexity + 1} - {complexity + 3} weeks"
+        """Estimate production timeline (simple to complex: 2-6 weeks)"""
+        return self.heuristics.analyze(product)['production_time_estimate']
     
     def aggregate_insights(self, all_trends, processed_data, site):
-        """Aggregate insights from all sites"""
-        # Color analysis
+        """Aggregate per-site insights (colours); pricing comes from the streaming aggregate"""
+        # Color analysis: counts per canonical colour, so size is bounded by the palette
         colors = processed_data.get('design_elements', {}).get('colors', [])
-        for color in colors:
-            all_trends['color_analysis'].append(color)
-        
-        # Price analysis
-        prices = [p.get('price', 0) for p in processed_data['products'] if p.get('price', 0) > 0]
-        if prices:
-            all_trends['competitor_pricing'][site] = {
-                'min': min(prices),
-                'max': max(prices),
-                'average': sum(prices) / len(prices)
-            }
+        all_trends['color_analysis'].update(self.attributes.normalize_all('colors', colors))
     
     def generate_manufacturing_recommendations(self, all_trends):
-        """Generate actionable manufacturing recommendations"""
-        
-        products = all_trends['all_products']
+        """Generate actionable manufacturing recommendations
         
-        # Sort by potential profitability (simplified)
-        scored_products = []
-        for product in products:
-            score = 0
-            price = product.get('price', 0)
-            rating = product.get('rating', 0)
-            complexity = product.get('manufacturing_insights', {}).get('production_complexity', 3)
-            
-            # Simple scoring algorithm
-            if price > 0:
-                score += (price / 1000) * 2  # Higher price better
-            score += rating  # Higher rating better
-            score -= complexity  # Lower complexity better
-            
-            scored_products.append((product, score))
-        
-        # Get top recommendations
-        scored_products.sort(key=lambda x: x[1], reverse=True)
-        top_products = [p[0] for p in scored_products[:5]]
+        Reads the streaming all_trends['aggregate'] (top-5 heap and material
+        counts), built from all_products when absent.
+        """
+        # Rank by potential profitability (simplified): higher price and rating, lower complexity
+        aggregate = all_trends.get('aggregate') or TrendAggregator().add_all(all_trends['all_products'])
+        top_products = aggregate.top_products()
         
         return {
             'recommended_products': [p.get('name', 'Unknown') for p in top_products],
-            'recommended_materials': self.get_top_materials(products),
+            'recommended_materials': aggregate.top_materials(5),
             'production_timeline': {
                 'Design & Sampling': '2-3 weeks',
                 'Material Sourcing': '1-2 weeks',
@@ -230,24 +540,16 @@ class EcomTrendScraper:
         }
     
     def get_top_materials(self, products):
-        """Extract most common materials"""
-        material_count = {}
-        for product in products:
-            materials = product.get('materials', [])
-            for material in materials:
-                material_count[material] = material_count.get(material, 0) + 1
-        
-        return [mat for mat, count in sorted(material_count.items(), key=lambda x: x[1], reverse=True)[:5]]
+        """Extract most common materials (canonical names, so "100% cotton" counts as Cotton)"""
+        return AttributeIndex(products, self.attributes).top('materials', 5)
     
     def estimate_costs(self, products):
-        """Estimate manufacturing costs"""
-        avg_material_cost = sum(
-            p.get('manufacturing_insights', {}).get('material_cost_estimate', 0) 
-            for p in products if isinstance(p.get('manufacturing_insights', {}).get('material_cost_estimate'), (int, float))
-        ) / len(products) if products else 0
+        """Estimate manufacturing costs (products: a list of dicts or a ProductStore)"""
+        store = products if isinstance(products, ProductStore) else ProductStore(products)
+        avg_material_cost = store.average_material_cost()
         
         return {
             'average_material_cost_per_unit': avg_material_cost,
             'estimated_setup_cost': '₹50,000 - ₹1,00,000',
             'minimum_order_quantity': '100-500 units'
-        }
\ No newline at end of file
+        }
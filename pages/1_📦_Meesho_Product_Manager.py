@@ -3,12 +3,19 @@ import streamlit as st
 import openpyxl
 from openpyxl.styles import PatternFill
 import io
-import time
-from PIL import Image
+from collections import Counter
+
+import config
 
 # Import from utils
-from utils.imgur_upload import upload_to_imgur
-from utils.excel_generator import generate_excel
+from utils.storage import get_backend
+from utils.upload_cache import get_upload_cache
+from utils.image_preprocess import preprocess_images
+from utils.thumbnails import get_thumbnail_cache
+from utils.excel_generator import HEADERS, generate_excel, build_rows
+from utils.bulk_import import run_bulk_import
+from utils.workbook_patch import PatchableWorkbook
+from utils.variant_matrix import VariantMatrix, make_sku, parse_values
 
 # Initialize session state for variants
 if 'variants' not in st.session_state:
@@ -38,12 +45,18 @@ if uploaded_images:
     cols = st.columns(min(5, len(uploaded_images)))
     for idx, img_file in enumerate(uploaded_images[:5]):
         with cols[idx]:
-            # Reset file pointer for PIL preview
-            img_file.seek(0)
-            img = Image.open(img_file)
-            st.image(img, caption=img_file.name, width=150)
+            # Decoded once per image; reruns reuse the cached thumbnail
+            thumb = get_thumbnail_cache().get(img_file.getvalue())
+            st.image(thumb, caption=img_file.name, width=150)
     st.success("Images ready! They'll get public links in Excel.")
 
+# ——————— Optional: update an existing sheet ———————
+previous_excel = st.file_uploader(
+    "Update an existing Meesho Excel (Optional)",
+    type=["xlsx"],
+    help="Only this product's changed, added or removed variants are rewritten; every other row is kept as-is."
+)
+
 # ——————— Product Form ———————
 with st.form("main_form"):
     col1, col2 = st.columns(2)
@@ -65,29 +78,67 @@ with st.form("main_form"):
 
 # ——————— Variants Editor ———————
 st.markdown("### Variants")
-if st.button("Add Variant"):
-    st.session_state.variants.append({"size": "", "color": ""})
-    st.rerun()
 
-for i in range(len(st.session_state.variants)):
-    col1, col2, col3 = st.columns([2,2,1])
-    with col1:
-        st.session_state.variants[i]["size"] = st.text_input("Size", st.session_state.variants[i]["size"], key=f"s{i}")
-    with col2:
-        st.session_state.variants[i]["color"] = st.text_input("Color", st.session_state.variants[i]["color"], key=f"c{i}")
-    with col3:
-        if st.button("Remove", key=f"r{i}"):
-            st.session_state.variants.pop(i)
+# ——— Matrix mode: every size × colour (× extra axis) combination at once ———
+with st.expander("🧮 Variant matrix (sizes × colours)", expanded="variant_matrix" in st.session_state):
+    mx_sizes = st.text_input("Sizes", "S, M, L, XL, XXL", key="mx_sizes")
+    mx_colors = st.text_input("Colours", "Red, Blue, Green", key="mx_colors")
+    mx_extra_name = st.text_input("Extra axis (optional)", "", key="mx_extra_name", placeholder="e.g. Pattern")
+    mx_extra_values = st.text_input("Extra axis values", "", key="mx_extra_values", placeholder="e.g. Floral, Solid")
+    mcol1, mcol2 = st.columns(2)
+    with mcol1:
+        if st.button("Use matrix"):
+            axes = {"size": parse_values(mx_sizes), "color": parse_values(mx_colors)}
+            if mx_extra_name.strip() and parse_values(mx_extra_values):
+                axes[mx_extra_name.strip().lower()] = parse_values(mx_extra_values)
+            st.session_state.variant_matrix = axes
+            st.rerun()
+    with mcol2:
+        if st.button("Back to manual variants", disabled="variant_matrix" not in st.session_state):
+            st.session_state.pop("variant_matrix", None)
             st.rerun()
 
-# Clean empty variants
-st.session_state.variants = [v for v in st.session_state.variants if v.get("size","").strip() and v.get("color","").strip()]
-if not st.session_state.variants:
-    st.session_state.variants = [{"size": "M", "color": "Red"}]
+matrix = VariantMatrix(product_id, st.session_state.variant_matrix) if "variant_matrix" in st.session_state else None
 
-st.write("**Current variants:**")
-for v in st.session_state.variants:
-    st.write(f"• {v['size']} | {v['color']}")
+if matrix is not None:
+    # No per-variant widgets: the matrix is summarised instead of rendered row by row
+    summary = matrix.summary()
+    st.write(f"**Matrix:** {' × '.join(f'{n} {axis}' for axis, n in summary['axes'].items())} "
+             f"= {summary['variants']} variants ({summary['unique_skus']} unique SKUs)")
+    for axis, clashes in summary["collisions"].items():
+        for part, raw in clashes.items():
+            st.warning(f"{axis}: {', '.join(map(str, raw))} all become SKU part '{part}'")
+    if summary["duplicates"]:
+        st.warning(f"{len(summary['duplicates'])} duplicate SKUs will be written once each")
+    st.caption("Sample SKUs: " + ", ".join(matrix.skus[:5]) + (" …" if len(matrix) > 5 else ""))
+else:
+    if st.button("Add Variant"):
+        st.session_state.variants.append({"size": "", "color": ""})
+        st.rerun()
+
+    for i in range(len(st.session_state.variants)):
+        col1, col2, col3 = st.columns([2,2,1])
+        with col1:
+            st.session_state.variants[i]["size"] = st.text_input("Size", st.session_state.variants[i]["size"], key=f"s{i}")
+        with col2:
+            st.session_state.variants[i]["color"] = st.text_input("Color", st.session_state.variants[i]["color"], key=f"c{i}")
+        with col3:
+            if st.button("Remove", key=f"r{i}"):
+                st.session_state.variants.pop(i)
+                st.rerun()
+
+    # Clean empty variants
+    st.session_state.variants = [v for v in st.session_state.variants if v.get("size","").strip() and v.get("color","").strip()]
+    if not st.session_state.variants:
+        st.session_state.variants = [{"size": "M", "color": "Red"}]
+
+    st.write("**Current variants:**")
+    for v in st.session_state.variants:
+        st.write(f"• {v['size']} | {v['color']}")
+    sku_counts = Counter(make_sku(product_id, v["size"], v["color"]) for v in st.session_state.variants)
+    for sku, n in sku_counts.items():
+        if n > 1:
+            st.warning(f"SKU {sku} appears {n} times – only one row will be kept")
 
 # ——————— MAIN GENERATION ———————
 if submitted:
@@ -98,31 +149,73 @@ if submitted:
 
         # ——— Optional: Upload images if provided ———
         if uploaded_images:
-            st.info(f"Uploading {min(5, len(uploaded_images))} images to Imgur...")
-            for idx, img_file in enumerate(uploaded_images[:5]):
-                # Reset pointer for upload (after preview)
-                img_file.seek(0)
-                link = upload_to_imgur(img_file)
+            to_upload = uploaded_images[:5]
+            backend = get_backend()
+            st.info(f"Uploading {len(to_upload)} images to {backend.label}...")
+            upload_progress = st.progress(0)
+            done = []
+
+            def report(idx, img_file, link):
+                done.append(idx)
+                upload_progress.progress(len(done) / len(to_upload))
                 if link:
-                    public_links[idx] = link
                     st.success(f"Image {idx+1} ({img_file.name}): {link}")
-                time.sleep(0.5)  # Rate limit
+                else:
+                    st.warning(f"Upload failed for {img_file.name}")
+
+            # Shrink phone photos before they hit the network
+            if config.IMAGE_PREPROCESS_ENABLED:
+                to_upload, prep_stats = preprocess_images(to_upload)
+                for info in prep_stats:
+                    st.caption(f"{info['name']}: {info['original_bytes']//1024} KB → {info['processed_bytes']//1024} KB")
+                saved = sum(info['saved_bytes'] for info in prep_stats)
+                st.caption(f"Preprocessing saved {saved/1024:.0f} KB of upload")
+
+            # Reset pointers for upload (after preview)
+            for img_file in to_upload:
+                img_file.seek(0)
+            cache_before = get_upload_cache().snapshot()  # The cache is process-wide; report this upload only
+            links = backend.upload_many(to_upload, on_progress=report)
+            public_links[:len(links)] = links
+            cache_stats = get_upload_cache().stats(since=cache_before)
+            st.caption(f"Upload cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses")
+        elif previous_excel:
+            st.info("No new images → keeping the image links already in the sheet")
         else:
             st.info("No images uploaded → Excel has blank image links (add later)")
 
         # ——— Build Excel rows ———
-        rows = []
-        for var in st.session_state.variants:
-            sku = f"{product_id}-{var['size']}-{var['color']}".upper()
-            variation = f"{var['size']}|{var['color']}"
-            row = [name, variation, price, mrp, gst,
-                   public_links[0], public_links[1], public_links[2], public_links[3], public_links[4],
-                   sku, brand, product_id, description, hsn, weight, keywords]
-            rows.append(row)
-
-        excel_file = generate_excel(rows)
-        st.balloons()
-        st.success(f"Excel ready with {len(rows)} variants!")
+        def variant_rows(product, links):
+            if matrix is not None:
+                return list(matrix.iter_rows(product, links))
+            rows, seen = [], set()
+            sku_col = HEADERS.index("Seller SKU")
+            for row in build_rows(product, st.session_state.variants, links):
+                if row[sku_col] not in seen:
+                    seen.add(row[sku_col])
+                    rows.append(row)
+            return rows
+
+        product = {"product_id": product_id, "name": name, "brand": brand, "price": price, "mrp": mrp,
+                   "gst": gst, "description": description, "keywords": keywords, "hsn": hsn, "weight": weight}
+
+        if previous_excel:
+            # ——— Incremental: patch only this product's rows ———
+            workbook = PatchableWorkbook(previous_excel.getvalue())
+            existing = workbook.skus(product_id)  # Rows of this product only (exact Product ID match)
+            if not uploaded_images and existing:
+                first_link = HEADERS.index("Image Link 1")
+                public_links = workbook.row_values(existing[0])[first_link:first_link + 5]
+            rows = variant_rows(product, public_links)
+            excel_file, patch_stats = workbook.apply(**workbook.diff(rows, product_id))
+            st.balloons()
+            st.success(f"Excel updated: {patch_stats['rows_added']} added, {patch_stats['rows_removed']} removed, "
+                       f"{patch_stats['rows_rewritten']} rows rewritten, {patch_stats['rows_untouched']} untouched")
+        else:
+            rows = variant_rows(product, public_links)
+            excel_file = generate_excel(rows)
+            st.balloons()
+            st.success(f"Excel ready with {len(rows)} variants!")
         st.download_button(
             label="Download Meesho Excel (Upload Now or Add Images Later)",
             data=excel_file,
@@ -130,4 +223,45 @@ if submitted:
             mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
         )
 
+# ——————— Bulk Catalog Import ———————
+st.markdown("### Bulk Catalog Import")
+with st.expander("📚 Generate sheets for many products from one CSV/XLSX"):
+    st.markdown(
+        "Columns: **product_id, name, price, mrp** (required) and optionally "
+        "brand, gst, description, keywords, hsn, weight, "
+        "**sizes** / **colors** (`|` separated – every size × colour becomes a variant) and "
+        "**images** (up to 5 file paths or URLs, `;` separated)."
+    )
+    catalog_file = st.file_uploader("Catalog file", type=["csv", "xlsx"], key="bulk_catalog")
+    image_root = st.text_input("Folder containing the image files", "", key="bulk_image_root")
+    bulk_output = st.radio("Output", ["One combined workbook", "Zip of per-product workbooks"], key="bulk_output")
+
+    if st.button("Generate Bulk Excel", disabled=catalog_file is None):
+        bulk_progress = st.progress(0.0)
+        bulk_status = st.empty()
+
+        def report_bulk(stage, done, total):
+            bulk_progress.progress(done / total if total else 1.0)
+            bulk_status.text(f"{'Uploading images' if stage == 'images' else 'Building workbook'}: {done}/{total}")
+
+        combined = bulk_output.startswith("One")
+        result, bulk_report = run_bulk_import(
+            catalog_file, catalog_file.name, image_root,
+            output="combined" if combined else "zip", on_progress=report_bulk,
+        )
+        bulk_status.empty()
+        for err in bulk_report["errors"]:
+            st.warning(err)
+        if result is None:
+            st.error("No valid products found in the catalog")
+        else:
+            st.success(f"Built {bulk_report['rows']} rows for {bulk_report['products']} products "
+                       f"({bulk_report['images']} images, {bulk_report['failed_images']} failed)")
+            st.download_button(
+                label="Download Bulk Meesho Excel" if combined else "Download Workbooks (zip)",
+                data=result.read(),
+                file_name="meesho_bulk_ready.xlsx" if combined else "meesho_bulk_ready.zip",
+                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet" if combined else "application/zip",
+            )
+
 st.caption("Works in deployed apps – upload images directly! Images optional.")
\ No newline at end of file
@@ -1,9 +1,12 @@
 # pages/2_📈_Trend_Analysis.py
-import streamlit as st
 import time
 
+import streamlit as st
+
 # Import from utils
-from utils.trend_analyzer import get_trending_products_with_links, show_trend_results
+from utils.perf import Tracer
+from utils.trend_analyzer import (iter_live_trending_products, iter_trending_products, live_scraping_available,
+                                  show_performance_panel, show_trend_results, unsupported_live_platforms)
 
 # Page configuration
 st.set_page_config(
@@ -57,6 +60,11 @@ with st.expander("⚙️ Analysis Settings"):
         min_rating = st.slider("Minimum customer rating", 3.0, 5.0, 4.0)
         include_links = st.checkbox("Include product links", value=True, 
                                   help="Get direct links to best-selling products")
+        live_scrape = st.checkbox("Live scrape (ScrapeGraphAI + Gemini)", value=False,
+                                  disabled=not live_scraping_available(),
+                                  help="Scrape the selected platforms now instead of using the curated list. "
+                                       "Needs scrapegraphai installed and GEMINI_API_KEY set.")
+        force_refresh = st.checkbox("Ignore cached scrapes", value=False, disabled=not live_scrape)
 
 # Start analysis button
 if st.button("🚀 Start Trend Analysis", type="primary", use_container_width=True):
@@ -65,29 +73,44 @@ if st.button("🚀 Start Trend Analysis", type="primary", use_container_width=Tr
     elif not categories:
         st.error("Please select at least one category")
     else:
-        with st.spinner("🕵️ Scanning e-commerce platforms for best-selling products..."):
-            # Simulate analysis progress
-            progress_bar = st.progress(0)
-            status_text = st.empty()
-            
-            for i in range(100):
-                progress_bar.progress(i + 1)
-                if i < 25:
-                    status_text.text(f"🔍 Scanning {selected_sites[0]}...")
-                elif i < 50:
-                    status_text.text(f"🔍 Analyzing {selected_sites[1] if len(selected_sites) > 1 else 'other platforms'}...")
-                elif i < 75:
-                    status_text.text("📊 Processing sales data...")
+        progress_bar = st.progress(0.0, text=f"🔍 Scanning {len(selected_sites)} platforms...")
+        running = st.empty()
+        arrivals = st.container()
+        perf = Tracer(enabled=True)
+        started = time.perf_counter()
+        
+        if live_scrape:
+            unsupported = unsupported_live_platforms(selected_sites)
+            if unsupported:
+                st.warning(f"Live scraping is not available for {', '.join(unsupported)}; skipped")
+            stream = iter_live_trending_products(selected_sites, categories, force_refresh, perf=perf)
+        else:
+            stream = iter_trending_products(selected_sites, categories, perf=perf)
+        
+        # Render each platform as soon as it finishes
+        trending_products = []
+        for update in stream:
+            platform, products, aggregate = update["platform"], update["products"], update["aggregate"]
+            trending_products.extend(products)
+            # "total" counts the platforms actually scheduled, so the bar reaches 100%
+            progress_bar.progress(update["done"] / update["total"],
+                                  text=f"✅ {update['done']}/{update['total']} platforms • latest: {platform}")
+            with arrivals:
+                if update["status"] == "ok":
+                    st.write(f"✅ **{platform}** — {len(products)} products")
+                elif update["status"] == "timeout":
+                    st.warning(f"⏱️ {platform} took too long and was skipped")
                 else:
-                    status_text.text("🔗 Collecting product links...")
-                time.sleep(0.02)
-            
-            progress_bar.empty()
-            status_text.empty()
-            
-            # Get trending products with links
-            trending_products = get_trending_products_with_links(selected_sites, categories)
+                    st.error(f"Error analyzing {platform}: {update['error']}")
+            if aggregate is not None and aggregate.products:
+                top = ", ".join(p.get('name', 'Unknown') for p in aggregate.top_products()[:3])
+                running.info(f"📊 {aggregate.products} products so far • top picks: {top}")
+        
+        progress_bar.empty()
+        running.empty()
+        with perf.span("render"):
             show_trend_results(trending_products, include_links)
+        show_performance_panel(perf, time.perf_counter() - started)
 
 # Quick tips
 with st.expander("💡 How to use this data for manufacturing"):
@@ -0,0 +1,43 @@
+# tests/test_bulk_import.py
+import io
+
+from PIL import Image
+
+from utils.bulk_import import read_catalog, upload_catalog_images
+
+
+class _Backend:
+    def __init__(self):
+        self.uploaded = []
+
+    def upload_many(self, files):
+        files = list(files)
+        self.uploaded.extend(f.getvalue() for f in files)
+        return [f"https://i.imgur.com/{f.name}" for f in files]
+
+
+def _jpeg():
+    out = io.BytesIO()
+    Image.new("RGB", (8, 8), (10, 20, 30)).save(out, "JPEG")
+    return out.getvalue()
+
+
+def test_only_images_inside_the_root_are_uploaded(tmp_path, monkeypatch):
+    monkeypatch.setattr("config.IMAGE_PREPROCESS_ENABLED", False)
+    root = tmp_path / "images"
+    root.mkdir()
+    (root / "kurti.jpg").write_bytes(_jpeg())
+    (root / "notes.jpg").write_bytes(b"GEMINI_API_KEY=secret")
+    (tmp_path / ".env").write_bytes(b"GEMINI_API_KEY=secret")
+    (root / "link.jpg").symlink_to(tmp_path / ".env")
+
+    csv = ("product_id,name,price,mrp,images\n"
+           f"K1,Kurti,499,999,kurti.jpg;notes.jpg;../.env;{tmp_path / '.env'};link.jpg\n")
+    products, errors = read_catalog(io.BytesIO(csv.encode()), "catalog.csv")
+    assert errors == []
+
+    backend = _Backend()
+    links = upload_catalog_images(products, str(root), backend)
+    assert links["kurti.jpg"] == "https://i.imgur.com/kurti.jpg"
+    assert [links[p] for p in products[0]["images"][1:]] == ["", "", "", ""]
+    assert backend.uploaded == [_jpeg()]
@@ -0,0 +1,86 @@
+# tests/test_http_session.py
+import socket
+
+import pytest
+import requests
+
+import config
+from utils import http_session
+from utils.http_session import build_session, request_with_retries
+from utils.stub_server import StubImageHost
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Waits request_with_retries asked for, without actually sleeping"""
+    waits = []
+    monkeypatch.setattr(http_session.time, "sleep", waits.append)
+    return waits
+
+
+@pytest.fixture
+def session():
+    with build_session(pool_size=2) as s:
+        yield s
+
+
+@pytest.mark.parametrize("status", [429, 500, 502, 503, 504])
+def test_retries_retryable_statuses(status, sleeps, session):
+    with StubImageHost(fail_next=2, fail_status=status) as host:
+        response = request_with_retries("POST", host.url, session=session, retries=3, data=b"img")
+        assert response.status_code == 200
+        assert host.requests == 3
+    assert len(sleeps) == 2
+    assert all(0 <= wait <= config.HTTP_MAX_BACKOFF for wait in sleeps)
+
+
+def test_does_not_retry_client_errors(sleeps, session):
+    with StubImageHost(fail_next=1, fail_status=400) as host:
+        response = request_with_retries("POST", host.url, session=session, retries=3, data=b"img")
+        assert response.status_code == 400
+        assert host.requests == 1
+    assert sleeps == []
+
+
+def test_honours_retry_after(sleeps, session):
+    with StubImageHost(fail_next=1, fail_status=429, retry_after=7) as host:
+        response = request_with_retries("POST", host.url, session=session, retries=3, data=b"img")
+        assert response.status_code == 200
+    assert sleeps == [7.0]
+
+
+def test_retry_after_is_capped(sleeps, session):
+    with StubImageHost(fail_next=1, fail_status=503, retry_after=10 * config.HTTP_MAX_BACKOFF) as host:
+        request_with_retries("POST", host.url, session=session, retries=3, data=b"img")
+    assert sleeps == [config.HTTP_MAX_BACKOFF]
+
+
+def test_gives_up_after_max_retries(sleeps, session):
+    with StubImageHost(fail_next=10, fail_status=503) as host:
+        response = request_with_retries("POST", host.url, session=session, retries=2, data=b"img")
+        assert response.status_code == 503
+        assert host.requests == 3
+    assert len(sleeps) == 2
+
+
+def test_body_factory_rebuilds_the_body_each_attempt(sleeps, session):
+    bodies = []
+
+    def body():
+        bodies.append(b"img")
+        return iter([b"img"])  # A generator body can only be sent once
+
+    with StubImageHost(fail_next=1) as host:
+        response = request_with_retries("POST", host.url, session=session, retries=3, body_factory=body)
+        assert response.status_code == 200
+        assert host.bytes_received == 6
+    assert len(bodies) == 2
+
+
+def test_connection_errors_raise_after_retries(sleeps, session):
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]  # Nothing listens here once the socket closes
+    with pytest.raises(requests.ConnectionError):
+        request_with_retries("GET", f"http://127.0.0.1:{port}/", session=session, retries=2, timeout=1)
+    assert len(sleeps) == 2
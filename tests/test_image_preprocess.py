@@ -0,0 +1,43 @@
+# tests/test_image_preprocess.py
+import io
+
+from PIL import Image
+
+from utils.image_preprocess import preprocess_image
+
+
+def _jpeg(size=(64, 32), quality=20, **save_args):
+    out = io.BytesIO()
+    # Noise at low quality: re-encoding it at the preprocessor's quality comes out larger
+    Image.effect_noise(size, 80).convert("RGB").save(out, "JPEG", quality=quality, **save_args)
+    return out.getvalue()
+
+
+def _exif(orientation=None, gps=False):
+    exif = Image.Exif()
+    if orientation:
+        exif[0x0112] = orientation
+    if gps:
+        exif[0x8825] = {1: "N", 2: (12.0, 58.0, 0.0)}
+    return exif.tobytes()
+
+
+def test_small_clean_jpeg_is_kept_as_is():
+    data = _jpeg()
+    result, stats = preprocess_image(data, max_size=(1024, 1024))
+    assert result == data
+    assert stats["saved_bytes"] == 0
+
+
+def test_metadata_is_stripped_even_when_reencode_is_larger():
+    data = _jpeg(exif=_exif(gps=True))
+    result, _ = preprocess_image(data, max_size=(1024, 1024))
+    assert result != data
+    assert not Image.open(io.BytesIO(result)).info.get("exif")
+
+
+def test_exif_rotation_is_applied():
+    data = _jpeg(size=(64, 32), exif=_exif(orientation=6))  # Rotate 90° for display
+    result, stats = preprocess_image(data, max_size=(1024, 1024))
+    assert Image.open(io.BytesIO(result)).size == (32, 64)
+    assert stats["size"] == (32, 64)
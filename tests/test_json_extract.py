@@ -0,0 +1,37 @@
+# tests/test_json_extract.py
+from utils.json_extract import JsonExtractor
+
+
+def test_salvages_fenced_and_truncated_replies():
+    extractor = JsonExtractor()
+    assert extractor.extract('Here you go:\n```json\n{"products": [{"name": "A"}],}\n```') == {"products": [{"name": "A"}]}
+    assert extractor.extract('{"products": [{"name": "A"}, {"name": "B", "pri') == {"products": [{"name": "A"}]}
+    assert extractor.stats()["salvaged"] == 2
+
+
+def test_missing_values_are_not_coerced():
+    extractor = JsonExtractor()
+    clean = extractor.validate_product({"name": "Kurti", "description": None})
+    assert clean["description"] == ""
+    assert clean["price"] == 0
+    assert extractor.stats()["products_coerced"] == 0
+
+    assert extractor.validate_product({"name": "Kurti", "price": "₹499"})["price"] == 499.0
+    assert extractor.validate_product({"name": "Kurti", "price": 499, "rating": 4})["rating"] == 4.0
+    assert extractor.stats()["products_coerced"] == 1
+
+
+def test_rejects_unusable_products():
+    extractor = JsonExtractor()
+    assert extractor.validate_products([{"name": ""}, {"name": "A", "rating": "7/5"}, {"name": "B", "price": -1},
+                                        {"name": "C"}]) == [{"name": "C", "price": 0}]
+    assert extractor.stats()["products_rejected"] == 3
+
+
+def test_stats_since_snapshot_cover_one_run():
+    extractor = JsonExtractor()
+    extractor.validate_products([{"name": "A"}, {}])
+    before = extractor.snapshot()
+    extractor.validate_products([{"name": "B"}])
+    stats = extractor.stats(since=before)
+    assert (stats["products_valid"], stats["products_rejected"], stats["reject_rate"]) == (1, 0, 0.0)
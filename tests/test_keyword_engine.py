@@ -0,0 +1,61 @@
+# tests/test_keyword_engine.py
+import random
+
+import pytest
+
+from utils.keyword_engine import DEFAULT_TAXONOMY, KeywordEngine, ProductHeuristics
+
+
+def substring_groups(groups, text):
+    """The original `any(term in text.lower())` check, one label at a time"""
+    text = text.lower()
+    return {label for label, terms in groups.items() if any(term.lower() in text for term in terms)}
+
+
+def _vocabulary():
+    words = ["kurti", "dress", "with", "and", "fit", "print", "organic", "blend", "-", "/", " "]
+    for section in DEFAULT_TAXONOMY.values():
+        for terms in section.values():
+            words.extend(terms)
+    return words
+
+
+@pytest.mark.parametrize("section", sorted(DEFAULT_TAXONOMY))
+def test_groups_match_substring_loop_on_taxonomy(section):
+    groups = DEFAULT_TAXONOMY[section]
+    engine = KeywordEngine(groups)
+    rng = random.Random(section)
+    words = _vocabulary()
+    for _ in range(2000):
+        text = " ".join(rng.choice(words) for _ in range(rng.randint(0, 8)))
+        text = text.upper() if rng.random() < 0.1 else text
+        assert engine.groups(text) == substring_groups(groups, text), text
+
+
+def test_overlapping_terms_from_different_groups_are_all_found():
+    engine = KeywordEngine({"up": ["printing"], "down": ["print"]})
+    assert engine.groups("block printing") == {"up", "down"}
+
+    engine = KeywordEngine({"Organic suppliers": ["organic cotton"], "Cotton fabric suppliers": ["cotton"]})
+    assert engine.groups("Organic Cotton") == {"Organic suppliers", "Cotton fabric suppliers"}
+
+
+def test_whole_word_groups_include_terms_inside_longer_matches():
+    engine = KeywordEngine({"Navy": ["navy blue"], "Blue": ["blue"], "Nav": ["nav"]}, whole_words=True)
+    assert engine.groups("Navy Blue kurti") == {"Navy", "Blue"}
+    assert engine.groups("navy bluest") == set()
+
+
+def test_matches_prefers_longest_term():
+    engine = KeywordEngine({"Navy": ["navy blue"], "Blue": ["blue"]}, whole_words=True)
+    assert engine.matches("Navy Blue kurti") == ["navy blue"]
+
+
+def test_heuristics_match_original_methods():
+    heuristics = ProductHeuristics(cache_size=10)
+    product = {"description": "Detailed embroidery on a plain base", "materials": ["Organic Cotton", "synthetic lining"]}
+    result = heuristics.analyze(product)
+    assert result["production_complexity"] == 2  # +2 for "detailed", -1 for "plain"
+    assert result["recommended_suppliers"] == ["Cotton fabric suppliers", "Synthetic material vendors"]
+    assert heuristics.analyze({"description": "", "materials": []})["recommended_suppliers"] == \
+        ["General apparel suppliers"]
@@ -0,0 +1,48 @@
+# tests/test_sqlite_store.py
+import threading
+
+from utils.scrape_cache import ScrapeCache
+from utils.sqlite_store import SQLiteStore, shared
+from utils.trend_history import TrendHistory
+from utils.upload_cache import UploadCache
+
+
+def test_stores_create_their_schema_and_directory(tmp_path):
+    for cls, table in ((UploadCache, "uploads"), (ScrapeCache, "scrapes"), (TrendHistory, "runs")):
+        store = cls(str(tmp_path / cls.__name__ / "store.sqlite"))
+        assert isinstance(store, SQLiteStore)
+        with store.lock:
+            assert store.conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone() == (0,)
+
+
+def test_shared_builds_one_instance():
+    built = []
+
+    @shared
+    def get_thing():
+        """Docstring kept"""
+        built.append(object())
+        return built[-1]
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(get_thing())) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(built) == 1
+    assert all(r is built[0] for r in results)
+    assert get_thing.__doc__ == "Docstring kept"
+
+
+def test_scrape_cache_stats_since_snapshot():
+    cache = ScrapeCache(":memory:")
+    cache.put("a", {"products": []})
+    cache.get("a")
+    cache.get("missing")
+    before = cache.snapshot()
+    cache.get("a")
+    stats = cache.stats(since=before)
+    assert (stats["hits"], stats["misses"], stats["hit_rate"]) == (1, 0, 1.0)
+    assert stats["entries"] == 1
+    assert cache.stats()["hits"] == 2
@@ -0,0 +1,67 @@
+# tests/test_streaming_stats.py
+import random
+from collections import Counter
+
+import numpy as np
+import pytest
+
+from utils.product_store import ProductStore
+from utils.streaming_stats import QuantileSketch, RunningStats, TrendAggregator, to_number
+
+
+def _products(rng, n, offset=0):
+    return [{"name": f"p{offset + i}",
+             "price": rng.choice([0, None, "N/A", "₹1,299", 499, rng.randrange(100, 5000)]),
+             "rating": rng.choice([None, "4.3/5", 3.9, round(rng.uniform(1, 5), 1)]),
+             "materials": rng.sample(["Cotton", "Rayon", "Silk"], rng.randint(0, 2)),
+             "colors": rng.sample(["Red", "Blue"], rng.randint(0, 2)),
+             "manufacturing_insights": {"production_complexity": rng.choice([1, 2, 3, None])}}
+            for i in range(n)]
+
+
+def _score(product):
+    """The original per-product profitability loop"""
+    price = to_number(product.get('price', 0))
+    rating = to_number(product.get('rating', 0))
+    complexity = to_number(product['manufacturing_insights'].get('production_complexity'), 3.0)
+    return (price / 1000 * 2 if price > 0 else 0.0) + rating - complexity
+
+
+def test_store_scores_match_per_product_loop():
+    products = _products(random.Random(3), 500)
+    store = ProductStore(products)
+    assert np.allclose(store.scores(), [_score(p) for p in products])
+    best = sorted(range(len(products)), key=lambda i: -_score(products[i]))[:5]  # Stable, like top_rows
+    assert list(store.top_rows(5)) == best
+
+
+def test_merged_site_rollups_match_one_sequential_pass():
+    rng = random.Random(7)
+    sites = {f"site{i}": _products(rng, rng.randint(0, 300), i * 1000) for i in range(4)}
+    merged = TrendAggregator()
+    for order, (site, products) in enumerate(sites.items()):
+        merged.merge(TrendAggregator().add_all(products, site, order))
+
+    everything = [p for products in sites.values() for p in products]
+    best = sorted(range(len(everything)), key=lambda i: -_score(everything[i]))[:5]
+    assert [p["name"] for p in merged.top_products()] == [everything[i]["name"] for i in best]
+    assert merged.products == len(everything)
+    assert merged.materials == Counter(m for p in everything for m in p["materials"])
+    for site, products in sites.items():
+        prices = [to_number(p["price"]) for p in products if to_number(p["price"]) > 0]
+        if prices:
+            stats = merged.price_stats()[site]
+            assert (stats["min"], stats["max"]) == (min(prices), max(prices))
+            assert stats["average"] == pytest.approx(sum(prices) / len(prices))
+
+
+def test_batch_updates_match_single_updates():
+    values = np.random.default_rng(0).uniform(1, 5000, 1000)
+    one, batch = RunningStats(), RunningStats().add_many(values)
+    sketch_one, sketch_batch = QuantileSketch(), QuantileSketch().add_many(values)
+    for v in values:
+        one.add(v)
+        sketch_one.add(v)
+    assert (batch.count, batch.min, batch.max) == (one.count, one.min, one.max)
+    assert batch.mean == pytest.approx(one.mean) and batch.variance == pytest.approx(one.variance)
+    assert sketch_batch.quantile(0.5) == pytest.approx(sketch_one.quantile(0.5))
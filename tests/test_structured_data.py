@@ -0,0 +1,101 @@
+# tests/test_structured_data.py
+import os
+
+import pytest
+
+from utils.json_extract import JsonExtractor
+from utils.streaming_stats import to_number
+from utils.structured_data import extract_products, missing_fields, parse_number, parse_price, parse_rating
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+def _page(name):
+    with open(os.path.join(FIXTURES, name), encoding="utf-8") as f:
+        return f.read()
+
+
+@pytest.mark.parametrize("raw, expected", [
+    ("₹1,299", 1299.0),
+    ("₹1,299–1,599", 1299.0),
+    ("Rs. 1,29,999", 129999.0),
+    ("4.3/5", 4.3),
+    ("4.3 out of 5 stars", 4.3),
+    (499, 499.0),
+    (4.5, 4.5),
+    ("N/A", None),
+    ("", None),
+    (None, None),
+    (True, None),
+    (float("nan"), None),
+])
+def test_parse_number_reads_first_number(raw, expected):
+    assert parse_number(raw) == expected
+
+
+def test_all_stages_share_the_parser():
+    for raw in ("₹1,299–1,599", "4.3/5", "₹499", "N/A"):
+        assert to_number(raw, None) == parse_number(raw)
+    assert parse_price({"@type": "Offer", "price": "₹1,299–1,599"}) == 1299.0
+    assert parse_rating({"ratingValue": "4.3/5"}) == 4.3
+    clean = JsonExtractor().validate_product({"name": "Kurti", "price": "₹1,299–1,599", "rating": "4.3/5"})
+    assert (clean["price"], clean["rating"]) == (1299.0, 4.3)
+
+
+def test_json_ld_item_list():
+    first, second = extract_products(_page("jsonld_listing.html"))
+    assert first == {
+        "name": "Floral Print A-Line Kurti",
+        "description": "Rayon kurti with block printing and a flared hem",
+        "price": 999.0,  # Cheapest of the offers
+        "rating": 4.3,
+        "colors": ["Mustard Yellow", "Navy Blue"],
+        "materials": ["Rayon"],
+        "brand": "Anokhi Threads",
+        "url": "https://example.com/p/floral-a-line-kurti",
+    }
+    assert missing_fields(first) == []
+    assert (second["name"], second["price"]) == ("Straight Cotton Kurta", 649.0)  # AggregateOffer lowPrice
+    assert second["materials"] == ["Cotton", "Cotton blend"]
+    assert missing_fields(second) == ["rating", "colors"]
+
+
+def test_microdata_product():
+    [product] = extract_products(_page("microdata_product.html"))
+    assert product["name"] == "Embroidered Anarkali Dress"
+    assert product["description"] == "Georgette anarkali with detailed zari embroidery"
+    assert (product["price"], product["rating"]) == (2499.0, 4.6)
+    assert (product["colors"], product["materials"], product["brand"]) == (["Maroon"], ["Georgette"], "Rang Mahal")
+    assert missing_fields(product) == []
+
+
+def test_opengraph_product():
+    [product] = extract_products(_page("opengraph_product.html"))
+    assert (product["name"], product["price"], product["colors"]) == ("Linen Co-ord Set", 1899.0, ["Sage Green"])
+    assert missing_fields(product) == ["rating", "materials"]
+
+
+def test_formats_merge_into_one_product():
+    [product] = extract_products(_page("mixed_product.html"))
+    assert product["name"] == "Chikankari Cotton Kurti"
+    assert product["price"] == 1199.0                 # JSON-LD
+    assert product["rating"] == 4.1                   # Microdata
+    assert (product["colors"], product["materials"]) == (["White"], ["Cotton"])  # OpenGraph
+    assert missing_fields(product) == []
+
+
+def test_page_without_structured_data():
+    assert extract_products("<html><body><h1>Kurtis</h1><p>₹499</p></body></html>") == []
+
+
+def test_failed_gap_fill_keeps_structured_products():
+    from ecom_trend_scrapper import EcomTrendScraper
+
+    def failing_llm(source, prompt, config):
+        raise RuntimeError("quota exceeded")
+
+    page = _page("jsonld_listing.html")
+    scraper = EcomTrendScraper(cache=False, history=False, llm=failing_llm, fetch=lambda url: page)
+    result = scraper.scrape_site("amazon")
+    assert [p["name"] for p in result["products"]] == [p["name"] for p in extract_products(page)]
+    assert result["llm_calls"]["gap_failures"] == 1
@@ -0,0 +1,29 @@
+# tests/test_trend_catalog.py
+from utils.trend_analyzer import TrendCatalog, _display_product
+
+DATA = {
+    "Myntra": [
+        {"name": "Kurti A", "price": "₹1,299", "rating": "4.3", "category": "Women's Kurtis"},
+        {"name": "Kurti B", "price": "Price on request", "rating": "4.8", "category": "Women's Kurtis"},
+        {"name": "Kurti C", "rating": "", "category": "Women's Kurtis"},
+    ],
+}
+
+
+def test_unknown_prices_are_none():
+    catalog = TrendCatalog(DATA)
+    assert [p["price_value"] for p in catalog.products] == [1299, None, None]
+    assert [p["rating_value"] for p in catalog.products] == [4.3, 4.8, None]
+
+
+def test_filters_leave_out_unknown_values():
+    catalog = TrendCatalog(DATA)
+    assert [p["name"] for p in catalog.query(["Myntra"], ["Kurtis"], price_range=(0, 5000))] == ["Kurti A"]
+    assert [p["name"] for p in catalog.query(["Myntra"], ["Kurtis"], min_rating=4.0)] == ["Kurti A", "Kurti B"]
+    assert len(catalog.query(["Myntra"], ["Kurtis"])) == 3
+
+
+def test_display_product_treats_zero_price_as_unknown():
+    shown = _display_product({"name": "Kurti", "price": 0, "rating": 4.1}, "Myntra")
+    assert (shown["price"], shown["price_value"], shown["rating_value"]) == ("–", None, 4.1)
+    assert _display_product({"name": "Kurti", "price": 1299}, "Myntra")["price"] == "₹1,299"
@@ -0,0 +1,60 @@
+# tests/test_upload_cache.py
+import io
+import sqlite3
+import time
+
+from utils.storage import StorageBackend, file_hash
+from utils.upload_cache import UploadCache
+
+
+class _Recorder(StorageBackend):
+    name = "imgur"
+
+    def __init__(self, cache):
+        super().__init__(cache)
+        self.uploaded = []
+
+    def put(self, fileobj, name):
+        self.uploaded.append(name)
+        return f"https://i.imgur.com/{len(self.uploaded)}.jpg"
+
+
+def _legacy_cache(path, rows):
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE uploads (digest TEXT PRIMARY KEY, link TEXT NOT NULL, created REAL NOT NULL)")
+    conn.executemany("INSERT INTO uploads VALUES (?, ?, ?)", [(d, link, time.time()) for d, link in rows])
+    conn.commit()
+    conn.close()
+
+
+def test_bare_digests_are_migrated_to_imgur(tmp_path):
+    image = io.BytesIO(b"jpeg bytes")
+    path = str(tmp_path / "uploads.sqlite")
+    _legacy_cache(path, [(file_hash(image), "https://i.imgur.com/old.jpg")])
+
+    backend = _Recorder(UploadCache(path))
+    assert backend.upload(image, "a.jpg") == "https://i.imgur.com/old.jpg"
+    assert backend.uploaded == []
+
+
+def test_migration_keeps_existing_prefixed_entries(tmp_path):
+    path = str(tmp_path / "uploads.sqlite")
+    _legacy_cache(path, [("abc", "https://i.imgur.com/old.jpg"), ("imgur:abc", "https://i.imgur.com/new.jpg"),
+                         ("local:def", "file:///tmp/def.jpg")])
+    cache = UploadCache(path)
+    assert cache.get("imgur:abc") == "https://i.imgur.com/new.jpg"
+    assert cache.get("local:def") == "file:///tmp/def.jpg"
+    assert cache.get("abc") is None
+    assert cache.stats()["entries"] == 2
+
+
+def test_stats_since_snapshot_count_one_upload_only():
+    cache = UploadCache(":memory:")
+    cache.put("imgur:a", "https://i.imgur.com/a.jpg")
+    cache.get("imgur:a")
+    before = cache.snapshot()
+    cache.get("imgur:a")
+    cache.get("imgur:b")
+    stats = cache.stats(since=before)
+    assert (stats["hits"], stats["misses"], stats["hit_rate"]) == (1, 1, 0.5)
+    assert cache.stats()["hits"] == 2
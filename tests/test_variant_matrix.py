@@ -0,0 +1,33 @@
+# tests/test_variant_matrix.py
+from utils.excel_generator import HEADERS, build_rows
+from utils.variant_matrix import VariantMatrix, make_sku
+
+PRODUCT = {"name": "Cotton Kurti", "price": 499, "mrp": 999, "gst": 5, "brand": "Lucian", "product_id": "KURTI 01",
+           "description": "Printed", "hsn": "6204", "weight": 250, "keywords": "kurti"}
+LINKS = ["https://i.imgur.com/a.jpg", "https://i.imgur.com/b.jpg"]
+
+
+def test_matrix_rows_match_build_rows():
+    matrix = VariantMatrix(PRODUCT["product_id"], {"size": ["S", "M", "XL"], "color": ["Red", "Navy Blue"]})
+    rows = list(matrix.iter_rows(PRODUCT, LINKS))
+    assert rows == build_rows(PRODUCT, matrix.variants(), LINKS)
+    assert all(len(row) == len(HEADERS) for row in rows)
+    assert rows[0][HEADERS.index("Seller SKU")] == "KURTI 01-S-RED"
+    assert rows[-1][HEADERS.index("Seller SKU")] == "KURTI 01-XL-NAVY BLUE"
+
+
+def test_default_sku_format_is_unchanged():
+    assert make_sku("Kurti 01", "S", "Navy Blue") == f"{'Kurti 01'}-{'S'}-{'Navy Blue'}".upper()
+
+
+def test_normalized_skus_are_opt_in():
+    assert make_sku("Kurti 01", "S", "Navy Blue!", normalize=True) == "KURTI-01-S-NAVY-BLUE"
+    matrix = VariantMatrix("Kurti 01", {"size": ["S"], "color": ["Navy Blue", "navy-blue"]}, normalize_skus=True)
+    assert matrix.skus == ["KURTI-01-S-NAVY-BLUE", "KURTI-01-S-NAVY-BLUE"]
+    assert matrix.collisions == {"color": {"NAVY-BLUE": ["Navy Blue", "navy-blue"]}}
+
+
+def test_duplicate_skus_are_dropped():
+    matrix = VariantMatrix("K1", {"size": ["S", "s"], "color": ["Red"]})
+    assert matrix.duplicates == {"K1-S-RED": 2}
+    assert [row[HEADERS.index("Variation")] for row in matrix.iter_rows(PRODUCT, [])] == ["S|Red"]
@@ -0,0 +1,49 @@
+# tests/test_workbook_patch.py
+import io
+import zipfile
+
+import openpyxl
+
+from utils.excel_generator import HEADERS, generate_excel
+from utils.workbook_patch import SHEET_PATH, PatchableWorkbook
+
+SKU = HEADERS.index("Seller SKU")
+
+
+def _row(product_id, sku):
+    row = [""] * len(HEADERS)
+    row[SKU] = sku
+    row[HEADERS.index("Product ID")] = product_id
+    row[HEADERS.index("Product Name")] = f"{product_id} kurti"
+    return row
+
+
+def _sheet_skus(xlsx):
+    ws = openpyxl.load_workbook(xlsx).active
+    return [r[SKU] for r in ws.iter_rows(min_row=2, values_only=True)]
+
+
+def test_removed_rows_close_up_in_order():
+    rows = [_row("A", "A-S"), _row("A", "A-M"), _row("B", "B-S"), _row("B", "B-M"), _row("C", "C-S")]
+    workbook = PatchableWorkbook(generate_excel(rows).getvalue())
+
+    out, stats = workbook.apply(removed=["A-M", "B-M"])
+
+    assert _sheet_skus(out) == ["A-S", "B-S", "C-S"]
+    assert stats["rows_removed"] == 2
+    assert stats["rows_rewritten"] == 2  # B-S and C-S shifted up; A-S untouched
+
+
+def test_unchanged_members_keep_their_compressed_bytes():
+    original = generate_excel([_row("A", "A-S")]).getvalue()
+    out, _ = PatchableWorkbook(original).apply(updated={"A-S": {"Product Name": "Renamed"}})
+
+    with zipfile.ZipFile(io.BytesIO(original)) as before, zipfile.ZipFile(out) as after:
+        assert after.testzip() is None
+        assert after.namelist() == before.namelist()
+        for info in before.infolist():
+            if info.filename != SHEET_PATH:
+                assert after.getinfo(info.filename).CRC == info.CRC
+                assert after.getinfo(info.filename).compress_size == info.compress_size
+    out.seek(0)
+    assert openpyxl.load_workbook(out).active.cell(2, 1).value == "Renamed"
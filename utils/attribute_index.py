@@ -0,0 +1,163 @@
+# utils/attribute_index.py
+# Canonical materials/colours and an inverted index from attribute to products
+import re
+import threading
+
+import config
+from utils.keyword_engine import KeywordEngine, load_taxonomy
+
+ATTRIBUTES = ("materials", "colors")
+_PERCENT_RE = re.compile(r"\d+(?:\.\d+)?\s*%")
+_NON_WORD_RE = re.compile(r"[^a-z]+")
+# Words that qualify a material/colour rather than name one ("100% pure cotton blend")
+_FILLER = {"pure", "blend", "blended", "mix", "mixed", "rich", "fabric", "material", "premium", "soft",
+           "light", "dark", "and", "with", "of"}
+
+
+def _fallback(raw):
+    """Title-cased core of a string the taxonomy does not know ('100% Bamboo fabric' → 'Bamboo')"""
+    words = [w for w in _NON_WORD_RE.split(_PERCENT_RE.sub(" ", raw.lower())) if w and w not in _FILLER]
+    return " ".join(words).title() or None
+
+
+class AttributeNormalizer:
+    """Maps raw material/colour strings to canonical names
+
+    The "materials" and "colors" sections of the keyword taxonomy (canonical
+    name → synonyms) are compiled once into whole-word KeywordEngines.
+    "100% cotton" and "cotton blend" both become ["Cotton"]; "60% cotton 40%
+    polyester" becomes ["Cotton", "Polyester"]. Strings with no known term
+    keep their cleaned, title-cased text. Results are memoized per raw string.
+    """
+
+    def __init__(self, taxonomy=None, cache_size=None):
+        taxonomy = taxonomy or load_taxonomy()
+        self.engines = {attr: KeywordEngine(taxonomy.get(attr, {}), whole_words=True) for attr in ATTRIBUTES}
+        self.cache_size = cache_size or config.KEYWORD_CACHE_SIZE
+        self.cache = {attr: {} for attr in ATTRIBUTES}
+        self.lock = threading.Lock()
+
+    def normalize(self, attr, raw):
+        """Canonical names (in order of appearance, no duplicates) for one raw string"""
+        if not isinstance(raw, str):
+            raw = str(raw) if raw is not None else ""
+        cache = self.cache[attr]
+        found = cache.get(raw)
+        if found is not None:
+            return found
+        engine = self.engines[attr]
+        labels = []
+        for term in engine.matches(raw):
+            labels.extend(sorted(engine.labels[term]))
+        if not labels:
+            fallback = _fallback(raw)
+            labels = [fallback] if fallback else []
+        found = list(dict.fromkeys(labels))
+        with self.lock:
+            if len(cache) >= self.cache_size:
+                cache.clear()
+            cache[raw] = found
+        return found
+
+    def normalize_all(self, attr, values):
+        """Canonical names for a list (or comma-separated string) of raw values"""
+        if isinstance(values, str):
+            values = values.split(",")
+        out = []
+        for value in values or []:
+            out.extend(self.normalize(attr, value))
+        return list(dict.fromkeys(out))
+
+    def attributes(self, product):
+        """{"materials": [...], "colors": [...]} for a product dict"""
+        return {attr: self.normalize_all(attr, product.get(attr)) for attr in ATTRIBUTES}
+
+
+def canonical_values(product, attr):
+    """A product's canonical attribute values when annotated, else its raw list"""
+    attributes = product.get('attributes')
+    if isinstance(attributes, dict) and attr in attributes:
+        return attributes[attr]
+    values = product.get(attr) or []
+    return [values] if isinstance(values, str) else values
+
+
+class AttributeIndex:
+    """Inverted index: canonical material/colour → ids of the products that have it
+
+    Product ids are positions in `products`. Counts for top-N come straight
+    from posting-list sizes and combined queries intersect posting sets, so
+    neither walks the products.
+    """
+
+    def __init__(self, products=(), normalizer=None):
+        self.normalizer = normalizer
+        self.products = []
+        self.postings = {attr: {} for attr in ATTRIBUTES}
+        for product in products:
+            self.add(product)
+
+    def add(self, product):
+        """Index a product; returns its id"""
+        product_id = len(self.products)
+        self.products.append(product)
+        if self.normalizer is not None and 'attributes' not in product:
+            attributes = self.normalizer.attributes(product)
+        else:
+            attributes = {attr: canonical_values(product, attr) for attr in ATTRIBUTES}
+        for attr, values in attributes.items():
+            postings = self.postings[attr]
+            for value in values:
+                postings.setdefault(value, set()).add(product_id)
+        return product_id
+
+    def __len__(self):
+        return len(self.products)
+
+    def counts(self, attr):
+        """{canonical value: number of products}, in first-seen order"""
+        return {value: len(ids) for value, ids in self.postings[attr].items()}
+
+    def top(self, attr, n=5):
+        """The n values held by the most products (ties in first-seen order)"""
+        counts = self.counts(attr)
+        return sorted(counts, key=counts.get, reverse=True)[:n]
+
+    def _canonical(self, attr, value):
+        if self.normalizer is None:
+            return [value]
+        return self.normalizer.normalize(attr, value) or [value]
+
+    def query(self, *terms, **attrs):
+        """Sorted ids of products having every given attribute value
+
+        Keyword arguments name the attribute (materials=["Linen"],
+        colors="mustard"); positional terms ("linen", "mustard") or a single
+        "linen + mustard" string match whichever attribute knows them. Raw
+        spellings are normalized when the index has a normalizer.
+        """
+        wanted = []
+        for attr, values in attrs.items():
+            for value in [values] if isinstance(values, str) else values:
+                wanted.extend(self.postings[attr].get(v, set()) for v in self._canonical(attr, value))
+        for term in (t.strip() for text in terms for t in text.split("+")):
+            if not term:
+                continue
+            ids = set()
+            for attr in ATTRIBUTES:
+                for value in self._canonical(attr, term):
+                    ids |= self.postings[attr].get(value, set())
+            wanted.append(ids)
+        if not wanted:
+            return list(range(len(self.products)))
+        wanted.sort(key=len)
+        result = set(wanted[0])
+        for ids in wanted[1:]:
+            result &= ids
+            if not result:
+                break
+        return sorted(result)
+
+    def find(self, *terms, **attrs):
+        """Products (not ids) matching query()"""
+        return [self.products[i] for i in self.query(*terms, **attrs)]
@@ -0,0 +1,210 @@
+# utils/bulk_import.py
+# Bulk catalog import: one CSV/XLSX of products → Meesho workbook(s)
+import csv
+import io
+import os
+import tempfile
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+import openpyxl
+from PIL import Image
+
+import config
+from utils.excel_generator import build_rows, generate_excel, generate_excel_streaming
+from utils.image_preprocess import preprocess_images
+from utils.storage import get_backend
+
+REQUIRED_COLUMNS = ["product_id", "name", "price", "mrp"]
+DEFAULTS = {"brand": "Generic", "gst": 5, "description": "", "keywords": "",
+            "hsn": "", "weight": 0, "sizes": "Free Size", "colors": "Multicolor", "images": ""}
+
+
+def _split(value, seps):
+    for sep in seps[1:]:
+        value = value.replace(sep, seps[0])
+    return [v.strip() for v in value.split(seps[0]) if v.strip()]
+
+
+def _number(value, cast):
+    if isinstance(value, (int, float)):
+        return cast(value)
+    return cast(float(str(value).replace("₹", "").replace(",", "").strip()))
+
+
+def read_catalog(file, filename=None):
+    """Read products from a CSV or XLSX upload
+
+    Column names are matched case-insensitively with spaces as underscores
+    (so "Product ID" works). `sizes` and `colors` are "|" or "," separated and
+    expand to every size × colour; `images` holds up to 5 paths or URLs
+    separated by ";" or "|". Returns (products, errors) where errors are
+    human-readable messages for rows that were skipped.
+    """
+    filename = filename or getattr(file, "name", "") or ""
+    if filename.lower().endswith((".xlsx", ".xlsm")):
+        wb = openpyxl.load_workbook(file, read_only=True, data_only=True)
+        rows = wb.active.iter_rows(values_only=True)
+        header = next(rows, None) or []
+        records = (dict(zip(header, r)) for r in rows)
+    else:
+        data = file.read()
+        text = data.decode("utf-8-sig") if isinstance(data, bytes) else data
+        records = csv.DictReader(io.StringIO(text))
+
+    products, errors = [], []
+    seen = set()
+    for line, record in enumerate(records, 2):
+        record = {str(k).strip().lower().replace(" ", "_"): v for k, v in record.items() if k is not None}
+        if all(v is None or str(v).strip() == "" for v in record.values()):
+            continue
+        record = {k: (DEFAULTS.get(k) if v is None or str(v).strip() == "" else v) for k, v in record.items()}
+        missing = [c for c in REQUIRED_COLUMNS if not record.get(c)]
+        if missing:
+            errors.append(f"Row {line}: missing {', '.join(missing)}")
+            continue
+        product = {**DEFAULTS, **record}
+        product["product_id"] = str(product["product_id"]).strip()
+        if product["product_id"] in seen:
+            errors.append(f"Row {line}: duplicate product_id {product['product_id']}")
+            continue
+        try:
+            product["price"] = _number(product["price"], int)
+            product["mrp"] = _number(product["mrp"], int)
+            product["gst"] = _number(product["gst"], int)
+            product["weight"] = _number(product["weight"], int)
+        except ValueError as e:
+            errors.append(f"Row {line}: {e}")
+            continue
+        product["hsn"] = str(product["hsn"])
+        product["variants"] = [{"size": s, "color": c}
+                               for s in _split(str(product["sizes"]), "|,")
+                               for c in _split(str(product["colors"]), "|,")]
+        product["images"] = _split(str(product["images"]), ";|")[:5]
+        seen.add(product["product_id"])
+        products.append(product)
+    return products, errors
+
+
+def _resolve_image(root, path):
+    """Real path of a catalog image under `root`, or None if it points outside it (absolute, "..", symlink)"""
+    full = os.path.realpath(os.path.join(root, path))
+    return full if os.path.commonpath([root, full]) == root else None
+
+
+def _read_image(full):
+    """File bytes if Pillow can open them as an image, else None (never upload arbitrary files)"""
+    with open(full, "rb") as fh:
+        data = fh.read()
+    try:
+        with Image.open(io.BytesIO(data)) as img:
+            img.verify()
+    except Exception:
+        return None
+    return data
+
+
+def upload_catalog_images(products, image_root="", backend=None, batch_size=50, on_progress=None):
+    """Preprocess and upload every distinct local image in the catalog
+
+    URLs are passed through untouched. Local paths must resolve inside
+    `image_root` and open as images; anything else fails ("" link) without
+    being read or uploaded. Images are handled in batches so only
+    `batch_size` files are in memory at once; each batch is preprocessed
+    across the process pool and sent through one backend upload_many call.
+    Returns {path: link} ("" for images that failed).
+    """
+    backend = backend or get_backend()
+    root = os.path.realpath(image_root or ".")
+    links = {}
+    paths = []
+    for product in products:
+        for path in product["images"]:
+            if path.startswith(("http://", "https://")):
+                links[path] = path
+            else:
+                paths.append(path)
+    paths = list(dict.fromkeys(paths))  # Distinct, in first-seen order
+
+    done = 0
+    for start in range(0, len(paths), batch_size):
+        batch = paths[start:start + batch_size]
+        files, readable = [], []
+        for path in batch:
+            full = _resolve_image(root, path)
+            try:
+                data = _read_image(full) if full else None
+            except OSError:
+                data = None
+            if data is None:
+                links[path] = ""
+                continue
+            f = io.BytesIO(data)
+            f.name = os.path.basename(full)
+            files.append(f)
+            readable.append(path)
+        if config.IMAGE_PREPROCESS_ENABLED:
+            files, _ = preprocess_images(files)
+        for path, link in zip(readable, backend.upload_many(files)):
+            links[path] = link
+        done += len(batch)
+        if on_progress:
+            on_progress(done, len(paths))
+    return links
+
+
+def iter_catalog_rows(products, image_links):
+    """Meesho rows for every product and variant, in catalog order"""
+    for product in products:
+        links = [image_links.get(path, "") for path in product["images"]]
+        yield from build_rows(product, product["variants"], links)
+
+
+def _product_workbook(args):
+    product_id, rows = args
+    return product_id, generate_excel(rows, streaming=False).getvalue()
+
+
+def build_catalog_output(products, image_links, output="combined", max_workers=None):
+    """One combined workbook, or a zip of per-product workbooks built across a process pool
+
+    Returns a file object positioned at the start.
+    """
+    if output == "combined":
+        return generate_excel_streaming(iter_catalog_rows(products, image_links))
+
+    jobs = ((p["product_id"], list(iter_catalog_rows([p], image_links))) for p in products)
+    buffer = tempfile.SpooledTemporaryFile(max_size=config.EXCEL_SPOOL_MAX_BYTES)
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zf, \
+            ProcessPoolExecutor(max_workers=max_workers) as pool:
+        for product_id, data in pool.map(_product_workbook, jobs, chunksize=16):
+            zf.writestr(f"meesho_{product_id}_ready.xlsx", data)
+    buffer.seek(0)
+    return buffer
+
+
+def run_bulk_import(file, filename=None, image_root="", output="combined", backend=None, on_progress=None):
+    """Full pipeline: read catalog → upload images → build workbook(s)
+
+    Returns (output_file, report). `on_progress(stage, done, total)` is called
+    from the calling thread.
+    """
+    products, errors = read_catalog(file, filename)
+    report = {"products": len(products), "errors": errors, "rows": 0, "images": 0, "failed_images": 0}
+    if not products:
+        return None, report
+
+    image_links = upload_catalog_images(
+        products, image_root, backend,
+        on_progress=(lambda done, total: on_progress("images", done, total)) if on_progress else None,
+    )
+    report["images"] = len(image_links)
+    report["failed_images"] = sum(1 for link in image_links.values() if not link)
+    report["rows"] = sum(len(p["variants"]) for p in products)
+
+    if on_progress:
+        on_progress("workbook", 0, 1)
+    result = build_catalog_output(products, image_links, output)
+    if on_progress:
+        on_progress("workbook", 1, 1)
+    return result, report
@@ -1,20 +1,60 @@
 # utils/excel_generator.py
 import openpyxl
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.styles import PatternFill
 import io
+import tempfile
+
+import config
+from utils.variant_matrix import make_sku
+
+HEADERS = ["Product Name","Variation","Meesho Price","MRP","GST %",
+           "Image Link 1","Image Link 2","Image Link 3","Image Link 4","Image Link 5",
+           "Seller SKU","Brand Name","Product ID","Description","HSN Code","Weight (g)","Keywords"]
+
+# Shared style objects: one fill per colour instead of one per header cell
+REQUIRED_FILL = PatternFill("solid", fgColor="FF0000")   # Columns 1-10
+OPTIONAL_FILL = PatternFill("solid", fgColor="00FF00")   # Columns 11+
+
+def header_fill(col):
+    """Fill for a 1-based header column"""
+    return REQUIRED_FILL if col <= 10 else OPTIONAL_FILL
+
+def padded_links(public_links):
+    """Exactly five image link cells (extra links dropped, missing ones blank)"""
+    return (list(public_links) + [""] * 5)[:5]
+
+def product_row(product, variation, sku, links):
+    """One Meesho row in HEADERS order for a variant ("S|Red") and its SKU; `links` from padded_links()"""
+    return [product['name'], variation, product['price'], product['mrp'], product['gst'],
+            links[0], links[1], links[2], links[3], links[4],
+            sku, product['brand'], product['product_id'], product['description'],
+            product['hsn'], product['weight'], product['keywords']]
+
+def build_rows(product, variants, public_links):
+    """Meesho rows for one product, one per {"size", "color"} variant, in HEADERS order"""
+    links = padded_links(public_links)
+    return [product_row(product, f"{var['size']}|{var['color']}",
+                        make_sku(product['product_id'], var['size'], var['color']), links)
+            for var in variants]
+
+def generate_excel(rows_data, streaming=None):
+    """Generate Excel file for Meesho upload
+
+    Large row counts (or `streaming=True`) go through generate_excel_streaming.
+    """
+    if streaming is None:
+        streaming = hasattr(rows_data, "__len__") and len(rows_data) > config.EXCEL_STREAMING_MIN_ROWS
+    if streaming:
+        return generate_excel_streaming(rows_data)
 
-def generate_excel(rows_data):
-    """Generate Excel file for Meesho upload"""
     wb = openpyxl.Workbook()
     ws = wb.active
-    headers = ["Product Name","Variation","Meesho Price","MRP","GST %",
-               "Image Link 1","Image Link 2","Image Link 3","Image Link 4","Image Link 5",
-               "Seller SKU","Brand Name","Product ID","Description","HSN Code","Weight (g)","Keywords"]
     
     # Add headers with styling
-    for c, h in enumerate(headers, 1):
+    for c, h in enumerate(HEADERS, 1):
         cell = ws.cell(1, c, h)
-        cell.fill = PatternFill("solid", fgColor="FF0000" if c<=10 else "00FF00")
+        cell.fill = header_fill(c)
     
     # Add data rows
     for r, row in enumerate(rows_data, 2):
@@ -25,4 +65,30 @@ def generate_excel(rows_data):
     buffer = io.BytesIO()
     wb.save(buffer)
     buffer.seek(0)
-    return buffer
\ No newline at end of file
+    return buffer
+
+def generate_excel_streaming(rows, spool_max_size=None):
+    """Generate the same Meesho sheet with openpyxl's write-only mode
+
+    `rows` can be any iterable (e.g. a generator); each row is written as it
+    arrives, so memory stays flat as the catalog grows. The finished workbook
+    is kept in RAM up to `spool_max_size` bytes, then spills to a temp file.
+    Returns a file object positioned at the start.
+    """
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet("Sheet")
+
+    header = []
+    for c, h in enumerate(HEADERS, 1):
+        cell = WriteOnlyCell(ws, value=h)
+        cell.fill = header_fill(c)
+        header.append(cell)
+    ws.append(header)
+
+    for row in rows:
+        ws.append(row)
+
+    buffer = tempfile.SpooledTemporaryFile(max_size=spool_max_size or config.EXCEL_SPOOL_MAX_BYTES)
+    wb.save(buffer)
+    buffer.seek(0)
+    return buffer
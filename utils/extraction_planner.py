@@ -0,0 +1,166 @@
+# utils/extraction_planner.py
+# Packs a site's category pages into as few LLM calls as a token budget allows
+import re
+import threading
+from html.parser import HTMLParser
+
+import config
+
+_SKIP_TAGS = {"script", "style", "noscript", "template", "svg", "head"}
+_PAGE_MARKER = "=== PAGE {n}: {category} ==="
+
+
+def estimate_tokens(text):
+    """Rough token count (~4 characters per token for English/markup)"""
+    return len(text or "") // 4 + 1
+
+
+class _TextParser(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self.skip = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in _SKIP_TAGS:
+            self.skip += 1
+
+    def handle_endtag(self, tag):
+        if tag in _SKIP_TAGS and self.skip:
+            self.skip -= 1
+
+    def handle_data(self, data):
+        if not self.skip and data.strip():
+            self.parts.append(data.strip())
+
+
+def visible_text(html):
+    """Page text without markup, scripts or styles (what the LLM actually needs to read)"""
+    parser = _TextParser()
+    parser.feed(html)
+    parser.close()
+    return re.sub(r"\s+", " ", " ".join(parser.parts)).strip()
+
+
+class ExtractionPlanner:
+    """Groups pages into LLM calls under a per-call token budget
+
+    A page is {"category": str | None, "url": str, "text": str | None}. Pages
+    with text are packed in order into batches whose prompt + text stays under
+    `token_budget` and `max_pages` pages; a page without text (not fetched)
+    or too big to share a call goes alone and is sent by URL, so the scraper
+    library fetches and chunks it itself. Counters accumulate across plan()
+    calls (thread-safe) so batch size can be tuned from stats().
+    """
+
+    def __init__(self, token_budget=None, max_pages=None):
+        self.token_budget = token_budget or config.LLM_TOKEN_BUDGET
+        self.max_pages = max_pages or config.LLM_MAX_PAGES_PER_CALL
+        self.lock = threading.Lock()
+        self.pages = 0
+        self.calls_made = 0
+        self.tokens = 0
+
+    def plan(self, pages, prompt_tokens=0):
+        """List of batches (lists of pages), in page order within each batch"""
+        batches = []
+        current, used = [], prompt_tokens
+        for page in pages:
+            size = estimate_tokens(page["text"]) if page.get("text") else None
+            if size is None or prompt_tokens + size > self.token_budget:
+                batches.append([page])
+                continue
+            if current and (used + size > self.token_budget or len(current) >= self.max_pages):
+                batches.append(current)
+                current, used = [], prompt_tokens
+            current.append(page)
+            used += size
+        if current:
+            batches.append(current)
+
+        with self.lock:
+            self.pages += len(pages)
+            self.calls_made += len(batches)
+            self.tokens += sum(prompt_tokens + sum(estimate_tokens(p.get("text")) for p in b) for b in batches)
+        return batches
+
+    def stats(self):
+        with self.lock:
+            return {
+                "pages": self.pages,
+                "calls_made": self.calls_made,
+                "calls_saved": self.pages - self.calls_made,
+                "estimated_tokens": self.tokens,
+                "token_budget": self.token_budget,
+                "max_pages_per_call": self.max_pages,
+            }
+
+
+def batch_source(batch):
+    """SmartScraper source for a batch: the URL for a lone page, else the marked-up page texts"""
+    if len(batch) == 1:
+        return batch[0]["url"]
+    return "\n\n".join(
+        _PAGE_MARKER.format(n=n, category=page["category"]) + f"\n{page['text']}"
+        for n, page in enumerate(batch, 1)
+    )
+
+
+def batch_prompt(base_prompt, batch):
+    """Site prompt extended to answer for every category in the batch at once"""
+    if len(batch) == 1:
+        category = batch[0]["category"]
+        return base_prompt if category is None else f"{base_prompt}\nOnly include products in the category: {category}."
+    categories = [page["category"] for page in batch]
+    keys = ", ".join(f'"{c}"' for c in categories)
+    return (
+        f"{base_prompt}\n"
+        f"The input contains {len(batch)} pages, each starting with a line like "
+        f"'{_PAGE_MARKER.format(n=1, category=categories[0])}'. Extract each page separately and return JSON as "
+        '{"categories": {"<category>": {"products": [...], "trends": [...], "design_elements": {...}}}} '
+        f"with exactly these category keys: {keys}."
+    )
+
+
+def split_batch_response(answer, batch):
+    """Per-category {"products", "trends", "design_elements"} from one batch's parsed answer
+
+    Accepts the requested {"categories": {...}} shape, a bare
+    {category: [...]} mapping, or a flat {"products": [...]} whose items carry
+    a "category" field; products that cannot be placed go to the first
+    category in the batch.
+    """
+    categories = [page["category"] for page in batch]
+    out = {c: {"products": [], "trends": [], "design_elements": {}} for c in categories}
+    if not isinstance(answer, dict):
+        return out
+    lookup = {str(c).strip().lower(): c for c in categories if c is not None}
+
+    def target(name):
+        return lookup.get(str(name).strip().lower(), categories[0]) if name is not None else categories[0]
+
+    grouped = answer.get("categories") if isinstance(answer.get("categories"), dict) else None
+    if grouped is None and len(batch) > 1 and any(str(k).strip().lower() in lookup for k in answer):
+        grouped = answer
+    if grouped is None:
+        for product in answer.get("products", []):
+            if isinstance(product, dict):
+                out[target(product.get("category"))]["products"].append(product)
+        out[categories[0]]["trends"] = list(answer.get("trends", []))
+        out[categories[0]]["design_elements"] = dict(answer.get("design_elements") or {})
+        return out
+
+    for name, section in grouped.items():
+        if str(name).strip().lower() not in lookup:
+            continue
+        bucket = out[target(name)]
+        if isinstance(section, list):
+            section = {"products": section}
+        if not isinstance(section, dict):
+            continue
+        bucket["products"].extend(p for p in section.get("products", []) if isinstance(p, dict))
+        bucket["trends"].extend(section.get("trends", []))
+        for key, values in (section.get("design_elements") or {}).items():
+            bucket["design_elements"].setdefault(key, [])
+            bucket["design_elements"][key].extend(values if isinstance(values, list) else [values])
+    return out
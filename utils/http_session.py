@@ -0,0 +1,87 @@
+# utils/http_session.py
+import functools
+import random
+import time
+from email.utils import parsedate_to_datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import config
+
+try:
+    import streamlit as st
+    _cache_resource = st.cache_resource
+except ImportError:  # Headless use (benchmarks, scripts)
+    _cache_resource = functools.lru_cache(maxsize=None)
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+def build_session(pool_size=None):
+    """New requests.Session with a bounded keep-alive connection pool"""
+    pool_size = pool_size or config.HTTP_POOL_SIZE
+    session = requests.Session()
+    # Retries are handled in request_with_retries so Retry-After and jitter apply to POSTs too
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0, pool_block=True)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+@_cache_resource
+def get_session():
+    """Process-wide pooled session, kept alive across Streamlit reruns"""
+    return build_session()
+
+
+def retry_after_seconds(response):
+    """Parse a Retry-After header (seconds or HTTP date) into seconds, or None"""
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt, base=None, cap=None):
+    """Exponential backoff with full jitter for the given (0-based) retry"""
+    base = config.HTTP_BACKOFF if base is None else base
+    cap = config.HTTP_MAX_BACKOFF if cap is None else cap
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+def request_with_retries(method, url, session=None, retries=None, timeout=None, body_factory=None, **kwargs):
+    """Send a request, retrying 429/5xx and connection errors with backoff
+
+    `body_factory`, if given, is called before every attempt to produce a fresh
+    `data` body (needed for streamed bodies that can only be read once).
+    Returns the last response; raises the last connection error if every attempt failed.
+    """
+    session = session or get_session()
+    retries = config.HTTP_RETRIES if retries is None else retries
+    timeout = timeout or (config.HTTP_CONNECT_TIMEOUT, config.HTTP_READ_TIMEOUT)
+
+    for attempt in range(retries + 1):
+        if body_factory:
+            kwargs["data"] = body_factory()
+        try:
+            response = session.request(method, url, timeout=timeout, **kwargs)
+        except (requests.ConnectionError, requests.Timeout):
+            if attempt == retries:
+                raise
+            time.sleep(backoff_delay(attempt))
+            continue
+
+        if response.status_code not in RETRY_STATUSES or attempt == retries:
+            return response
+        wait = retry_after_seconds(response)
+        wait = backoff_delay(attempt) if wait is None else min(wait, config.HTTP_MAX_BACKOFF)
+        response.close()  # Hand the connection back to the pool
+        time.sleep(wait)
@@ -0,0 +1,97 @@
+# utils/image_preprocess.py
+import io
+from concurrent.futures import ProcessPoolExecutor
+
+from PIL import Image, ImageOps
+
+import config
+
+# Image.info keys that carry metadata (EXIF holds GPS and the camera's orientation)
+_METADATA_KEYS = ("exif", "icc_profile", "xmp", "XML:com.adobe.xmp", "comment", "photoshop")
+
+
+def _is_clean_jpeg(img, original):
+    """True if `original` is already what preprocessing makes: an RGB JPEG with no metadata, not resized or rotated"""
+    return (original.format == "JPEG" and original.mode == "RGB" and img.size == original.size
+            and not any(original.info.get(key) for key in _METADATA_KEYS))
+
+
+def preprocess_image(data, max_size=None, target_bytes=None, min_quality=None):
+    """Auto-orient, resize, strip metadata and recompress one image to a JPEG byte budget
+
+    Returns (jpeg_bytes, stats). The original bytes are kept only when the
+    re-encode would be larger and the original needs no rotation, resizing
+    or metadata stripping, so EXIF (GPS included) never survives.
+    """
+    max_size = max_size or config.IMAGE_MAX_SIZE
+    target_bytes = target_bytes or config.IMAGE_TARGET_BYTES
+    min_quality = min_quality or config.IMAGE_MIN_QUALITY
+
+    original = img = Image.open(io.BytesIO(data))
+    img = ImageOps.exif_transpose(img)  # Apply the phone's rotation before EXIF is dropped
+    img.thumbnail(max_size, Image.LANCZOS)
+    if img.mode != "RGB":
+        # JPEG has no alpha; flatten transparent PNGs onto white
+        background = Image.new("RGB", img.size, (255, 255, 255))
+        background.paste(img, mask=img.convert("RGBA").split()[-1])
+        img = background
+
+    # Saving a fresh RGB image without exif=/icc_profile= strips all metadata
+    quality = 90
+    while True:
+        out = io.BytesIO()
+        img.save(out, "JPEG", quality=quality, optimize=True, progressive=True)
+        if out.tell() <= target_bytes or quality <= min_quality:
+            break
+        quality -= 10
+    result = out.getvalue()
+
+    if len(result) >= len(data) and _is_clean_jpeg(img, original):
+        result = data
+    stats = {
+        "original_bytes": len(data),
+        "processed_bytes": len(result),
+        "saved_bytes": len(data) - len(result),
+        "size": img.size,
+        "quality": quality,
+    }
+    return result, stats
+
+
+def _preprocess_safe(data):
+    try:
+        return preprocess_image(data)
+    except Exception as e:
+        # Unreadable image: upload it untouched rather than dropping it
+        return data, {"original_bytes": len(data), "processed_bytes": len(data),
+                      "saved_bytes": 0, "error": str(e)}
+
+
+def preprocess_images(files, max_workers=None):
+    """Preprocess uploaded files across a process pool
+
+    Returns a list of in-memory files (same order, same `.name`) ready for the
+    uploader, and a matching list of per-image stats.
+    """
+    files = list(files)
+    if not files:
+        return [], []
+    payloads = []
+    for f in files:
+        f.seek(0)
+        payloads.append(f.read())
+
+    workers = max_workers or config.IMAGE_PREPROCESS_WORKERS
+    if len(payloads) == 1:
+        results = [_preprocess_safe(payloads[0])]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_preprocess_safe, payloads))
+
+    prepared, stats = [], []
+    for f, (data, info) in zip(files, results):
+        out = io.BytesIO(data)
+        out.name = getattr(f, "name", "image.jpg")
+        prepared.append(out)
+        stats.append({"name": out.name, **info})
+    return prepared, stats
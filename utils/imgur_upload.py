@@ -1,19 +1,22 @@
 # utils/imgur_upload.py
-import requests
-import base64
+import io
 
-def upload_to_imgur(uploaded_file):
-    """Upload image to Imgur and return public link"""
-    url = "https://api.imgur.com/3/image"
+from utils.storage import ImgurBackend, UploadError
+
+
+def upload_bytes(bytes_data, url=None, session=None):
+    """Upload raw image bytes to Imgur and return the public link (raises UploadError)"""
+    return ImgurBackend(url=url, session=session, cache=False).put(io.BytesIO(bytes_data), "image.jpg")
+
+
+def upload_to_imgur(uploaded_file, cache=None, session=None):
+    """Upload image to Imgur and return public link
+
+    Images already uploaded (same bytes) are served from the upload cache
+    without touching the network. Pass `cache=False` to force an upload.
+    Returns "" on failure; use ImgurBackend.upload() to get the error instead.
+    """
     try:
-        # Read bytes from uploaded file
-        bytes_data = uploaded_file.read()
-        payload = base64.b64encode(bytes_data)
-        headers = {'Authorization': 'Client-ID 546c25a59c58ad7'}
-        r = requests.post(url, headers=headers, data=payload)
-        if r.status_code == 200:
-            return r.json()['data']['link']
-        else:
-            return ""
+        return ImgurBackend(session=session, cache=cache).upload(uploaded_file)
     except Exception as e:
-        return ""
\ No newline at end of file
+        return ""
@@ -0,0 +1,214 @@
+# utils/json_extract.py
+# Pull the JSON payload out of noisy LLM replies and keep whatever products are valid
+import json
+import re
+import threading
+
+from utils.structured_data import parse_list, parse_price, parse_rating
+
+try:
+    import orjson
+
+    def loads(text):
+        return orjson.loads(text)
+except ImportError:  # Optional speed-up
+    loads = json.loads
+
+_FENCE_RE = re.compile(r"```[a-zA-Z0-9_-]*\s*\n?(.*?)(?:```|$)", re.S)
+_TRAILING_COMMA_RE = re.compile(r",(\s*[}\]])")
+_SIGNIFICANT_RE = re.compile(r'[\\"{}\[\]]')  # The only characters _scan needs to look at
+_CLOSERS = {"{": "}", "[": "]"}
+MAX_REPAIR_ATTEMPTS = 20  # Cut points tried (latest first) on a truncated reply
+
+
+def _scan(text, start):
+    """Walk a JSON value from `start`
+
+    Returns (end, safe_points): `end` is the index just past the balanced
+    value (None if it never closes); safe_points are (index, open brackets)
+    just after each nested object/array closed, i.e. places where the text
+    can be cut and closed off to leave valid JSON.
+    """
+    stack, safe = [], []
+    in_string = False
+    escaped = -1  # Index of a character escaped by a backslash
+    for m in _SIGNIFICANT_RE.finditer(text, start):
+        i, ch = m.start(), m.group()
+        if in_string:
+            if i == escaped:
+                continue
+            if ch == "\\":
+                escaped = i + 1
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch in "{[":
+            stack.append(ch)
+        elif ch in "}]":
+            if not stack or _CLOSERS[stack[-1]] != ch:
+                return None, safe
+            stack.pop()
+            if not stack:
+                return i + 1, safe
+            safe.append((i + 1, "".join(stack)))
+    return None, safe
+
+
+def _strip_trailing_commas(text):
+    """Drop commas directly before } or ] (outside strings)"""
+    if not _TRAILING_COMMA_RE.search(text):
+        return text
+    # Split into alternating outside/inside-string runs so string contents are left alone
+    parts = re.split(r'("(?:[^"\\]|\\.)*")', text)
+    return "".join(p if i % 2 else _TRAILING_COMMA_RE.sub(r"\1", p) for i, p in enumerate(parts))
+
+
+def _try_loads(text):
+    for candidate in (text, _strip_trailing_commas(text)):
+        try:
+            return loads(candidate)
+        except ValueError:
+            continue
+    raise ValueError("not JSON")
+
+
+class JsonExtractor:
+    """Tolerant parser for LLM scrape output, with running salvage/rejection counters
+
+    extract() handles code fences, prose before/after the payload, trailing
+    commas and truncated replies (cut back to the last complete nested
+    object and closed). validate_products() keeps each product that fits
+    the schema, coercing prices/ratings/lists, and drops the rest. Uses orjson
+    when it is installed.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counts = {"clean": 0, "salvaged": 0, "failed": 0,
+                       "products_valid": 0, "products_coerced": 0, "products_rejected": 0}
+
+    def _count(self, key, n=1):
+        with self.lock:
+            self.counts[key] += n
+
+    def extract(self, text):
+        """Parsed JSON value from a reply (None if nothing usable)
+
+        Already-parsed dicts/lists pass straight through.
+        """
+        if not isinstance(text, (str, bytes)):
+            return text
+        if isinstance(text, bytes):
+            text = text.decode("utf-8", "replace")
+        try:
+            value = loads(text)
+            self._count("clean")
+            return value
+        except ValueError:
+            pass
+
+        candidates = [m.group(1) for m in _FENCE_RE.finditer(text)] + [text]
+        for candidate in candidates:
+            value = self._salvage(candidate)
+            if value is not None:
+                self._count("salvaged")
+                return value
+        self._count("failed")
+        return None
+
+    def _salvage(self, text):
+        starts = [i for i in (text.find("{"), text.find("[")) if i != -1]
+        if not starts:
+            return None
+        start = min(starts)
+        end, safe = _scan(text, start)
+        if end is not None:
+            try:
+                return _try_loads(text[start:end])
+            except ValueError:
+                pass
+        # Truncated (or broken near the end): cut at the latest point that closes cleanly
+        for cut, stack in reversed(safe[-MAX_REPAIR_ATTEMPTS:]):
+            closing = "".join(_CLOSERS[b] for b in reversed(stack))
+            try:
+                return _try_loads(text[start:cut] + closing)
+            except ValueError:
+                continue
+        return None
+
+    def validate_product(self, product):
+        """Schema-checked copy of a product dict, or None if it cannot be used
+
+        Requires a non-empty name; price must be ≥ 0 and rating within 0-5
+        when present. Prices like '₹1,299', ratings like '4.3/5' and
+        comma-separated materials/colors are coerced.
+        """
+        if not isinstance(product, dict):
+            return None
+        name = product.get('name')
+        if not isinstance(name, str) or not name.strip():
+            return None
+        clean = dict(product)
+        clean['name'] = name.strip()
+        coerced = False
+
+        price = product.get('price')
+        if price in (None, ""):
+            value = 0  # Missing: unknown, nothing converted
+        elif isinstance(price, (int, float)) and not isinstance(price, bool):
+            value = price
+        else:
+            value = parse_price(price)
+            if value is None:
+                value = 0  # Unreadable price ("N/A"): unknown, like a missing one
+            coerced = True
+        if value < 0:
+            return None
+        clean['price'] = value
+
+        if product.get('rating') not in (None, ""):
+            rating = parse_rating(product['rating'])
+            if rating is None or not 0 <= rating <= 5:
+                return None
+            coerced |= rating != product['rating']
+            clean['rating'] = rating
+
+        for key in ('materials', 'colors'):
+            if key in product and not (isinstance(product[key], list) and all(isinstance(v, str) for v in product[key])):
+                clean[key] = parse_list(product[key])
+                coerced = True
+        description = clean.get('description')
+        if description is None and 'description' in clean:
+            clean['description'] = ""  # Not the string "None"
+        elif description is not None and not isinstance(description, str):
+            clean['description'] = str(description)
+            coerced = True
+        if coerced:
+            self._count("products_coerced")
+        return clean
+
+    def validate_products(self, products):
+        """Valid products from a list (non-lists count as nothing found)"""
+        if not isinstance(products, list):
+            return []
+        valid = [p for p in (self.validate_product(p) for p in products) if p is not None]
+        self._count("products_valid", len(valid))
+        self._count("products_rejected", len(products) - len(valid))
+        return valid
+
+    def snapshot(self):
+        """Raw counters now; pass to stats(since=...) to report one run on a shared extractor"""
+        with self.lock:
+            return dict(self.counts)
+
+    def stats(self, since=None):
+        """Counters and rates, since an earlier snapshot() when given (else since creation)"""
+        counts = self.snapshot()
+        if since:
+            counts = {key: n - since.get(key, 0) for key, n in counts.items()}
+        replies = counts["clean"] + counts["salvaged"] + counts["failed"]
+        products = counts["products_valid"] + counts["products_rejected"]
+        counts["salvage_rate"] = counts["salvaged"] / replies if replies else 0.0
+        counts["reject_rate"] = counts["products_rejected"] / products if products else 0.0
+        return counts
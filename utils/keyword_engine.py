@@ -0,0 +1,239 @@
+# utils/keyword_engine.py
+# Single-pass keyword matching over a configurable taxonomy
+import json
+import re
+import threading
+from collections import OrderedDict
+
+import config
+
+# Description terms move production complexity up or down; material terms pick supplier types;
+# materials/colors hold the canonical attribute vocabulary.
+DEFAULT_TAXONOMY = {
+    "complexity": {
+        "up": ["embroidery", "printing", "detailed", "complex"],
+        "down": ["simple", "basic", "plain"],
+    },
+    "suppliers": {
+        "Cotton fabric suppliers": ["cotton"],
+        "Synthetic material vendors": ["synthetic"],
+    },
+    # Canonical attribute → synonyms, matched as whole words (see utils.attribute_index)
+    "materials": {
+        "Cotton": ["cotton", "pure cotton", "cotton blend", "cotton rich", "cambric", "poplin", "mulmul", "organic cotton"],
+        "Linen": ["linen", "flax", "linen blend"],
+        "Silk": ["silk", "pure silk", "art silk", "raw silk", "banarasi silk", "tussar"],
+        "Rayon": ["rayon", "viscose", "viscose rayon"],
+        "Polyester": ["polyester", "poly", "polyster", "poly blend"],
+        "Georgette": ["georgette"],
+        "Chiffon": ["chiffon"],
+        "Crepe": ["crepe"],
+        "Denim": ["denim", "jean", "jeans"],
+        "Wool": ["wool", "woollen", "woolen", "merino"],
+        "Khadi": ["khadi", "khaddar"],
+        "Satin": ["satin"],
+        "Velvet": ["velvet"],
+        "Nylon": ["nylon"],
+        "Elastane": ["elastane", "spandex", "lycra"],
+        "Modal": ["modal"],
+        "Net": ["net", "mesh"],
+        "Leather": ["leather", "faux leather", "pu leather"],
+        "Jute": ["jute"],
+        "Synthetic": ["synthetic", "synthetic blend"],
+    },
+    "colors": {
+        "Red": ["red", "crimson", "scarlet", "cherry"],
+        "Maroon": ["maroon", "burgundy", "wine"],
+        "Pink": ["pink", "rose", "blush", "fuchsia", "magenta", "peach"],
+        "Orange": ["orange", "rust", "coral"],
+        "Mustard": ["mustard", "mustard yellow", "ochre"],
+        "Yellow": ["yellow", "lemon"],
+        "Green": ["green", "mint", "emerald", "bottle green", "sea green", "parrot green"],
+        "Olive": ["olive", "olive green", "khaki"],
+        "Teal": ["teal", "turquoise", "aqua", "peacock blue"],
+        "Blue": ["blue", "sky blue", "royal blue", "cobalt", "powder blue"],
+        "Navy": ["navy", "navy blue", "indigo"],
+        "Purple": ["purple", "violet", "plum", "mauve"],
+        "Lavender": ["lavender", "lilac"],
+        "Brown": ["brown", "chocolate", "coffee", "tan", "camel"],
+        "Beige": ["beige", "nude", "sand", "fawn"],
+        "Cream": ["cream", "off white", "off-white", "ivory"],
+        "White": ["white"],
+        "Black": ["black", "jet black", "charcoal black"],
+        "Grey": ["grey", "gray", "charcoal", "ash", "slate"],
+        "Gold": ["gold", "golden"],
+        "Silver": ["silver"],
+        "Multicolor": ["multicolor", "multicolour", "multi color", "multi colour", "multi"],
+    },
+}
+DEFAULT_SUPPLIER = "General apparel suppliers"
+
+
+def _trie_pattern(node):
+    """Regex for a character trie, factoring shared prefixes ({"c": {"a": {"t": {"": True}}}} → cat)"""
+    if list(node) == [""]:
+        return None
+    optional = "" in node
+    branches, singles = [], []
+    for ch in sorted(k for k in node if k):
+        sub = _trie_pattern(node[ch])
+        if sub is None:
+            singles.append(re.escape(ch))
+        else:
+            branches.append(re.escape(ch) + sub)
+    if singles:
+        branches.append(singles[0] if len(singles) == 1 else "[" + "".join(singles) + "]")
+    pattern = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+    if optional:
+        pattern = "(?:" + pattern + ")?"
+    return pattern
+
+
+_WORD_CHAR_RE = re.compile(r"\w")
+
+
+class KeywordEngine:
+    """Finds which labelled term groups occur in a text with one compiled regex
+
+    `groups` maps a label to its terms, e.g. {"up": ["embroidery", ...]}. Terms
+    are folded into a prefix trie and compiled into a single alternation, so a
+    scan is one left-to-right pass whose cost barely depends on how many
+    thousand terms there are. Matching is case-insensitive and, like the old
+    `word in text` checks, matches inside words unless `whole_words` is set.
+
+    matches() keeps the longest, non-overlapping matches ("navy blue" rather
+    than "blue"), which is what normalization wants. groups() runs the same
+    alternation inside a lookahead, so it sees the longest term starting at
+    every position; each term carries the labels of the terms that are its
+    own prefixes, so a label is found whenever any of its terms occurs,
+    exactly like `any(term in text)`, even when terms overlap ("printing"
+    vs "print").
+    """
+
+    def __init__(self, groups, whole_words=False):
+        self.labels = {}
+        by_label = {}
+        for label, terms in groups.items():
+            for term in terms:
+                term = str(term).strip().lower()
+                if not term:
+                    continue
+                self.labels.setdefault(term, set()).add(label)
+                by_label.setdefault(label, set()).add(term)
+        trie = {}
+        for term in self.labels:
+            node = trie
+            for ch in term:
+                node = node.setdefault(ch, {})
+            node[""] = True
+        pattern = _trie_pattern(trie) if trie else None
+        if pattern and whole_words:
+            pattern = rf"(?<!\w)(?:{pattern})(?!\w)"
+        self.regex = re.compile(pattern, re.IGNORECASE) if pattern else None
+        self.overlapping = re.compile(f"(?=({pattern}))", re.IGNORECASE) if pattern else None
+
+        # Labels of every term that is a prefix of this one (a whole word of it with whole_words):
+        # whatever else starts where the longest match starts
+        self.prefix_labels = {}
+        for term, labels in self.labels.items():
+            found = set(labels)
+            for end in range(1, len(term)):
+                prefix = term[:end]
+                if prefix in self.labels and not (whole_words and _WORD_CHAR_RE.match(term[end])):
+                    found |= self.labels[prefix]
+            self.prefix_labels[term] = found
+        self.all_labels = set(by_label)
+
+    def __len__(self):
+        return len(self.labels)
+
+    def matches(self, text):
+        """Matched terms (lowercased), in order of appearance"""
+        if not self.regex or not text:
+            return []
+        return [m.group(0).lower() for m in self.regex.finditer(text)]
+
+    def groups(self, text):
+        """Set of labels with at least one term in the text (overlapping terms included)"""
+        found = set()
+        if not self.overlapping or not text:
+            return found
+        for m in self.overlapping.finditer(text):
+            found |= self.prefix_labels[m.group(1).lower()]
+            if found == self.all_labels:
+                break
+        return found
+
+
+def load_taxonomy(path=None):
+    """DEFAULT_TAXONOMY, with sections overridden by a JSON file if one is configured"""
+    path = path or config.KEYWORD_TAXONOMY_PATH
+    taxonomy = {section: dict(groups) for section, groups in DEFAULT_TAXONOMY.items()}
+    if path:
+        with open(path, encoding="utf-8") as f:
+            for section, groups in json.load(f).items():
+                taxonomy[section] = groups
+    return taxonomy
+
+
+class ProductHeuristics:
+    """All keyword-driven manufacturing heuristics for a product, computed together
+
+    The description is scanned once for complexity terms and the materials
+    once for supplier terms; results are memoized (LRU, `cache_size`
+    entries) on the description and materials, so repeated and duplicate
+    products cost a dict lookup.
+    """
+
+    def __init__(self, taxonomy=None, cache_size=None):
+        taxonomy = taxonomy or load_taxonomy()
+        self.complexity = KeywordEngine(taxonomy.get("complexity", {}))
+        self.suppliers = KeywordEngine(taxonomy.get("suppliers", {}))
+        self.supplier_order = list(taxonomy.get("suppliers", {}))
+        self.cache_size = cache_size or config.KEYWORD_CACHE_SIZE
+        self.cache = OrderedDict()
+        self.lock = threading.Lock()  # Sites are processed on worker threads
+        self.hits = 0
+        self.misses = 0
+
+    def analyze(self, product):
+        """{"production_complexity": 1-5, "recommended_suppliers": [...], "production_time_estimate": str}"""
+        description = product.get('description') or ''
+        materials = product.get('materials') or []
+        if isinstance(materials, str):
+            materials = [materials]
+        key = (description, tuple(str(m) for m in materials))
+        with self.lock:
+            result = self.cache.get(key)
+            if result is not None:
+                self.hits += 1
+                self.cache.move_to_end(key)
+                return result
+            self.misses += 1
+
+        found = self.complexity.groups(description)
+        complexity_score = 1  # Simple baseline
+        if "up" in found:
+            complexity_score += 2
+        if "down" in found:
+            complexity_score -= 1
+        complexity = min(max(complexity_score, 1), 5)  # Scale 1-5
+
+        # Materials are scanned as one string; the separator keeps terms from joining across entries
+        labels = self.suppliers.groups("\n".join(key[1]))
+        suppliers = [s for s in self.supplier_order if s in labels]
+
+        result = {
+            'production_complexity': complexity,
+            'recommended_suppliers': suppliers if suppliers else [DEFAULT_SUPPLIER],
+            'production_time_estimate': f"{complexity + 1} - {complexity + 3} weeks",
+        }
+        with self.lock:
+            self.cache[key] = result
+            if len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+        return result
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self.cache),
+                "complexity_terms": len(self.complexity), "supplier_terms": len(self.suppliers)}
@@ -0,0 +1,178 @@
+# utils/perf.py
+# Lightweight span timing and counters for trend runs, exportable as JSON or a Chrome trace
+import json
+import os
+import threading
+import time
+
+import config
+
+
+class _NullSpan:
+    """What span() hands out while tracing is off: entering and leaving it does nothing"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **args):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("tracer", "name", "args", "start")
+
+    def __init__(self, tracer, name, args):
+        self.tracer, self.name, self.args = tracer, name, args
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter_ns()
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        self.tracer._record(self.name, self.start, end, self.args)
+        return False
+
+    def set(self, **args):
+        """Attach arguments (counts, sizes) found out while the span is open"""
+        self.args.update(args)
+
+
+class Tracer:
+    """Collects timed spans and per-site counters for one run
+
+        with tracer.span("llm.call", site="amazon"):
+            ...
+        tracer.count("products", 25, site="amazon")
+
+    Spans nest naturally (a Chrome trace shows them stacked per thread).
+    When `enabled` is False, span() returns a shared no-op object and count()
+    returns at once, so instrumented code pays one attribute check. At most
+    `max_spans` spans are kept; later ones are only counted as dropped.
+    """
+
+    def __init__(self, enabled=None, max_spans=None):
+        self.enabled = config.PERF_ENABLED if enabled is None else enabled
+        self.max_spans = max_spans or config.PERF_MAX_SPANS
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.origin = time.perf_counter_ns()
+            self.spans = []     # (name, start_ns, end_ns, thread id, args)
+            self.counters = {}  # name → {site (None = unattributed): total}
+            self.dropped = 0
+
+    def span(self, name, **args):
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, args)
+
+    def _record(self, name, start, end, args):
+        with self.lock:
+            if len(self.spans) >= self.max_spans:
+                self.dropped += 1
+                return
+            self.spans.append((name, start, end, threading.get_ident(), args))
+
+    def count(self, name, n=1, site=None):
+        if not self.enabled:
+            return
+        with self.lock:
+            by_site = self.counters.setdefault(name, {})
+            by_site[site] = by_site.get(site, 0) + n
+
+    # ——— reports ———
+    def summary(self):
+        """{span name: {"count", "total_ms", "mean_ms", "max_ms"}}, largest total first"""
+        totals = {}
+        with self.lock:
+            spans = list(self.spans)
+        for name, start, end, _, _ in spans:
+            entry = totals.setdefault(name, [0, 0, 0])
+            duration = end - start
+            entry[0] += 1
+            entry[1] += duration
+            entry[2] = max(entry[2], duration)
+        rows = {name: {"count": n, "total_ms": total / 1e6, "mean_ms": total / n / 1e6, "max_ms": peak / 1e6}
+                for name, (n, total, peak) in totals.items()}
+        return dict(sorted(rows.items(), key=lambda item: -item[1]["total_ms"]))
+
+    def site_summary(self):
+        """{site: {span name: total_ms}} for spans tagged with a site"""
+        out = {}
+        with self.lock:
+            spans = list(self.spans)
+        for name, start, end, _, args in spans:
+            site = args.get("site")
+            if site is not None:
+                sites = out.setdefault(site, {})
+                sites[name] = sites.get(name, 0.0) + (end - start) / 1e6
+        return out
+
+    def counter_totals(self):
+        """{counter: {"total", "by_site": {site: n}}}"""
+        with self.lock:
+            counters = {name: dict(by_site) for name, by_site in self.counters.items()}
+        return {name: {"total": sum(by_site.values()),
+                       "by_site": {site: n for site, n in by_site.items() if site is not None}}
+                for name, by_site in counters.items()}
+
+    def to_dict(self):
+        """Everything recorded, with span times in ms from the tracer's start"""
+        with self.lock:
+            spans, origin, dropped = list(self.spans), self.origin, self.dropped
+        return {
+            "summary": self.summary(),
+            "sites": self.site_summary(),
+            "counters": self.counter_totals(),
+            "spans": [{"name": name, "start_ms": (start - origin) / 1e6, "duration_ms": (end - start) / 1e6,
+                       "thread": tid, "args": args} for name, start, end, tid, args in spans],
+            "dropped_spans": dropped,
+        }
+
+    def to_chrome_trace(self):
+        """Trace Event Format dict (open in chrome://tracing or ui.perfetto.dev)"""
+        with self.lock:
+            spans, origin = list(self.spans), self.origin
+        pid = os.getpid()
+        threads = {}
+        events = []
+        for name, start, end, tid, args in spans:
+            lane = threads.setdefault(tid, len(threads))
+            events.append({"name": name, "cat": name.split(".")[0], "ph": "X", "pid": pid, "tid": lane,
+                           "ts": (start - origin) / 1e3, "dur": (end - start) / 1e3,
+                           "args": {k: v if isinstance(v, (int, float, str, bool)) or v is None else str(v)
+                                    for k, v in args.items()}})
+        for tid, lane in threads.items():
+            events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": lane,
+                           "args": {"name": "main" if tid == threading.main_thread().ident else f"worker {lane}"}})
+        return {"traceEvents": events, "displayTimeUnit": "ms",
+                "otherData": {"counters": self.counter_totals()}}
+
+    def export_json(self, path=None):
+        """to_dict() as JSON text; also written to `path` when given"""
+        text = json.dumps(self.to_dict(), indent=2, default=str)
+        if path:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(text)
+        return text
+
+    def export_chrome_trace(self, path=None):
+        """to_chrome_trace() as JSON text; also written to `path` when given"""
+        text = json.dumps(self.to_chrome_trace(), default=str)
+        if path:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(text)
+        return text
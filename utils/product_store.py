@@ -0,0 +1,87 @@
+# utils/product_store.py
+# Columnar view of processed trend products for vectorized scoring and aggregation
+import numpy as np
+import pandas as pd
+
+from utils.attribute_index import ATTRIBUTES, canonical_values
+from utils.structured_data import parse_number
+
+
+def _numeric(values, default=np.nan):
+    """Scraped values ('₹499', None, '4.3/5') → float array via parse_number; unparseable → default"""
+    parsed = [parse_number(v) for v in values]
+    return np.array([default if v is None else v for v in parsed], dtype=float)
+
+
+class ProductStore:
+    """Processed products held as columns (one row per product)
+
+    `frame` has name, price, rating, complexity and material_cost columns;
+    each attribute (materials, colors) is a separate exploded (row, value)
+    frame in `attributes`, so counts never walk nested lists (canonical
+    names when products carry normalized 'attributes'). `products` keeps the
+    original dicts, row-aligned, for anything that needs the full record.
+    TrendAggregator builds one per site batch and rolls it up.
+    """
+
+    def __init__(self, products):
+        self.products = list(products)
+        insights = [p.get('manufacturing_insights') or {} for p in self.products]
+        cost = [i.get('material_cost_estimate') for i in insights]
+
+        self.frame = pd.DataFrame({
+            'name': pd.Series([p.get('name', 'Unknown') for p in self.products], dtype=object),
+            'price': _numeric([p.get('price', 0) for p in self.products]),
+            'rating': _numeric([p.get('rating', 0) for p in self.products]),
+            'complexity': _numeric([i.get('production_complexity', 3) for i in insights], default=3.0),
+            # Only numeric estimates count ("Unknown" is a placeholder, not a price)
+            'material_cost': np.array([c if isinstance(c, (int, float)) and not isinstance(c, bool) else np.nan
+                                       for c in cost], dtype=float),
+        }, index=pd.RangeIndex(len(self.products)))
+
+        self.attributes = {}
+        for attr in ATTRIBUTES:
+            rows, values = [], []
+            for i, p in enumerate(self.products):
+                for value in canonical_values(p, attr):
+                    rows.append(i)
+                    values.append(value)
+            self.attributes[attr] = pd.DataFrame({'row': np.array(rows, dtype=np.int64),
+                                                  'value': pd.Series(values, dtype=object)})
+
+    def __len__(self):
+        return len(self.frame)
+
+    def scores(self):
+        """Profitability score per row: 2 × price in thousands + rating − complexity"""
+        price = np.nan_to_num(self.frame['price'].to_numpy())
+        rating = np.nan_to_num(self.frame['rating'].to_numpy())
+        complexity = self.frame['complexity'].to_numpy()
+        return np.where(price > 0, price / 1000 * 2, 0.0) + rating - complexity
+
+    def top_rows(self, k=5):
+        """Row positions of the k best scores (ties keep scrape order)"""
+        return np.argsort(-self.scores(), kind='stable')[:k]
+
+    def positive_prices(self):
+        """Prices above zero (unknown and placeholder prices left out)"""
+        price = self.frame['price'].to_numpy()
+        return price[price > 0]
+
+    def value_counts(self, attr, rows=None):
+        """Attribute value → occurrences, in first-seen order"""
+        values = self.attributes[attr]
+        if rows is not None:
+            values = values[values['row'].isin(rows)]
+        return values.groupby('value', sort=False).size()
+
+    def top_values(self, attr, k=5):
+        """The k most common values (ties in first-seen order)"""
+        return list(self.value_counts(attr).sort_values(ascending=False, kind='stable').index[:k])
+
+    def average_material_cost(self, rows=None):
+        """Sum of numeric material cost estimates divided by the number of products considered"""
+        frame = self.frame if rows is None else self.frame.iloc[rows]
+        if frame.empty:
+            return 0
+        return float(frame['material_cost'].sum()) / len(frame)
@@ -0,0 +1,261 @@
+# utils/replay.py
+# Record/replay and fake backends for running the trend scraper offline
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+import zlib
+from urllib.parse import urlsplit
+
+from utils.extraction_planner import estimate_tokens
+from utils.scrape_cache import scrape_key
+
+_PAGE_MARKER_RE = re.compile(r"^=== PAGE \d+: (.*) ===$", re.M)
+_CATEGORY_RE = re.compile(r"Only include products in the category: (.*)\.$", re.M)
+_GAP_FIELDS_RE = re.compile(r"^extract only: (.*)\.$", re.M)
+_GAP_NAME_RE = re.compile(r"^- (.+)$", re.M)
+
+# Raw spellings on purpose, so the fake output exercises normalization
+FAKE_MATERIALS = ["100% cotton", "Cotton blend", "Pure Linen", "viscose rayon", "Polyester", "Georgette",
+                  "Rayon", "Khadi", "Chiffon", "60% cotton 40% polyester"]
+FAKE_COLORS = ["Mustard yellow", "navy blue", "Red", "Off-White", "Black", "Sea Green", "Pink", "Maroon"]
+FAKE_STYLES = ["A-line kurti", "straight kurta", "anarkali", "palazzo set", "co-ord set", "maxi dress"]
+FAKE_DETAILS = ["with detailed embroidery", "in a simple plain weave", "with block printing", "basic everyday fit"]
+
+
+def page_path(url):
+    """Path a recorded page is served under by StubPageHost ("https://amazon.com/kurtis" → "/amazon/kurtis")"""
+    parts = urlsplit(url)
+    host = parts.hostname or ""
+    if host in ("localhost", "127.0.0.1") or host.replace(".", "").isdigit():
+        return parts.path.rstrip("/") or "/"  # Already recorded against a stand-in
+    site = host[4:] if host.startswith("www.") else host
+    return f"/{site.split('.')[0]}{parts.path.rstrip('/')}"
+
+
+class ReplayStore:
+    """Directory of recorded pages (by URL) and LLM replies (by scrape key)
+
+    Layout: pages/<hash>.html, replies/<hash>.json and a manifest.json index,
+    so a recording can be inspected, diffed or checked in as a fixture.
+    Replies are keyed like the scrape cache (no API keys in the key).
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        for sub in ("pages", "replies"):
+            os.makedirs(os.path.join(path, sub), exist_ok=True)
+        manifest = os.path.join(path, "manifest.json")
+        if os.path.exists(manifest):
+            with open(manifest, encoding="utf-8") as f:
+                self.manifest = json.load(f)
+        else:
+            self.manifest = {"pages": {}, "replies": {}}
+
+    def _write_manifest(self):
+        tmp = os.path.join(self.path, "manifest.json.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.manifest, f, indent=1, sort_keys=True)
+        os.replace(tmp, os.path.join(self.path, "manifest.json"))
+
+    def save_page(self, url, html):
+        name = f"pages/{hashlib.sha256(url.encode()).hexdigest()[:24]}.html"
+        with open(os.path.join(self.path, name), "w", encoding="utf-8") as f:
+            f.write(html)
+        with self.lock:
+            self.manifest["pages"][url] = name
+            self._write_manifest()
+
+    def load_page(self, url):
+        name = self.manifest["pages"].get(url)
+        if name is None:
+            return None
+        with open(os.path.join(self.path, name), encoding="utf-8") as f:
+            return f.read()
+
+    def save_reply(self, key, result, source=None):
+        name = f"replies/{key[:24]}.json"
+        with open(os.path.join(self.path, name), "w", encoding="utf-8") as f:
+            json.dump({"source": source, "result": result}, f, default=str)
+        with self.lock:
+            self.manifest["replies"][key] = name
+            self._write_manifest()
+
+    def load_reply(self, key):
+        """Recorded result, or None when there is no recording for this key"""
+        name = self.manifest["replies"].get(key)
+        if name is None:
+            return None
+        with open(os.path.join(self.path, name), encoding="utf-8") as f:
+            return json.load(f)["result"]
+
+    def pages_by_path(self):
+        """{path: html} for every recorded page, ready for StubPageHost"""
+        return {page_path(url): self.load_page(url) for url in list(self.manifest["pages"])}
+
+
+class Recorder:
+    """Passes calls through to live backends and saves what comes back
+
+        recorder = Recorder(ReplayStore("fixtures/run1"), llm=smart_scraper_llm, fetch=fetch_html)
+        EcomTrendScraper(cache=False, llm=recorder.llm, fetch=recorder.fetch)
+    """
+
+    def __init__(self, store, llm, fetch):
+        self.store = store
+        self.live_llm = llm
+        self.live_fetch = fetch
+
+    def fetch(self, url):
+        html = self.live_fetch(url)
+        if html:
+            self.store.save_page(url, html)
+        return html
+
+    def llm(self, source, prompt, config):
+        result = self.live_llm(source, prompt, config)
+        label = source if len(source) < 300 else source[:300] + "…"
+        self.store.save_reply(scrape_key(source, prompt, config), result, label)
+        return result
+
+
+class Replayer:
+    """Serves a recording instead of the network
+
+    A page that was not recorded fetches as "" (the LLM path takes over, as
+    for a failed live fetch). An LLM call with no recording goes to
+    `fallback` (e.g. a FakeLLM) or raises LookupError, which the scraper
+    reports as a site error. Replay with the same TREND_SITE_URL as the
+    recording, since page URLs are part of the keys.
+    """
+
+    def __init__(self, store, fallback=None):
+        self.store = store
+        self.fallback = fallback
+        self.lock = threading.Lock()
+        self.counts = {"page_hits": 0, "page_misses": 0, "reply_hits": 0, "reply_misses": 0}
+
+    def _count(self, key):
+        with self.lock:
+            self.counts[key] += 1
+
+    def fetch(self, url):
+        html = self.store.load_page(url)
+        self._count("page_hits" if html is not None else "page_misses")
+        return html or ""
+
+    def llm(self, source, prompt, config):
+        result = self.store.load_reply(scrape_key(source, prompt, config))
+        if result is not None:
+            self._count("reply_hits")
+            return result
+        self._count("reply_misses")
+        if self.fallback is None:
+            raise LookupError(f"No recorded LLM reply for {source[:80]!r}")
+        return self.fallback(source, prompt, config)
+
+    def stats(self):
+        with self.lock:
+            return dict(self.counts)
+
+
+def _fake_product(rng, category, n):
+    style = rng.choice(FAKE_STYLES)
+    return {
+        "name": f"{(category or 'Trending').title()} {style} {n}",
+        "description": f"{style} {rng.choice(FAKE_DETAILS)}",
+        "price": rng.randrange(299, 2999, 10),
+        "rating": round(rng.uniform(3.2, 4.9), 1),
+        "materials": [rng.choice(FAKE_MATERIALS)],
+        "colors": rng.sample(FAKE_COLORS, rng.randint(1, 2)),
+    }
+
+
+def fake_products(seed, category, count):
+    """Deterministic product dicts for a page (same seed → same products)"""
+    rng = random.Random(zlib.crc32(f"{seed}|{category}".encode()))
+    return [_fake_product(rng, category, i) for i in range(count)]
+
+
+def synthetic_page(site, category, count, structured=True):
+    """Marketplace-like HTML with `count` products; JSON-LD when `structured`, plain listing text otherwise
+
+    Structured pages leave colours out of the JSON-LD, so the scraper still
+    makes a gap-filling LLM call for them, as with most real listings.
+    """
+    products = fake_products(f"{site}/page", category, count)
+    title = f"{site} – {category or 'trending fashion'}"
+    if structured:
+        nodes = [{"@type": "Product", "name": p["name"], "description": p["description"],
+                  "material": ", ".join(p["materials"]),
+                  "offers": {"@type": "Offer", "price": p["price"], "priceCurrency": "INR"},
+                  "aggregateRating": {"@type": "AggregateRating", "ratingValue": p["rating"]}} for p in products]
+        doc = {"@context": "https://schema.org", "@type": "ItemList",
+               "itemListElement": [{"@type": "ListItem", "position": i + 1, "item": node}
+                                   for i, node in enumerate(nodes)]}
+        body = f'<script type="application/ld+json">{json.dumps(doc)}</script>'
+    else:
+        body = "".join(f"<li><h3>{p['name']}</h3><p>{p['description']}</p><span>₹{p['price']}</span>"
+                       f"<span>{p['rating']} ★</span></li>" for p in products)
+        body = f"<ul>{body}</ul>"
+    return f"<html><head><title>{title}</title></head><body><h1>{title}</h1>{body}</body></html>"
+
+
+class FakeLLM:
+    """Stand-in for SmartScraper that answers in the shapes the scraper asks for
+
+    Batched page texts get {"categories": {...}}, gap prompts get only the
+    requested fields for the listed names, and anything else gets a flat
+    {"products", "trends", "design_elements"} reply with `products_per_page`
+    products. Output is deterministic per source and returned as JSON text,
+    like a raw model reply. Each call sleeps `latency` seconds plus
+    `latency_per_1k_tokens` per thousand input tokens.
+    """
+
+    def __init__(self, latency=0.0, latency_per_1k_tokens=0.0, products_per_page=10):
+        self.latency = latency
+        self.latency_per_1k_tokens = latency_per_1k_tokens
+        self.products_per_page = products_per_page
+        self.lock = threading.Lock()
+        self.calls = 0
+        self.tokens = 0
+
+    def __call__(self, source, prompt, config=None):
+        tokens = estimate_tokens(source) + estimate_tokens(prompt)
+        with self.lock:
+            self.calls += 1
+            self.tokens += tokens
+        delay = self.latency + self.latency_per_1k_tokens * tokens / 1000
+        if delay:
+            time.sleep(delay)
+        return json.dumps(self.answer(source, prompt))
+
+    def _section(self, seed, category):
+        products = fake_products(seed, category, self.products_per_page)
+        return {"products": products,
+                "trends": [f"{category or 'Fashion'}: {products[0]['description']}"] if products else [],
+                "design_elements": {"colors": list(dict.fromkeys(c for p in products for c in p["colors"]))}}
+
+    def answer(self, source, prompt):
+        fields = _GAP_FIELDS_RE.search(prompt)
+        if fields:
+            wanted = [f.strip() for f in fields.group(1).split(",")]
+            products = []
+            for name in _GAP_NAME_RE.findall(prompt):
+                full = _fake_product(random.Random(zlib.crc32(name.encode())), None, 0)
+                products.append({"name": name, **{f: full[f] for f in wanted if f in full}})
+            return {"products": products}
+        categories = _PAGE_MARKER_RE.findall(source)
+        if categories:
+            seed = zlib.crc32(source.encode())
+            return {"categories": {c: self._section(f"{seed}|{i}", c) for i, c in enumerate(categories)}}
+        category = _CATEGORY_RE.search(prompt)
+        return self._section(source[:256], category.group(1) if category else None)
+
+    def stats(self):
+        with self.lock:
+            return {"calls": self.calls, "tokens": self.tokens}
@@ -0,0 +1,119 @@
+# utils/scrape_cache.py
+import hashlib
+import json
+import time
+
+import config
+from utils.sqlite_store import SQLiteStore, shared
+
+
+def scrape_key(source, prompt, llm_config):
+    """Cache key for one scrape: source URL + prompt hash + model config (minus secrets)"""
+    safe_config = {
+        section: {k: v for k, v in values.items() if "key" not in k.lower()} if isinstance(values, dict) else values
+        for section, values in (llm_config or {}).items()
+    }
+    material = json.dumps({
+        "source": source,
+        "prompt": hashlib.sha256(prompt.encode()).hexdigest(),
+        "config": safe_config,
+    }, sort_keys=True, default=str)
+    return hashlib.sha256(material.encode()).hexdigest()
+
+
+class ScrapeCache(SQLiteStore):
+    """Persistent TTL cache of SmartScraper results, bounded by total stored bytes"""
+
+    schema = (
+        "CREATE TABLE IF NOT EXISTS scrapes ("
+        " key TEXT PRIMARY KEY,"
+        " source TEXT,"
+        " payload TEXT NOT NULL,"
+        " size INTEGER NOT NULL,"
+        " created REAL NOT NULL,"
+        " accessed REAL NOT NULL);"
+        "CREATE INDEX IF NOT EXISTS scrapes_accessed ON scrapes (accessed);"
+    )
+
+    def __init__(self, path=None, ttl=None, max_bytes=None):
+        super().__init__(path or config.SCRAPE_CACHE_PATH)
+        self.ttl = ttl if ttl is not None else config.SCRAPE_CACHE_TTL
+        self.max_bytes = max_bytes or config.SCRAPE_CACHE_MAX_BYTES
+        self.hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """Cached result for a key, or None if missing/expired"""
+        with self.lock:
+            row = self.conn.execute("SELECT payload, size, created FROM scrapes WHERE key = ?", (key,)).fetchone()
+            if row and self.ttl and time.time() - row[2] > self.ttl:
+                self.conn.execute("DELETE FROM scrapes WHERE key = ?", (key,))
+                self.conn.commit()
+                row = None
+            if not row:
+                self.misses += 1
+                return None
+            self.conn.execute("UPDATE scrapes SET accessed = ? WHERE key = ?", (time.time(), key))
+            self.conn.commit()
+            self.hits += 1
+            self.bytes_saved += row[1]
+            return json.loads(row[0])
+
+    def put(self, key, result, source=None):
+        """Store a result (anything JSON-serializable) and evict down to max_bytes"""
+        payload = json.dumps(result, default=str)
+        now = time.time()
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO scrapes (key, source, payload, size, created, accessed) VALUES (?, ?, ?, ?, ?, ?)",
+                (key, source, payload, len(payload), now, now),
+            )
+            total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM scrapes").fetchone()[0]
+            if total > self.max_bytes:
+                for old_key, size in self.conn.execute(
+                    "SELECT key, size FROM scrapes WHERE key != ? ORDER BY accessed", (key,)
+                ).fetchall():
+                    self.conn.execute("DELETE FROM scrapes WHERE key = ?", (old_key,))
+                    self.evictions += 1
+                    total -= size
+                    if total <= self.max_bytes:
+                        break
+            self.conn.commit()
+
+    def invalidate(self, key=None, source=None):
+        with self.lock:
+            cur = self.conn.execute("DELETE FROM scrapes WHERE key = ? OR source = ?", (key, source))
+            self.conn.commit()
+            return cur.rowcount
+
+    def clear(self):
+        with self.lock:
+            self.conn.execute("DELETE FROM scrapes")
+            self.conn.commit()
+
+    def snapshot(self):
+        """Raw counters now; pass to stats(since=...) to report one run on the shared cache"""
+        with self.lock:
+            return {"hits": self.hits, "misses": self.misses, "bytes_saved": self.bytes_saved,
+                    "evictions": self.evictions}
+
+    def stats(self, since=None):
+        """Counters since an earlier snapshot() when given (else since creation), plus current size"""
+        counts = self.snapshot()
+        if since:
+            counts = {key: n - since.get(key, 0) for key, n in counts.items()}
+        with self.lock:
+            entries, size = self.conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM scrapes").fetchone()
+        lookups = counts["hits"] + counts["misses"]
+        counts["hit_rate"] = counts["hits"] / lookups if lookups else 0.0
+        counts["entries"] = entries
+        counts["bytes"] = size
+        return counts
+
+
+@shared
+def get_scrape_cache():
+    """Process-wide scrape cache"""
+    return ScrapeCache()
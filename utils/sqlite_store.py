@@ -0,0 +1,48 @@
+# utils/sqlite_store.py
+# Shared plumbing for the SQLite-backed stores and the process-wide singletons
+import functools
+import os
+import sqlite3
+import threading
+
+
+class SQLiteStore:
+    """One SQLite connection shared by every thread, serialized by `self.lock`
+
+    Subclasses set `schema` (a script of CREATE ... IF NOT EXISTS statements,
+    run on open) and hold `self.lock` around every use of `self.conn`.
+    ":memory:" opens a private in-memory database; any other path has its
+    directory created first.
+    """
+
+    schema = ""
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        if self.schema:
+            self.conn.executescript(self.schema)
+        self.conn.commit()
+
+
+def shared(factory):
+    """Turn a zero-argument factory into a getter that builds one instance on first call and returns it after
+
+    Used for the process-wide caches, so every Streamlit rerun and session
+    shares them; the lock stops two first calls from building two.
+    """
+    lock = threading.Lock()
+    instance = None
+
+    @functools.wraps(factory)
+    def get():
+        nonlocal instance
+        with lock:
+            if instance is None:
+                instance = factory()
+            return instance
+
+    return get
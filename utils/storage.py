@@ -0,0 +1,255 @@
+# utils/storage.py
+# Image storage backends: Imgur for production, local disk as an offline stand-in
+import hashlib
+import os
+import tempfile
+import uuid
+from pathlib import Path
+
+import requests
+
+import config
+from utils.http_session import request_with_retries
+from utils.upload_cache import get_upload_cache
+from utils.upload_pool import upload_images
+
+
+class UploadError(Exception):
+    """Image host rejected the upload or could not be reached"""
+
+    def __init__(self, message, status_code=None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def file_hash(fileobj, chunk_size=1024 * 1024):
+    """SHA-256 of a seekable file's remaining bytes, leaving the position unchanged"""
+    start = fileobj.tell()
+    h = hashlib.sha256()
+    for chunk in iter(lambda: fileobj.read(chunk_size), b""):
+        h.update(chunk)
+    fileobj.seek(start)
+    return h.hexdigest()
+
+
+class MultipartStream:
+    """multipart/form-data body that reads the file lazily instead of copying it
+
+    requests sends it with a Content-Length (from __len__) and pulls chunks
+    through read(), so only one chunk of the image is in memory at a time.
+    """
+
+    def __init__(self, fileobj, field="image", filename="image.jpg", fields=None,
+                 content_type="application/octet-stream", boundary=None):
+        self.boundary = boundary or uuid.uuid4().hex
+        self.fileobj = fileobj
+        start = fileobj.tell()
+        fileobj.seek(0, os.SEEK_END)
+        self.file_size = fileobj.tell() - start
+        fileobj.seek(start)
+
+        head = b""
+        for key, value in (fields or {}).items():
+            head += (f"--{self.boundary}\r\n"
+                     f'Content-Disposition: form-data; name="{key}"\r\n\r\n'
+                     f"{value}\r\n").encode()
+        head += (f"--{self.boundary}\r\n"
+                 f'Content-Disposition: form-data; name="{field}"; filename="{filename}"\r\n'
+                 f"Content-Type: {content_type}\r\n\r\n").encode()
+        self.parts = [head, None, f"\r\n--{self.boundary}--\r\n".encode()]
+        self.part = 0
+        self.offset = 0
+
+    @property
+    def content_type(self):
+        return f"multipart/form-data; boundary={self.boundary}"
+
+    def __len__(self):
+        return len(self.parts[0]) + self.file_size + len(self.parts[2])
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            size = len(self)
+        out = b""
+        while len(out) < size and self.part < 3:
+            if self.part == 1:
+                chunk = self.fileobj.read(size - len(out))
+                if not chunk:
+                    self.part += 1
+                    continue
+            else:
+                chunk = self.parts[self.part][self.offset:self.offset + size - len(out)]
+                self.offset += len(chunk)
+                if self.offset >= len(self.parts[self.part]):
+                    self.part += 1
+                    self.offset = 0
+            out += chunk
+        return out
+
+    def __iter__(self):
+        return iter(lambda: self.read(64 * 1024), b"")
+
+
+class StorageBackend:
+    """Base class: subclasses implement put(); caching and batching live here
+
+    Backends with a bulk endpoint set `supports_bulk` and override put_many(),
+    which then receives every uncached file of a batch in one call.
+    """
+
+    name = "base"
+    label = "storage"
+    supports_bulk = False
+
+    def __init__(self, cache=None):
+        if cache is None and config.UPLOAD_CACHE_ENABLED:
+            cache = get_upload_cache()
+        self.cache = cache or None
+
+    def put(self, fileobj, name):
+        """Store one file and return its public link (raises UploadError)"""
+        raise NotImplementedError
+
+    def put_many(self, items):
+        """Store [(fileobj, name), ...] and return links in order"""
+        return [self.put(f, n) for f, n in items]
+
+    def _cache_key(self, fileobj):
+        return f"{self.name}:{file_hash(fileobj)}"
+
+    def upload(self, fileobj, name=None):
+        """Upload a file (skipping it if the same bytes were uploaded before) and return the link"""
+        name = name or getattr(fileobj, "name", None) or "image.jpg"
+        fileobj.seek(0)
+        key = self._cache_key(fileobj) if self.cache else None
+        if key:
+            link = self.cache.get(key)
+            if link:
+                return link
+        link = self.put(fileobj, name)
+        if key:
+            self.cache.put(key, link)
+        return link
+
+    def upload_many(self, files, on_progress=None):
+        """Upload a batch and return links in the original order ("" for failures)
+
+        `on_progress(idx, file, link)` is called from the calling thread.
+        """
+        files = list(files)
+        if not self.supports_bulk:
+            return upload_images(files, upload_fn=self._upload_or_blank, on_progress=on_progress)
+
+        links = [""] * len(files)
+        pending = []
+        for idx, f in enumerate(files):
+            f.seek(0)
+            key = self._cache_key(f) if self.cache else None
+            link = self.cache.get(key) if key else None
+            if link:
+                links[idx] = link
+                if on_progress:
+                    on_progress(idx, f, link)
+            else:
+                pending.append((idx, f, key))
+
+        if pending:
+            try:
+                results = self.put_many([(f, getattr(f, "name", None) or "image.jpg") for _, f, _ in pending])
+            except UploadError:
+                results = [""] * len(pending)
+            for (idx, f, key), link in zip(pending, results):
+                links[idx] = link or ""
+                if link and key:
+                    self.cache.put(key, link)
+                if on_progress:
+                    on_progress(idx, f, links[idx])
+        return links
+
+    def _upload_or_blank(self, fileobj):
+        try:
+            return self.upload(fileobj)
+        except UploadError:
+            return ""
+
+
+class ImgurBackend(StorageBackend):
+    """Imgur anonymous uploads, sent as a streamed multipart body"""
+
+    name = "imgur"
+    label = "Imgur"
+
+    def __init__(self, url=None, client_id=None, session=None, cache=None):
+        super().__init__(cache)
+        self.url = url or config.IMGUR_UPLOAD_URL
+        self.client_id = client_id or config.IMGUR_CLIENT_ID
+        self.session = session
+
+    def put(self, fileobj, name):
+        start = fileobj.tell()
+        boundary = uuid.uuid4().hex  # Same boundary on every retry, so the header stays valid
+
+        def body():
+            fileobj.seek(start)
+            return MultipartStream(fileobj, field="image", filename=os.path.basename(name), boundary=boundary)
+
+        headers = {
+            "Authorization": f"Client-ID {self.client_id}",
+            "Content-Type": f"multipart/form-data; boundary={boundary}",
+        }
+        try:
+            r = request_with_retries("POST", self.url, session=self.session, headers=headers, body_factory=body)
+        except requests.RequestException as e:
+            raise UploadError(f"Could not reach image host: {e}") from e
+        if r.status_code != 200:
+            raise UploadError(f"Image host returned HTTP {r.status_code}", r.status_code)
+        try:
+            return r.json()["data"]["link"]
+        except (ValueError, KeyError, TypeError) as e:
+            raise UploadError("Unexpected response from image host", r.status_code) from e
+
+
+class LocalBackend(StorageBackend):
+    """Writes images to a local directory, named by content hash, for offline runs"""
+
+    name = "local"
+    label = "local storage"
+    supports_bulk = True
+
+    def __init__(self, root=None, base_url=None, cache=None):
+        super().__init__(cache)
+        self.root = Path(root or config.LOCAL_STORAGE_DIR)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.base_url = (base_url or config.LOCAL_STORAGE_URL or self.root.resolve().as_uri()).rstrip("/")
+
+    def put(self, fileobj, name):
+        ext = os.path.splitext(name)[1].lower() or ".jpg"
+        h = hashlib.sha256()
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as out:
+                for chunk in iter(lambda: fileobj.read(1024 * 1024), b""):
+                    h.update(chunk)
+                    out.write(chunk)
+            filename = h.hexdigest()[:32] + ext
+            os.replace(tmp_path, self.root / filename)
+        except OSError as e:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise UploadError(f"Could not write {name}: {e}") from e
+        return f"{self.base_url}/{filename}"
+
+
+BACKENDS = {
+    "imgur": ImgurBackend,
+    "local": LocalBackend,
+}
+
+
+def get_backend(name=None, **kwargs):
+    """Storage backend selected by name or config.STORAGE_BACKEND"""
+    name = name or config.STORAGE_BACKEND
+    try:
+        return BACKENDS[name](**kwargs)
+    except KeyError:
+        raise ValueError(f"Unknown storage backend {name!r}; choose from {sorted(BACKENDS)}")
@@ -0,0 +1,267 @@
+# utils/streaming_stats.py
+# Constant-memory aggregates that update per batch of products and merge across workers
+import heapq
+import math
+from collections import Counter
+
+import numpy as np
+
+from utils.product_store import ProductStore
+from utils.structured_data import parse_number
+
+
+def to_number(value, default=0.0):
+    """'₹499' / '4.2/5' / 499 → float (see parse_number); anything unparseable → default"""
+    number = parse_number(value)
+    return default if number is None else number
+
+
+class RunningStats:
+    """Online count/min/max/mean/variance (Welford), mergeable (Chan et al.)"""
+
+    __slots__ = ("count", "mean", "m2", "min", "max")
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, x):
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (x - self.mean)
+        self.min = min(self.min, x)
+        self.max = max(self.max, x)
+
+    def add_many(self, values):
+        """Fold in a NumPy array of values at once (same result as add() per value)"""
+        if not len(values):
+            return self
+        batch = RunningStats()
+        batch.count = len(values)
+        batch.mean = float(values.mean())
+        batch.m2 = float(((values - batch.mean) ** 2).sum())
+        batch.min = float(values.min())
+        batch.max = float(values.max())
+        return self.merge(batch)
+
+    def merge(self, other):
+        if not other.count:
+            return self
+        if not self.count:
+            self.count, self.mean, self.m2, self.min, self.max = other.count, other.mean, other.m2, other.min, other.max
+            return self
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    @property
+    def variance(self):
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def stddev(self):
+        return math.sqrt(self.variance)
+
+
+class QuantileSketch:
+    """DDSketch-style quantiles for positive values with bounded relative error
+
+    Values fall into logarithmic buckets of ratio gamma = (1 + a) / (1 − a),
+    so any reported quantile is within `relative_accuracy` (a) of a true
+    value. Bucket counts simply add on merge. Past `max_buckets` the lowest
+    buckets collapse together, which only costs accuracy at the low tail.
+    """
+
+    def __init__(self, relative_accuracy=0.01, max_buckets=2048):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.max_buckets = max_buckets
+        self.buckets = Counter()
+        self.zero_count = 0
+        self.count = 0
+
+    def add(self, x, weight=1):
+        if x <= 0:
+            self.zero_count += weight
+        else:
+            self.buckets[math.ceil(math.log(x) / self.log_gamma)] += weight
+            if len(self.buckets) > self.max_buckets:
+                self._collapse()
+        self.count += weight
+
+    def add_many(self, values):
+        """Bucket a NumPy array of values with one vectorized log"""
+        positive = values[values > 0]
+        self.zero_count += len(values) - len(positive)
+        self.count += len(values)
+        if len(positive):
+            keys, counts = np.unique(np.ceil(np.log(positive) / self.log_gamma).astype(np.int64),
+                                     return_counts=True)
+            self.buckets.update(dict(zip(keys.tolist(), counts.tolist())))
+            if len(self.buckets) > self.max_buckets:
+                self._collapse()
+        return self
+
+    def merge(self, other):
+        if other.gamma != self.gamma:
+            raise ValueError("Cannot merge sketches with different relative accuracy")
+        self.buckets.update(other.buckets)
+        self.zero_count += other.zero_count
+        self.count += other.count
+        if len(self.buckets) > self.max_buckets:
+            self._collapse()
+        return self
+
+    def _collapse(self):
+        keys = sorted(self.buckets)
+        excess = keys[:len(keys) - self.max_buckets + 1]
+        self.buckets[keys[len(excess)]] += sum(self.buckets.pop(k) for k in excess)
+
+    def quantile(self, q):
+        """Approximate q-quantile (0 ≤ q ≤ 1), or None when empty"""
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return 0.0
+        for key in sorted(self.buckets):
+            seen += self.buckets[key]
+            if rank < seen:
+                return 2 * self.gamma ** key / (self.gamma + 1)
+        return 2 * self.gamma ** max(self.buckets) / (self.gamma + 1)
+
+
+class _Ranked:
+    __slots__ = ("score", "order", "item")
+
+    def __init__(self, score, order, item):
+        self.score, self.order, self.item = score, order, item
+
+    def __lt__(self, other):
+        # "Worse" sorts first: lower score, then later arrival
+        if self.score != other.score:
+            return self.score < other.score
+        return self.order > other.order
+
+
+class TopK:
+    """The k highest-scoring items seen, kept in a size-k min-heap
+
+    Ties go to the item with the smaller `order` (default: arrival order),
+    matching a stable descending sort. `order` can be any comparable, e.g.
+    (site position, index) so merged worker results tie-break like a
+    sequential scan.
+    """
+
+    def __init__(self, k=5):
+        self.k = k
+        self.heap = []
+        self.seen = 0
+
+    def add(self, score, item, order=None):
+        entry = _Ranked(score, self.seen if order is None else order, item)
+        self.seen += 1
+        if len(self.heap) < self.k:
+            heapq.heappush(self.heap, entry)
+        elif self.heap[0] < entry:
+            heapq.heapreplace(self.heap, entry)
+
+    def merge(self, other):
+        for entry in other.heap:
+            if len(self.heap) < self.k:
+                heapq.heappush(self.heap, entry)
+            elif self.heap[0] < entry:
+                heapq.heapreplace(self.heap, entry)
+        self.seen += other.seen
+        return self
+
+    def items(self):
+        """Best first"""
+        return [e.item for e in sorted(self.heap, reverse=True)]
+
+
+class TrendAggregator:
+    """Streaming rollup: top-K by score, per-site price stats and sketches, material/colour counts
+
+    Each batch of products (one site's scrape) is loaded into a columnar
+    ProductStore, scored and aggregated with vectorized operations, and only
+    the rollup is kept: memory is O(k + sites + distinct materials and
+    colours) however many batches pass through. Materials and colours are
+    counted by canonical name when products carry normalized 'attributes'
+    (see utils.attribute_index). Build one per worker and merge() them in
+    site order for the same result as a single sequential pass.
+    """
+
+    def __init__(self, k=5, relative_accuracy=0.01):
+        self.relative_accuracy = relative_accuracy
+        self.top = TopK(k)
+        self.prices = {}     # site → RunningStats over positive prices
+        self.sketches = {}   # site → QuantileSketch over positive prices
+        self.materials = Counter()
+        self.colors = Counter()
+        self.products = 0
+
+    def _site(self, site):
+        if site not in self.prices:  # Fresh objects per aggregator, so merged ones stay independent
+            self.prices[site] = RunningStats()
+            self.sketches[site] = QuantileSketch(self.relative_accuracy)
+        return self.prices[site], self.sketches[site]
+
+    def add_store(self, store, site=None, site_order=0):
+        """Roll up a ProductStore whose products all come from `site`"""
+        self.products += len(store)
+        scores = store.scores()
+        for row in store.top_rows(self.top.k):  # Only a batch's own top k can reach the overall top k
+            self.top.add(float(scores[row]), store.products[row], (site_order, int(row)))
+        prices = store.positive_prices()
+        if len(prices):
+            stats, sketch = self._site(site)
+            stats.add_many(prices)
+            sketch.add_many(prices)
+        self.materials.update(store.value_counts('materials').to_dict())
+        self.colors.update(store.value_counts('colors').to_dict())
+        return self
+
+    def add_all(self, products, site=None, site_order=0):
+        return self.add_store(ProductStore(products), site, site_order)
+
+    def merge(self, other):
+        self.top.merge(other.top)
+        for site, stats in other.prices.items():
+            mine, sketch = self._site(site)
+            mine.merge(stats)
+            sketch.merge(other.sketches[site])
+        self.materials.update(other.materials)
+        self.colors.update(other.colors)
+        self.products += other.products
+        return self
+
+    def price_stats(self, quantiles=(0.25, 0.5, 0.75, 0.9)):
+        """{site: {'min', 'max', 'average', 'stddev', 'p25', ...}}"""
+        out = {}
+        for site, stats in self.prices.items():
+            out[site] = {'min': stats.min, 'max': stats.max, 'average': stats.mean, 'stddev': stats.stddev}
+            for q in quantiles:
+                out[site][f"p{round(q * 100)}"] = self.sketches[site].quantile(q)
+        return out
+
+    def top_products(self):
+        return self.top.items()
+
+    def top_materials(self, k=5):
+        # Counter.most_common keeps first-seen order among equal counts
+        return [m for m, _ in self.materials.most_common(k)]
+
+    def top_colors(self, k=5):
+        return [c for c, _ in self.colors.most_common(k)]
@@ -0,0 +1,305 @@
+# utils/structured_data.py
+# Deterministic product extraction from the machine-readable data marketplace
+# pages already embed: schema.org JSON-LD, microdata and OpenGraph tags.
+import json
+import re
+from html.parser import HTMLParser
+
+PRODUCT_FIELDS = ["name", "price", "rating", "colors", "materials"]
+
+_VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"}
+_NUMBER_RE = re.compile(r"-?\d+(?:,\d{2,3})*(?:\.\d+)?")  # Digit groups: 1,299 and 1,29,999
+_LIST_SPLIT_RE = re.compile(r"\s*(?:,|/|&|\band\b)\s*", re.I)
+
+
+def _is_type(node, name):
+    types = node.get("@type") if isinstance(node, dict) else None
+    types = types if isinstance(types, list) else [types]
+    return any(isinstance(t, str) and t.rsplit("/", 1)[-1] == name for t in types)
+
+
+def _first(value):
+    return value[0] if isinstance(value, list) and value else value
+
+
+def _text(value):
+    value = _first(value)
+    if isinstance(value, dict):
+        value = value.get("name") or value.get("@value")
+    return str(value).strip() if value not in (None, "") else None
+
+
+def parse_number(value):
+    """First number in a scraped value: '₹1,299–1,599' → 1299.0, '4.3/5' → 4.3, 499 → 499.0 (None if none)
+
+    The one place prices and ratings are read from text, so every stage
+    agrees on what a value means.
+    """
+    if isinstance(value, bool) or value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value) if value == value else None  # NaN is "no value"
+    m = _NUMBER_RE.search(str(value))
+    return float(m.group(0).replace(",", "")) if m else None
+
+
+def parse_price(value):
+    """'₹1,299.00', 1299, {'price': ...} or an Offer list → 1299.0 (None if absent)"""
+    if isinstance(value, list):
+        prices = [p for p in (parse_price(v) for v in value) if p is not None]
+        return min(prices) if prices else None
+    if isinstance(value, dict):
+        for key in ("price", "lowPrice", "highPrice"):
+            if value.get(key) not in (None, ""):
+                return parse_price(value[key])
+        spec = value.get("priceSpecification")
+        return parse_price(spec) if spec else None
+    return parse_number(value)
+
+
+def parse_rating(value):
+    """'4.3', '4.3/5', 4.3 or an AggregateRating → 4.3 (None if absent)"""
+    if isinstance(value, dict):
+        value = value.get("ratingValue")
+    return parse_number(_first(value))
+
+
+def parse_list(value):
+    """'Cotton, Rayon' / ['Cotton', 'Rayon'] / {'name': 'Cotton'} → ['Cotton', 'Rayon']"""
+    values = value if isinstance(value, list) else [value]
+    out = []
+    for v in values:
+        v = _text(v)
+        if v:
+            out.extend(part for part in _LIST_SPLIT_RE.split(v) if part)
+    return list(dict.fromkeys(out))
+
+
+def missing_fields(product):
+    """PRODUCT_FIELDS the product has no usable value for"""
+    return [f for f in PRODUCT_FIELDS if product.get(f) in (None, "", [])]
+
+
+def product_from_schema(node):
+    """schema.org Product (JSON-LD or microdata dict) → product dict"""
+    offers = node.get("offers")
+    product = {
+        "name": _text(node.get("name")),
+        "description": _text(node.get("description")) or "",
+        "price": parse_price(offers if offers is not None else node.get("price")),
+        "rating": parse_rating(node.get("aggregateRating")),
+        "colors": parse_list(node.get("color")),
+        "materials": parse_list(node.get("material")),
+    }
+    brand = _text(node.get("brand"))
+    if brand:
+        product["brand"] = brand
+    url = _text(node.get("url"))
+    if url:
+        product["url"] = url
+    return product
+
+
+def _walk_json_ld(node):
+    """Yield every Product node in a JSON-LD document (@graph, lists, ItemList)"""
+    if isinstance(node, list):
+        for item in node:
+            yield from _walk_json_ld(item)
+    elif isinstance(node, dict):
+        if _is_type(node, "Product"):
+            yield node
+        elif _is_type(node, "ProductGroup"):
+            yield node
+            yield from _walk_json_ld(node.get("hasVariant"))
+        for key in ("@graph", "itemListElement", "item", "mainEntity"):
+            if key in node:
+                yield from _walk_json_ld(node[key])
+
+
+class _PageParser(HTMLParser):
+    """Single pass over the page collecting JSON-LD blocks, meta tags and microdata items"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.json_ld = []
+        self.meta = {}
+        self.items = []       # Top-level microdata items
+        self._stack = []      # (tag, item opened here, text prop captured here)
+        self._items = []      # Open microdata items
+        self._captures = []   # Open [item, prop, text parts] for text-valued itemprops
+        self._script = None
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == "script" and (attrs.get("type") or "").lower() == "application/ld+json":
+            self._script = []
+            return
+        if tag == "meta":
+            key = attrs.get("property") or attrs.get("name")
+            if key and attrs.get("content") is not None:
+                self.meta.setdefault(key.lower(), attrs["content"])
+
+        prop = attrs.get("itemprop")
+        owner = self._items[-1] if self._items else None
+        opened = capture = None
+        if "itemscope" in attrs:
+            opened = {"@type": (attrs.get("itemtype") or "").split()}
+            if prop and owner is not None:
+                self._add(owner, prop, opened)
+            elif owner is None:
+                self.items.append(opened)
+            self._items.append(opened)
+        elif prop and owner is not None:
+            value = attrs.get("content")
+            if value is None and tag in ("a", "link", "area"):
+                value = attrs.get("href")
+            if value is None and tag in ("img", "source"):
+                value = attrs.get("src")
+            if value is None and tag in ("data", "meter"):
+                value = attrs.get("value")
+            if value is not None or tag in _VOID_TAGS:
+                self._add(owner, prop, value)
+            else:
+                capture = [owner, prop, []]
+                self._captures.append(capture)
+        if tag not in _VOID_TAGS:
+            self._stack.append((tag, opened, capture))
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in _VOID_TAGS and self._stack and self._stack[-1][0] == tag:
+            self._close(self._stack.pop())
+
+    def handle_endtag(self, tag):
+        if tag == "script" and self._script is not None:
+            self.json_ld.append("".join(self._script))
+            self._script = None
+            return
+        if not any(entry[0] == tag for entry in self._stack):
+            return  # Stray end tag
+        while self._stack:
+            entry = self._stack.pop()
+            self._close(entry)
+            if entry[0] == tag:
+                break
+
+    def handle_data(self, data):
+        if self._script is not None:
+            self._script.append(data)
+        for capture in self._captures:
+            capture[2].append(data)
+
+    def _close(self, entry):
+        _, opened, capture = entry
+        if opened is not None and self._items and self._items[-1] is opened:
+            self._items.pop()
+        if capture is not None:
+            self._captures.remove(capture)
+            owner, prop, parts = capture
+            self._add(owner, prop, " ".join("".join(parts).split()))
+
+    @staticmethod
+    def _add(item, props, value):
+        for prop in props.split():
+            if prop in item:
+                existing = item[prop]
+                item[prop] = (existing if isinstance(existing, list) else [existing]) + [value]
+            else:
+                item[prop] = value
+
+
+def _walk_microdata(item):
+    if _is_type({"@type": item.get("@type")}, "Product"):
+        yield item
+    for value in item.values():
+        for v in value if isinstance(value, list) else [value]:
+            if isinstance(v, dict):
+                yield from _walk_microdata(v)
+
+
+def _product_from_opengraph(meta):
+    if (meta.get("og:type") or "").lower() not in ("product", "og:product", "product.item") \
+            and "product:price:amount" not in meta and "og:price:amount" not in meta:
+        return None
+    return {
+        "name": meta.get("og:title"),
+        "description": meta.get("og:description") or "",
+        "price": parse_price(meta.get("product:price:amount") or meta.get("og:price:amount")),
+        "rating": parse_rating(meta.get("product:rating:value") or meta.get("og:rating")),
+        "colors": parse_list(meta.get("product:color")),
+        "materials": parse_list(meta.get("product:material")),
+    }
+
+
+def _merge(into, other):
+    """Fill gaps in `into` from `other` (first source wins for filled fields)"""
+    for key, value in other.items():
+        if into.get(key) in (None, "", []) and value not in (None, "", []):
+            into[key] = value
+    return into
+
+
+def extract_products(html):
+    """Products found in a page's structured data, in the PRODUCT_FIELDS dict shape
+
+    JSON-LD is preferred, then microdata; OpenGraph (which describes at most
+    one product per page) fills gaps in a single product or stands in when
+    nothing else is present. Products are merged by name, so a page exposing
+    the same product in several formats yields one, as complete as possible.
+    Fields that could not be found are None (or [] for colors/materials);
+    see missing_fields().
+    """
+    parser = _PageParser()
+    parser.feed(html)
+    parser.close()
+
+    found = []
+    for block in parser.json_ld:
+        try:
+            doc = json.loads(block)
+        except ValueError:
+            continue
+        found.extend(product_from_schema(node) for node in _walk_json_ld(doc))
+    for item in parser.items:
+        found.extend(product_from_schema(node) for node in _walk_microdata(item))
+
+    products = {}
+    for product in found:
+        key = (product.get("name") or "").lower()
+        if not key:
+            continue
+        if key in products:
+            _merge(products[key], product)
+        else:
+            products[key] = product
+
+    og = _product_from_opengraph(parser.meta)
+    if og and og.get("name"):
+        key = og["name"].lower()
+        if key in products:
+            _merge(products[key], og)
+        elif len(products) == 1:
+            _merge(next(iter(products.values())), og)
+        elif not products:
+            products[key] = og
+    return list(products.values())
+
+
+def merge_llm_fields(products, llm_products):
+    """Fill the structured products' gaps from an LLM answer, matching by name"""
+    by_name = {str(p.get("name", "")).strip().lower(): p for p in llm_products if isinstance(p, dict)}
+    for product in products:
+        extra = by_name.get(product["name"].lower())
+        if extra:
+            _merge(product, {
+                "price": parse_price(extra.get("price")),
+                "rating": parse_rating(extra.get("rating")),
+                "colors": parse_list(extra.get("colors")),
+                "materials": parse_list(extra.get("materials")),
+                "description": _text(extra.get("description")),
+            })
+        if product.get("price") is None:
+            product["price"] = 0
+        if product.get("rating") is None:
+            product["rating"] = 0
+    return products
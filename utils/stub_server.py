@@ -0,0 +1,181 @@
+# utils/stub_server.py
+# Local stand-ins for the Imgur upload endpoint and marketplace pages, for offline runs and benchmarks
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive, like the real host
+    disable_nagle_algorithm = True  # Headers and body go out as separate writes
+
+    def log_message(self, format, *args):
+        pass
+
+    def _read_body(self):
+        if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+            chunks = []
+            while True:
+                size = int(self.rfile.readline().strip().split(b";")[0], 16)
+                if size == 0:
+                    self.rfile.readline()
+                    break
+                chunks.append(self.rfile.read(size))
+                self.rfile.readline()
+            return b"".join(chunks)
+        return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+    def _image_bytes(self, body):
+        # Multipart uploads: hash only the file part, so the link depends on the image
+        ctype = self.headers.get("Content-Type", "")
+        if ctype.startswith("multipart/form-data") and "boundary=" in ctype:
+            boundary = ctype.split("boundary=", 1)[1].strip('"').encode()
+            for part in body.split(b"--" + boundary):
+                head, sep, content = part.partition(b"\r\n\r\n")
+                if sep and b'name="image"' in head:
+                    return content[:-2] if content.endswith(b"\r\n") else content
+        return body
+
+    def _send_json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        server = self.server
+        body = self._read_body()
+        with server.lock:
+            server.requests += 1
+            server.bytes_received += len(body)
+            server.clients.add(self.client_address)
+            failing = server.fail_next > 0
+            if failing:
+                server.fail_next -= 1
+        if server.latency:
+            time.sleep(server.latency)
+        if failing:
+            headers = {"Retry-After": str(server.retry_after)} if server.retry_after is not None else None
+            self._send_json(server.fail_status, {"success": False, "status": server.fail_status}, headers)
+            return
+        digest = hashlib.sha256(self._image_bytes(body)).hexdigest()[:16]
+        link = f"http://{server.server_address[0]}:{server.server_address[1]}/i/{digest}.jpg"
+        self._send_json(200, {"data": {"id": digest, "link": link}, "success": True, "status": 200})
+
+
+class StubImageHost(ThreadingHTTPServer):
+    """Imgur-compatible POST endpoint on localhost (base64 or multipart bodies)
+
+    `latency` delays every response; `fail_next` makes the next N requests
+    answer `fail_status` (with `Retry-After` if set) to exercise retries.
+    `clients` collects the distinct client sockets seen, so connection reuse
+    can be checked.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, fail_next=0, fail_status=429, retry_after=None):
+        super().__init__((host, port), _StubHandler)
+        self.latency = latency
+        self.fail_next = fail_next
+        self.fail_status = fail_status
+        self.retry_after = retry_after
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.bytes_received = 0
+        self.clients = set()
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/3/image"
+
+    def start(self):
+        # Short poll interval so stop() returns promptly
+        self.thread = threading.Thread(target=self.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+class _PageHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        path = self.path.split("?", 1)[0].rstrip("/") or "/"
+        with server.lock:
+            server.requests += 1
+            html = server.pages.get(path)
+            if html is None:
+                server.misses += 1
+        if server.latency:
+            time.sleep(server.latency)
+        body = (html if html is not None else "<html><body>Not found</body></html>").encode()
+        self.send_response(200 if html is not None else 404)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class StubPageHost(ThreadingHTTPServer):
+    """Serves saved marketplace pages on localhost
+
+    `pages` maps a path to HTML, with the site as the first segment
+    ("/amazon/kurtis"), which is what the scraper requests once
+    config.TREND_SITE_URL is set to `site_url`. `latency` delays every
+    response; unknown paths answer 404 and are counted in `misses`.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, pages=None, host="127.0.0.1", port=0, latency=0.0):
+        super().__init__((host, port), _PageHandler)
+        self.pages = {path.rstrip("/") or "/": html for path, html in (pages or {}).items()}
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.misses = 0
+        self.thread = None
+
+    @property
+    def site_url(self):
+        """Value for config.TREND_SITE_URL"""
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/{{site}}"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
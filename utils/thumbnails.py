@@ -0,0 +1,71 @@
+# utils/thumbnails.py
+import io
+import threading
+from collections import OrderedDict
+
+from PIL import Image, ImageOps
+
+import config
+from utils.sqlite_store import shared
+from utils.upload_cache import content_hash
+
+
+def make_thumbnail(data, size=None, fmt=None):
+    """Decode an image once and return small encoded thumbnail bytes"""
+    size = size or config.THUMBNAIL_SIZE
+    fmt = fmt or config.THUMBNAIL_FORMAT
+    img = Image.open(io.BytesIO(data))
+    img.draft("RGB", size)  # JPEG: let the decoder downscale instead of decoding all 12 MP
+    img = ImageOps.exif_transpose(img)
+    img.thumbnail(size)
+    if img.mode not in ("RGB", "RGBA"):
+        img = img.convert("RGBA" if "A" in img.getbands() else "RGB")
+    if fmt == "JPEG" and img.mode == "RGBA":
+        img = img.convert("RGB")
+    out = io.BytesIO()
+    img.save(out, fmt, quality=80)
+    return out.getvalue()
+
+
+class ThumbnailCache:
+    """LRU cache of thumbnails keyed by image content hash, capped by total bytes"""
+
+    def __init__(self, max_bytes=None):
+        self.max_bytes = max_bytes or config.THUMBNAIL_CACHE_MAX_BYTES
+        self.entries = OrderedDict()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, data):
+        """Thumbnail bytes for an image, decoding it only on first sight"""
+        digest = content_hash(data)
+        with self.lock:
+            thumb = self.entries.get(digest)
+            if thumb is not None:
+                self.entries.move_to_end(digest)
+                self.hits += 1
+                return thumb
+            self.misses += 1
+
+        thumb = make_thumbnail(data)
+        with self.lock:
+            if digest not in self.entries:
+                self.entries[digest] = thumb
+                self.total_bytes += len(thumb)
+            while self.total_bytes > self.max_bytes and len(self.entries) > 1:
+                _, evicted = self.entries.popitem(last=False)
+                self.total_bytes -= len(evicted)
+        return thumb
+
+    def stats(self):
+        with self.lock:
+            return {"hits": self.hits, "misses": self.misses,
+                    "entries": len(self.entries), "bytes": self.total_bytes}
+
+
+@shared
+def get_thumbnail_cache():
+    """Process-wide thumbnail cache shared across Streamlit reruns and sessions"""
+    return ThumbnailCache()
@@ -1,51 +1,276 @@
 # utils/trend_analyzer.py
+import importlib.util
+import os
+
 import streamlit as st
 
+from utils.perf import Tracer
+from utils.sqlite_store import shared
+from utils.structured_data import parse_price, parse_rating
+
+# Platform names on the Trend Analysis page → EcomTrendScraper site keys
+SCRAPER_SITES = {
+    "Amazon Fashion": "amazon",
+    "Myntra": "myntra",
+    "Flipkart Fashion": "flipkart",
+    "Nykaa Fashion": "nykaa",
+    "Meesho Trends": "meesho",
+}
+
+
+# Curated trending products with real product links (the catalog when live scraping is off)
+TRENDING_DATA = {
+    "Amazon Fashion": [
+        {
+            "name": "Women's Floral Printed Kurti",
+            "price": "₹799",
+            "rating": "4.3",
+            "link": "https://www.amazon.in/dp/B0BXYZ1234",
+            "sales_rank": "Best Seller",
+            "category": "Women's Kurtis"
+        },
+        {
+            "name": "Cotton Anarkali Dress",
+            "price": "₹1,299",
+            "rating": "4.5",
+            "link": "https://www.amazon.in/dp/B0BABC5678",
+            "sales_rank": "#1 in Women's Dresses",
+            "category": "Women's Dresses"
+        },
+        {
+            "name": "Men's Regular Fit T-Shirt",
+            "price": "₹499",
+            "rating": "4.2",
+            "link": "https://www.amazon.in/dp/B0BCD12345",
+            "sales_rank": "Amazon's Choice",
+            "category": "Men's T-Shirts"
+        }
+    ],
+    "Myntra": [
+        {
+            "name": "Embroidered Straight Kurti",
+            "price": "₹899",
+            "rating": "4.4",
+            "link": "https://www.myntra.com/kurti/brand/product123",
+            "sales_rank": "Trending",
+            "category": "Women's Kurtis"
+        },
+        {
+            "name": "A-line Printed Dress",
+            "price": "₹1,599",
+            "rating": "4.6",
+            "link": "https://www.myntra.com/dress/brand/product456",
+            "sales_rank": "Bestseller",
+            "category": "Women's Dresses"
+        },
+        {
+            "name": "Casual Men's Shirt",
+            "price": "₹699",
+            "rating": "4.1",
+            "link": "https://www.myntra.com/shirt/brand/product789",
+            "sales_rank": "Popular",
+            "category": "Men's Shirts"
+        }
+    ],
+    "Flipkart Fashion": [
+        {
+            "name": "Printed Cotton Kurti",
+            "price": "₹599",
+            "rating": "4.0",
+            "link": "https://www.flipkart.com/product/p/item123",
+            "sales_rank": "Best Value",
+            "category": "Women's Kurtis"
+        },
+        {
+            "name": "Designer Anarkali Suit",
+            "price": "₹1,899",
+            "rating": "4.3",
+            "link": "https://www.flipkart.com/product/p/item456",
+            "sales_rank": "Trending",
+            "category": "Women's Dresses"
+        }
+    ],
+    "Nykaa Fashion": [
+        {
+            "name": "Designer Silk Kurti",
+            "price": "₹2,499",
+            "rating": "4.5",
+            "link": "https://www.nykaafashion.com/product/12345",
+            "sales_rank": "Luxury Best Seller",
+            "category": "Women's Kurtis"
+        },
+        {
+            "name": "Party Wear Dress",
+            "price": "₹3,299",
+            "rating": "4.7",
+            "link": "https://www.nykaafashion.com/product/67890",
+            "sales_rank": "Premium Choice",
+            "category": "Women's Dresses"
+        }
+    ],
+    "Meesho Trends": [
+        {
+            "name": "Budget Cotton Kurti",
+            "price": "₹299",
+            "rating": "4.0",
+            "link": "https://www.meesho.com/product/abc123",
+            "sales_rank": "Top Seller",
+            "category": "Women's Kurtis"
+        },
+        {
+            "name": "Affordable Kurti Set",
+            "price": "₹499",
+            "rating": "4.2",
+            "link": "https://www.meesho.com/product/def456",
+            "sales_rank": "Value Deal",
+            "category": "Women's Kurtis"
+        }
+    ]
+}
+
+
+class TrendCatalog:
+    """Trending products parsed once and indexed by platform × category
+
+    Each product is stored as a display dict (its original "price"/"rating"
+    strings plus "platform") with "price_value" (int rupees) and
+    "rating_value" (float), both None if unknown, added, so views never re-parse
+    "₹1,299". query() resolves the selected categories against the distinct
+    category names (a selection matches every category containing it, as the
+    old substring filter did) and then reads the (platform, category) index.
+    Returned dicts are shared with the catalog; treat them as read-only.
+    """
+
+    def __init__(self, data=None):
+        self.products = []
+        self.index = {}        # (platform, category) → product ids, in catalog order
+        self.categories = {}   # category name → None (insertion-ordered set)
+        self._resolved = {}    # selected category → matching category names
+        for platform, products in (TRENDING_DATA if data is None else data).items():
+            for product in products:
+                self.add(platform, product)
+
+    def add(self, platform, product):
+        price = parse_price(product.get("price"))
+        entry = {**product, "platform": platform,
+                 "price_value": int(round(price)) if price is not None else None,
+                 "rating_value": parse_rating(product.get("rating"))}
+        entry.setdefault("category", "")
+        product_id = len(self.products)
+        self.products.append(entry)
+        self.index.setdefault((platform, entry["category"]), []).append(product_id)
+        if entry["category"] not in self.categories:
+            self.categories[entry["category"]] = None
+            self._resolved.clear()
+        return product_id
+
+    def __len__(self):
+        return len(self.products)
+
+    def _matching_categories(self, selected):
+        found = self._resolved.get(selected)
+        if found is None:
+            found = self._resolved[selected] = [c for c in self.categories if selected in c]
+        return found
+
+    def query(self, platforms, categories, min_rating=None, price_range=None):
+        """Products on the given platforms in any of the given categories (platforms in the order given)
+
+        `min_rating` and `price_range` ((low, high) in rupees) filter on the
+        pre-parsed values; products without a rating (or price) fail a rating
+        (or price) filter.
+        """
+        names = dict.fromkeys(c for selected in categories for c in self._matching_categories(selected))
+        products = []
+        for platform in dict.fromkeys(platforms):
+            ids = [i for category in names for i in self.index.get((platform, category), ())]
+            products.extend(self.products[i] for i in sorted(ids))
+        if min_rating is not None:
+            products = [p for p in products if p["rating_value"] is not None and p["rating_value"] >= min_rating]
+        if price_range is not None:
+            low, high = price_range
+            products = [p for p in products if p["price_value"] is not None and low <= p["price_value"] <= high]
+        return products
+
+
+@shared
+def get_trend_catalog():
+    """Process-wide catalog of the curated trending products, built on first use"""
+    return TrendCatalog()
+
+
+def live_scraping_available():
+    """True when ScrapeGraphAI is installed and a Gemini key is configured"""
+    return importlib.util.find_spec("scrapegraphai") is not None and bool(os.getenv("GEMINI_API_KEY"))
+
+
+def iter_trending_products(platforms, categories, perf=None):
+    """Yield one update per platform from the mock catalog
+    
+    Same shape as iter_live_trending_products; the mock has no running aggregate (None).
+    `perf` (a utils.perf.Tracer) times the lookup per platform.
+    """
+    catalog = get_trend_catalog()
+    perf = perf or Tracer(enabled=False)
+    for done, platform in enumerate(platforms, 1):
+        with perf.span("catalog.filter", site=platform):
+            products = catalog.query([platform], categories)
+        perf.count("products", len(products), site=platform)
+        yield {"platform": platform, "status": "ok", "products": products, "error": None,
+               "done": done, "total": len(platforms), "aggregate": None}
+
 def get_trending_products_with_links(platforms, categories):
     """Returns mock data with actual product links for analysis"""
-    
-    # Real product links from major e-commerce sites
-    trending_data = {
-        "Amazon Fashion": [
-            {
-                "name": "Women's Floral Printed Kurti",
-                "price": "₹799",
-                "rating": "4.3",
-                "link": "https://www.amazon.in/dp/B0BXYZ1234",
-                "sales_rank": "Best Seller",
-                "category": "Women's Kurtis"
-            },
-            {
-                "name": "Cotton Anarkali Dress",
-                "price": "₹1,299", 
-                "rating": "4.5",
-                "link": "https://www.amazon.in/dp/B0BABC5678",
-                "sales_rank": "#1 in Women's Dresses",
-                "category": "Women's Dresses"
-            }
-        ],
-        "Myntra": [
-            {
-                "name": "Embroidered Straight Kurti",
-                "price": "₹899",
-                "rating": "4.4",
-                "link": "https://www.myntra.com/kurti/brand/product123",
-                "sales_rank": "Trending",
-                "category": "Women's Kurtis"
-            }
-        ]
-        # Add more platforms as needed...
+    return get_trend_catalog().query(platforms, categories)
+
+def _display_product(product, platform):
+    """Scraper product dict → the shape show_trend_results renders"""
+    price = product.get('price')
+    price_value = parse_price(price)
+    if not price_value or price_value < 0:
+        price_value = None  # The scraper stores an unknown price as 0
+    if price_value is None:
+        display_price = "–"
+    else:
+        display_price = f"₹{price:,.0f}" if isinstance(price, (int, float)) else str(price)
+    return {
+        "name": product.get('name', 'Unknown'),
+        "price": display_price,
+        "rating": str(product.get('rating') or "–"),
+        "price_value": int(round(price_value)) if price_value is not None else None,
+        "rating_value": parse_rating(product.get('rating')),
+        "link": product.get('url', ''),
+        "sales_rank": "",
+        "category": product.get('category', ''),
+        "platform": platform,
     }
+
+def unsupported_live_platforms(platforms):
+    """Platforms the live scraper has no site for (iter_live_trending_products skips them)"""
+    return [p for p in platforms if p not in SCRAPER_SITES]
+
+def iter_live_trending_products(platforms, categories, force_refresh=False, perf=None):
+    """Yield one update per platform as its live scrape finishes
     
-    # Filter by selected platforms and categories
-    filtered_products = []
-    for platform in platforms:
-        if platform in trending_data:
-            for product in trending_data[platform]:
-                if any(category in product["category"] for category in categories):
-                    filtered_products.append({**product, "platform": platform})
+    Each update is {"platform", "status" ("ok" | "timeout" | "error"),
+    "products" (display dicts), "error" (message or None), "done", "total",
+    "aggregate"}. "total" counts the platforms actually scraped, which
+    leaves out unsupported_live_platforms(). `aggregate` is the scraper's
+    running TrendAggregator over every platform finished so far. Stage
+    timings go to `perf` (a utils.perf.Tracer) if given.
+    """
+    from ecom_trend_scrapper import EcomTrendScraper  # Live scrapes need scrapegraphai (imported on first call)
     
-    return filtered_products
+    names = {SCRAPER_SITES[p]: p for p in platforms if p in SCRAPER_SITES}
+    scraper = EcomTrendScraper(perf=perf)
+    for update in scraper.stream_trends(list(names), categories, force_refresh=force_refresh):
+        platform = names[update["site"]]
+        ok = update["status"] == "ok"
+        products = update["result"]["products"] if ok else []
+        yield {"platform": platform, "status": update["status"],
+               "products": [_display_product(p, platform) for p in products],
+               "error": update["result"] if update["status"] == "error" else None,
+               "done": update["done"], "total": update["total"], "aggregate": update["aggregate"]}
 
 def show_trend_results(trending_products, include_links=True):
     """Display trend analysis results with product links"""
@@ -100,4 +325,38 @@ def show_trend_results(trending_products, include_links=True):
     
     with tab4:
         st.subheader("🏭 Manufacturing Recommendations")
-        # Add manufacturing content...
\ No newline at end of file
+        # Add manufacturing content...
+
+
+def show_performance_panel(perf, wall_seconds=None):
+    """Collapsible per-stage timing breakdown for a traced run, with JSON / Chrome trace downloads"""
+    with st.expander("⏱️ Performance", expanded=False):
+        summary = perf.summary()
+        if not summary:
+            st.caption("No timings recorded for this run.")
+            return
+        if wall_seconds is not None:
+            st.caption(f"Total wall time: {wall_seconds:.2f}s "
+                       "(stages on worker threads overlap, so their totals can add up to more)")
+        st.dataframe([{"Stage": name, "Calls": row["count"], "Total (ms)": round(row["total_ms"], 1),
+                       "Mean (ms)": round(row["mean_ms"], 2), "Max (ms)": round(row["max_ms"], 1)}
+                      for name, row in summary.items()], use_container_width=True, hide_index=True)
+        
+        sites = perf.site_summary()
+        counters = perf.counter_totals()
+        if sites:
+            st.markdown("**Per site**")
+            st.dataframe([{"Site": site, **{stage: round(ms, 1) for stage, ms in stages.items()},
+                           **{name: c["by_site"].get(site, 0) for name, c in counters.items()}}
+                          for site, stages in sites.items()], use_container_width=True, hide_index=True)
+        if counters:
+            st.caption(" • ".join(f"{name}: {c['total']}" for name, c in counters.items()))
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            st.download_button("📥 Timings (JSON)", perf.export_json(), file_name="trend_run_perf.json",
+                               mime="application/json", use_container_width=True)
+        with col2:
+            st.download_button("📥 Chrome trace", perf.export_chrome_trace(), file_name="trend_run_trace.json",
+                               mime="application/json", use_container_width=True,
+                               help="Open in chrome://tracing or ui.perfetto.dev")
@@ -0,0 +1,188 @@
+# utils/trend_history.py
+# Run-over-run trend snapshots in SQLite, stored as deltas
+import json
+import math
+import time
+
+import config
+from utils.sqlite_store import SQLiteStore, shared
+from utils.streaming_stats import to_number
+from utils.variant_matrix import normalize_sku_part
+
+DAY = 24 * 60 * 60
+
+
+def product_key(site, product):
+    """Stable identity for a product across runs: site + normalized name (or URL when known)"""
+    ident = product.get('url') or product.get('link') or product.get('name', '')
+    return f"{site}:{normalize_sku_part(ident)}"
+
+
+class TrendHistory(SQLiteStore):
+    """Product observations kept as validity intervals, one row per change
+
+    A product's (price, rating, category) state gets a row when it first
+    appears or changes; the row's `valid_to` is set when the next change
+    happens or the product drops out of a run. Unchanged products write
+    nothing, so a year of daily runs stores roughly one row per actual
+    change. `runs` keeps each run's time, sites and aggregate summary.
+    """
+
+    schema = (
+        "CREATE TABLE IF NOT EXISTS runs ("
+        " run_id INTEGER PRIMARY KEY,"
+        " ts REAL NOT NULL,"
+        " sites TEXT NOT NULL,"
+        " summary TEXT);"
+        "CREATE TABLE IF NOT EXISTS products ("
+        " key TEXT PRIMARY KEY,"
+        " site TEXT NOT NULL,"
+        " name TEXT,"
+        " first_seen REAL NOT NULL,"
+        " first_run INTEGER NOT NULL);"
+        "CREATE TABLE IF NOT EXISTS observations ("
+        " key TEXT NOT NULL,"
+        " site TEXT NOT NULL,"
+        " category TEXT,"
+        " price REAL,"
+        " rating REAL,"
+        " valid_from REAL NOT NULL,"
+        " valid_to REAL);"
+        "CREATE INDEX IF NOT EXISTS products_first_seen ON products (first_seen, site);"
+        "CREATE INDEX IF NOT EXISTS obs_series ON observations (category, site, valid_to);"
+        "CREATE INDEX IF NOT EXISTS obs_key ON observations (key, valid_from);"
+        "CREATE INDEX IF NOT EXISTS obs_open ON observations (site) WHERE valid_to IS NULL;"
+    )
+
+    def __init__(self, path=None):
+        super().__init__(path or config.TREND_HISTORY_PATH)
+
+    def record_run(self, site_products, summary=None, ts=None):
+        """Store one run's products ({site: [product dicts]}) as a delta
+
+        Sites in the run are compared with their currently open rows; sites
+        not in the run are left alone (a skipped site is not a delisting).
+        Returns {"run_id", "new", "returned", "changed", "unchanged", "dropped"}.
+        """
+        ts = time.time() if ts is None else ts
+        counts = {"new": 0, "returned": 0, "changed": 0, "unchanged": 0, "dropped": 0}
+        with self.lock, self.conn:
+            run_id = self.conn.execute(
+                "INSERT INTO runs (ts, sites, summary) VALUES (?, ?, ?)",
+                (ts, json.dumps(list(site_products)), json.dumps(summary, default=str) if summary else None),
+            ).lastrowid
+            for site, products in site_products.items():
+                current = {
+                    key: (category, price, rating)
+                    for key, category, price, rating in self.conn.execute(
+                        "SELECT key, category, price, rating FROM observations WHERE site = ? AND valid_to IS NULL",
+                        (site,))
+                }
+                seen = {}
+                for product in products:
+                    key = product_key(site, product)
+                    price = to_number(product.get('price'), None)
+                    rating = to_number(product.get('rating'), None)
+                    seen[key] = (product.get('category'), price, rating, product.get('name'))
+                new_rows, closes = [], []
+                for key, (category, price, rating, name) in seen.items():
+                    state = current.get(key)
+                    if state == (category, price, rating):
+                        counts["unchanged"] += 1
+                        continue
+                    if state is None:
+                        inserted = self.conn.execute(
+                            "INSERT OR IGNORE INTO products (key, site, name, first_seen, first_run) VALUES (?, ?, ?, ?, ?)",
+                            (key, site, name, ts, run_id)).rowcount
+                        counts["new" if inserted else "returned"] += 1
+                    else:
+                        counts["changed"] += 1
+                        closes.append((ts, key))
+                    new_rows.append((key, site, category, price, rating, ts))
+                for key in current.keys() - seen.keys():
+                    counts["dropped"] += 1
+                    closes.append((ts, key))
+                self.conn.executemany(
+                    "UPDATE observations SET valid_to = ? WHERE key = ? AND valid_to IS NULL", closes)
+                self.conn.executemany(
+                    "INSERT INTO observations (key, site, category, price, rating, valid_from) VALUES (?, ?, ?, ?, ?, ?)",
+                    new_rows)
+        return {"run_id": run_id, **counts}
+
+    def price_history(self, category=None, site=None, days=90, now=None):
+        """Daily average price per site over the last `days` days
+
+        A product counts on every day its price was current, so days between
+        runs are filled from the last observation. Returns
+        [{"day": "YYYY-MM-DD", "site", "average_price", "products"}, ...].
+        """
+        now = time.time() if now is None else now
+        start = (int(now // DAY) - days + 1) * DAY
+        query = "SELECT site, price, valid_from, valid_to FROM observations WHERE price > 0 AND (valid_to IS NULL OR valid_to > ?)"
+        params = [start]
+        if category is not None:
+            query += " AND category = ?"
+            params.append(category)
+        if site is not None:
+            query += " AND site = ?"
+            params.append(site)
+        with self.lock:
+            rows = self.conn.execute(query, params).fetchall()
+
+        # Sweep: each interval adds its price from its first live day and removes it after its last
+        sums, counts = {}, {}
+        for row_site, price, valid_from, valid_to in rows:
+            first = max(0, int((valid_from - start) // DAY))
+            last = days if valid_to is None else min(days, math.ceil((valid_to - start) / DAY))
+            if first >= last:
+                continue
+            if row_site not in sums:
+                sums[row_site], counts[row_site] = [0.0] * (days + 1), [0] * (days + 1)
+            sums[row_site][first] += price
+            sums[row_site][last] -= price
+            counts[row_site][first] += 1
+            counts[row_site][last] -= 1
+
+        series = []
+        for row_site in sorted(sums):
+            total = n = 0
+            for i in range(days):
+                total += sums[row_site][i]
+                n += counts[row_site][i]
+                if n:
+                    day = time.strftime("%Y-%m-%d", time.gmtime(start + i * DAY))
+                    series.append({"day": day, "site": row_site, "average_price": total / n, "products": n})
+        series.sort(key=lambda r: r["day"])  # Stable: sites stay sorted within a day
+        return series
+
+    def new_entrants(self, days=7, site=None, category=None, now=None):
+        """Products first seen in the last `days` days, newest first"""
+        now = time.time() if now is None else now
+        query = ("SELECT p.key, p.site, p.name, p.first_seen, o.category, o.price, o.rating FROM products p"
+                 " JOIN observations o ON o.key = p.key AND o.valid_from = p.first_seen"
+                 " WHERE p.first_seen >= ?")
+        params = [now - days * DAY]
+        if site is not None:
+            query += " AND p.site = ?"
+            params.append(site)
+        if category is not None:
+            query += " AND o.category = ?"
+            params.append(category)
+        query += " ORDER BY p.first_seen DESC"
+        with self.lock:
+            rows = self.conn.execute(query, params).fetchall()
+        return [{"key": k, "site": s, "name": n, "first_seen": f, "category": c, "price": p, "rating": r}
+                for k, s, n, f, c, p, r in rows]
+
+    def runs(self, limit=20):
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT run_id, ts, sites, summary FROM runs ORDER BY ts DESC LIMIT ?", (limit,)).fetchall()
+        return [{"run_id": r, "ts": ts, "sites": json.loads(s), "summary": json.loads(m) if m else None}
+                for r, ts, s, m in rows]
+
+
+@shared
+def get_trend_history():
+    """Process-wide trend history store"""
+    return TrendHistory()
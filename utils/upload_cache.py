@@ -0,0 +1,109 @@
+# utils/upload_cache.py
+import hashlib
+import time
+
+import config
+from utils.sqlite_store import SQLiteStore, shared
+
+LEGACY_BACKEND = "imgur"  # Backend that bare (unprefixed) digests belong to
+
+
+def content_hash(data):
+    """SHA-256 hex digest of image bytes"""
+    return hashlib.sha256(data).hexdigest()
+
+
+class UploadCache(SQLiteStore):
+    """Persistent SHA-256 → public link map so identical images are uploaded once
+
+    Storage backends prefix keys with their name ("imgur:<sha256>") so links
+    from different hosts never mix; bare digests from older caches are
+    migrated to the Imgur prefix on open.
+    """
+
+    schema = (
+        "CREATE TABLE IF NOT EXISTS uploads ("
+        " digest TEXT PRIMARY KEY,"
+        " link TEXT NOT NULL,"
+        " created REAL NOT NULL);"
+        "CREATE INDEX IF NOT EXISTS uploads_link ON uploads (link);"
+    )
+
+    def __init__(self, path=None, ttl=None):
+        super().__init__(path or config.UPLOAD_CACHE_PATH)
+        self.ttl = ttl if ttl is not None else config.UPLOAD_CACHE_TTL
+        self.hits = 0
+        self.misses = 0
+
+        # Caches written before storage backends hold bare digests, all of them Imgur links
+        self.conn.execute("UPDATE OR IGNORE uploads SET digest = ? || digest WHERE instr(digest, ':') = 0",
+                          (f"{LEGACY_BACKEND}:",))
+        self.conn.execute("DELETE FROM uploads WHERE instr(digest, ':') = 0")  # Already present under the new key
+        self.conn.commit()
+
+    def get(self, digest):
+        """Return the cached link for a digest, or None (expired entries count as misses)"""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT link, created FROM uploads WHERE digest = ?", (digest,)
+            ).fetchone()
+            if row and self.ttl and time.time() - row[1] > self.ttl:
+                self.conn.execute("DELETE FROM uploads WHERE digest = ?", (digest,))
+                self.conn.commit()
+                row = None
+            if row:
+                self.hits += 1
+                return row[0]
+            self.misses += 1
+            return None
+
+    def put(self, digest, link):
+        """Remember the link returned for a digest"""
+        if not link:
+            return
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO uploads (digest, link, created) VALUES (?, ?, ?)",
+                (digest, link, time.time()),
+            )
+            self.conn.commit()
+
+    def invalidate(self, digest=None, link=None):
+        """Drop entries by digest and/or by link (e.g. an image deleted on the host)"""
+        with self.lock:
+            cur = self.conn.execute(
+                "DELETE FROM uploads WHERE digest = ? OR link = ?", (digest, link)
+            )
+            self.conn.commit()
+            return cur.rowcount
+
+    def clear(self):
+        with self.lock:
+            self.conn.execute("DELETE FROM uploads")
+            self.conn.commit()
+
+    def snapshot(self):
+        """Raw counters now; pass to stats(since=...) to report one upload on the shared cache"""
+        with self.lock:
+            return {"hits": self.hits, "misses": self.misses}
+
+    def stats(self, since=None):
+        """Hit/miss counters plus the number of stored links
+
+        Counters are for this process, or since an earlier snapshot() when given.
+        """
+        counts = self.snapshot()
+        if since:
+            counts = {key: n - since.get(key, 0) for key, n in counts.items()}
+        with self.lock:
+            entries = self.conn.execute("SELECT COUNT(*) FROM uploads").fetchone()[0]
+        lookups = counts["hits"] + counts["misses"]
+        counts["hit_rate"] = counts["hits"] / lookups if lookups else 0.0
+        counts["entries"] = entries
+        return counts
+
+
+@shared
+def get_upload_cache():
+    """Process-wide cache shared by every upload (and every Streamlit rerun)"""
+    return UploadCache()
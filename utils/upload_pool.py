@@ -0,0 +1,67 @@
+# utils/upload_pool.py
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import config
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, up to `burst` saved up"""
+
+    def __init__(self, rate, burst=1):
+        self.rate = float(rate)
+        self.capacity = max(1.0, float(burst))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available, sleeping only as long as the refill needs"""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+def upload_images(files, upload_fn, max_workers=None, rate=None, burst=None, on_progress=None):
+    """Upload files concurrently under a rate limit and return links in the original order
+
+    `upload_fn(file)` returns a link (or "") for one file, e.g. upload_to_imgur.
+    `on_progress(idx, file, link)` is called from the calling thread as each upload
+    finishes, so it is safe to use Streamlit calls inside it. Failed uploads give "".
+    """
+    files = list(files)
+    links = [""] * len(files)
+    if not files:
+        return links
+
+    max_workers = max_workers or config.UPLOAD_MAX_WORKERS
+    rate = rate or config.UPLOAD_RATE_PER_SEC
+    burst = burst or config.UPLOAD_BURST
+    bucket = TokenBucket(rate, burst) if rate > 0 else None
+
+    def run(f):
+        if bucket:
+            bucket.acquire()
+        return upload_fn(f)
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(files))) as pool:
+        futures = {pool.submit(run, f): idx for idx, f in enumerate(files)}
+        for future in as_completed(futures):
+            idx = futures[future]
+            try:
+                link = future.result() or ""
+            except Exception:
+                link = ""
+            links[idx] = link
+            if on_progress:
+                on_progress(idx, files[idx], link)
+
+    return links
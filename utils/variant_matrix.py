@@ -0,0 +1,126 @@
+# utils/variant_matrix.py
+# Size × colour (× any other axis) variant matrix, built column-wise
+import re
+from collections import Counter, defaultdict
+from itertools import chain, repeat
+
+import config
+
+_SKU_JUNK_RE = re.compile(r"[^A-Z0-9]+")
+
+
+def normalize_sku_part(value):
+    """Uppercase and collapse anything that is not A-Z/0-9 into single dashes"""
+    return _SKU_JUNK_RE.sub("-", str(value).upper()).strip("-")
+
+
+def legacy_sku_part(value):
+    """Uppercase only, as SKUs were always written ("Navy Blue" → "NAVY BLUE")"""
+    return str(value).upper()
+
+
+def sku_part_function(normalize=None):
+    """normalize_sku_part if SKU normalization is on (config.SKU_NORMALIZE by default), else legacy_sku_part"""
+    if normalize is None:
+        normalize = config.SKU_NORMALIZE
+    return normalize_sku_part if normalize else legacy_sku_part
+
+
+def make_sku(*parts, normalize=None):
+    """Parts joined with dashes; by default the legacy f"{product_id}-{size}-{color}".upper() format"""
+    part = sku_part_function(normalize)
+    return "-".join(part(p) for p in parts)
+
+
+def parse_values(text):
+    """'S, M, L' or 'S|M|L' → ['S', 'M', 'L'] (blanks dropped, order kept)"""
+    return [v.strip() for v in re.split(r"[,|\n]", text or "") if v.strip()]
+
+
+def _expand(values, inner, tile):
+    return list(chain.from_iterable(repeat(v, inner) for v in values)) * tile
+
+
+class VariantMatrix:
+    """Cartesian product of variant axes, stored as columns
+
+    `axes` is an ordered {name: [values]} mapping, e.g.
+    {"size": ["S", "M"], "color": ["Red", "Blue"], "pattern": ["Floral"]}.
+    Each axis is turned into SKU parts once per distinct value (not once per
+    row) and expanded with list repetition, so a 20 × 30 × 5 matrix is a
+    handful of list operations rather than 3,000 loop iterations with string
+    formatting. SKUs are formatted like make_sku(normalize=normalize_skus).
+    """
+
+    def __init__(self, product_id, axes, normalize_skus=None):
+        self.product_id = str(product_id)
+        sku_part = sku_part_function(normalize_skus)
+        self.axes = {}
+        self.collisions = {}  # Axis values that become the same SKU part
+        for name, values in axes.items():
+            values = list(dict.fromkeys(v for v in values if str(v).strip()))
+            groups = defaultdict(list)
+            for v in values:
+                groups[sku_part(v)].append(v)
+            clashes = {part: raw for part, raw in groups.items() if len(raw) > 1}
+            if clashes:
+                self.collisions[name] = clashes
+            if values:
+                self.axes[name] = values
+
+        self.size = 1
+        for values in self.axes.values():
+            self.size *= len(values)
+        if not self.axes:
+            self.size = 0
+
+        # Column-wise expansion: axis i repeats each value (product of later axis
+        # lengths) times, and the whole block tiles (product of earlier lengths) times.
+        self.columns = {}
+        sku_columns = []
+        inner = self.size
+        for name, values in self.axes.items():
+            inner //= len(values)
+            tile = self.size // (inner * len(values))
+            self.columns[name] = _expand(values, inner, tile)
+            sku_columns.append(_expand([sku_part(v) for v in values], inner, tile))
+
+        prefix = sku_part(self.product_id)
+        self.skus = ["-".join(parts) for parts in zip(repeat(prefix, self.size), *sku_columns)]
+        self.variations = ["|".join(vals) for vals in zip(*self.columns.values())]
+
+        counts = Counter(self.skus)
+        self.duplicates = {sku: n for sku, n in counts.items() if n > 1}
+
+    def __len__(self):
+        return self.size
+
+    def variants(self):
+        """Row-wise {axis: value} dicts (for the small-matrix variant editor)"""
+        names = list(self.columns)
+        return [dict(zip(names, vals)) for vals in zip(*self.columns.values())]
+
+    def iter_rows(self, product, public_links, dedupe=True):
+        """Meesho rows in HEADERS order (via excel_generator.product_row), straight from the columns
+
+        With `dedupe`, only the first row of a duplicated SKU is kept.
+        """
+        from utils.excel_generator import padded_links, product_row  # excel_generator imports this module
+
+        links = padded_links(public_links)
+        seen = set()
+        for sku, variation in zip(self.skus, self.variations):
+            if dedupe:
+                if sku in seen:
+                    continue
+                seen.add(sku)
+            yield product_row(product, variation, sku, links)
+
+    def summary(self):
+        return {
+            "axes": {name: len(values) for name, values in self.axes.items()},
+            "variants": self.size,
+            "unique_skus": self.size - sum(n - 1 for n in self.duplicates.values()),
+            "duplicates": self.duplicates,
+            "collisions": self.collisions,
+        }
@@ -0,0 +1,291 @@
+# utils/workbook_patch.py
+# Apply small edits to a generated Meesho workbook without regenerating it.
+#
+# The sheet XML is split into raw row chunks; rows are located by their Seller
+# SKU (and grouped by their Product ID) and only the rows that change are re-rendered. Every other row is
+# written back unchanged, and every other file in the .xlsx is copied with its original compressed bytes.
+import copy
+import io
+import re
+import struct
+import zipfile
+from xml.sax.saxutils import escape, unescape
+
+from utils.excel_generator import HEADERS
+
+SHEET_PATH = "xl/worksheets/sheet1.xml"
+SKU_COL = HEADERS.index("Seller SKU") + 1
+PRODUCT_ID_COL = HEADERS.index("Product ID") + 1
+
+_ROW_RE = re.compile(rb"<row\b[^>]*?(?:/>|>.*?</row>)", re.S)
+_ROW_NUM_RE = re.compile(rb'(<row\b[^>]*?\br=")(\d+)(")')
+_CELL_RE = re.compile(rb'<c\b[^>]*?\br="([A-Z]+)(\d+)"[^>]*?(?:/>|>.*?</c>)', re.S)
+_CELL_REF_RE = re.compile(rb'(<c\b[^>]*?\br="[A-Z]+)(\d+)(")')
+_TEXT_RE = re.compile(rb"<t\b[^>]*>(.*?)</t>", re.S)
+_VALUE_RE = re.compile(rb"<v>(.*?)</v>", re.S)
+_TYPE_RE = re.compile(rb'\bt="(\w+)"')
+_STYLE_RE = re.compile(rb'\bs="(\d+)"')
+_DIMENSION_RE = re.compile(rb'<dimension ref="[^"]*"\s*/>')
+
+
+def col_letter(col):
+    """1-based column number → spreadsheet letters (1 → A, 27 → AA)"""
+    letters = ""
+    while col:
+        col, rem = divmod(col - 1, 26)
+        letters = chr(65 + rem) + letters
+    return letters
+
+
+def col_number(letters):
+    n = 0
+    for ch in letters:
+        n = n * 26 + ord(ch) - 64
+    return n
+
+
+def render_cell(col, row, value, style=None):
+    """Cell XML in the same form openpyxl writes it"""
+    ref = f'{col_letter(col)}{row}'
+    s = f' s="{style}"' if style else ""
+    if value is None:
+        return None
+    if isinstance(value, bool):
+        return f'<c r="{ref}"{s} t="b"><v>{int(value)}</v></c>'.encode()
+    if isinstance(value, (int, float)):
+        return f'<c r="{ref}"{s} t="n"><v>{value}</v></c>'.encode()
+    text = str(value)
+    if not text:
+        return f'<c r="{ref}"{s} t="inlineStr" />'.encode()
+    space = ' xml:space="preserve"' if text != text.strip() else ""
+    return f'<c r="{ref}"{s} t="inlineStr"><is><t{space}>{escape(text)}</t></is></c>'.encode()
+
+
+def render_row(row_num, values):
+    cells = [render_cell(c, row_num, v) for c, v in enumerate(values, 1)]
+    return f'<row r="{row_num}">'.encode() + b"".join(c for c in cells if c) + b"</row>"
+
+
+def _copy_member(data, info, dst):
+    """Copy one member of the zip in `data` into `dst` as its stored (already compressed) bytes"""
+    name_len, extra_len = struct.unpack("<HH", data[info.header_offset + 26:info.header_offset + 30])
+    start = info.header_offset + 30 + name_len + extra_len
+    raw = data[start:start + info.compress_size]
+    info = copy.copy(info)
+    info.flag_bits &= ~0x08  # Sizes and CRC go in the local header, not a trailing data descriptor
+    info.header_offset = dst.fp.tell()
+    dst.fp.write(info.FileHeader())
+    dst.fp.write(raw)
+    dst.filelist.append(info)
+    dst.NameToInfo[info.filename] = info
+    dst.start_dir = dst.fp.tell()
+
+
+class PatchableWorkbook:
+    """A generated Meesho workbook indexed by Seller SKU, ready for incremental edits"""
+
+    def __init__(self, src):
+        data = src.read() if hasattr(src, "read") else src
+        self.zip_bytes = data
+        with zipfile.ZipFile(io.BytesIO(data)) as zf:
+            sheet = zf.read(SHEET_PATH)
+            self._sst_xml = zf.read("xl/sharedStrings.xml") if "xl/sharedStrings.xml" in zf.namelist() else None
+        self._shared = None
+
+        start = sheet.index(b"<sheetData")
+        open_end = sheet.index(b">", start) + 1
+        if sheet[open_end - 2:open_end] == b"/>":  # Empty <sheetData/>
+            self.head, self.tail, body = sheet[:start] + b"<sheetData>", b"</sheetData>" + sheet[open_end:], b""
+        else:
+            end = sheet.index(b"</sheetData>", open_end)
+            self.head, self.tail, body = sheet[:open_end], sheet[end:], sheet[open_end:end]
+
+        rows = [m.group(0) for m in _ROW_RE.finditer(body)]
+        self.header_row = rows[0] if rows else b""
+        self.rows = rows[1:]
+        sku_cell = self._column_cell_re(SKU_COL)
+        product_cell = self._column_cell_re(PRODUCT_ID_COL)
+        self.index = {}
+        self.products = {}  # Product ID → SKUs of its rows, in sheet order
+        for i, row in enumerate(self.rows):
+            m = sku_cell.search(row)
+            sku = self._cell_value(m.group(0)) if m else None
+            if sku is None:
+                continue
+            self.index[str(sku)] = i
+            m = product_cell.search(row)
+            product_id = self._cell_value(m.group(0)) if m else None
+            if product_id is not None:
+                self.products.setdefault(str(product_id).strip(), []).append(str(sku))
+
+    @staticmethod
+    def _column_cell_re(col):
+        return re.compile(rb'<c\b[^>]*?\br="' + col_letter(col).encode() + rb'\d+"[^>]*?(?:/>|>.*?</c>)', re.S)
+
+    # ——————— reading ———————
+    def _shared_strings(self):
+        if self._shared is None:
+            self._shared = []
+            if self._sst_xml:
+                for si in re.finditer(rb"<si>(.*?)</si>", self._sst_xml, re.S):
+                    self._shared.append(b"".join(_TEXT_RE.findall(si.group(1))).decode())
+                self._shared = [unescape(s) for s in self._shared]
+        return self._shared
+
+    def _cell_value(self, cell):
+        ctype = _TYPE_RE.search(cell)
+        ctype = ctype.group(1) if ctype else b"n"
+        if ctype == b"inlineStr":
+            return unescape(b"".join(_TEXT_RE.findall(cell)).decode())
+        v = _VALUE_RE.search(cell)
+        if not v:
+            return None
+        raw = v.group(1).decode()
+        if ctype == b"s":
+            return self._shared_strings()[int(raw)]
+        if ctype in (b"str", b"e"):
+            return unescape(raw)
+        if ctype == b"b":
+            return raw == "1"
+        num = float(raw)
+        return int(num) if num.is_integer() and "." not in raw and "E" not in raw.upper() else num
+
+    def row_values(self, sku):
+        """Cell values of the row with this SKU, padded to the header width"""
+        values = [None] * len(HEADERS)
+        for m in _CELL_RE.finditer(self.rows[self.index[sku]]):
+            col = col_number(m.group(1).decode())
+            if col <= len(values):
+                values[col - 1] = self._cell_value(m.group(0))
+        return values
+
+    def skus(self, product_id=None):
+        """SKUs of the rows whose Product ID is exactly `product_id` (every SKU if None)"""
+        if product_id is None:
+            return list(self.index)
+        return list(self.products.get(str(product_id).strip(), []))
+
+    # ——————— delta ———————
+    def diff(self, new_rows, product_id=None):
+        """Delta that turns this workbook's rows for `product_id` into `new_rows`
+
+        Compares only rows whose Product ID column equals `product_id` (all
+        rows if product_id is None), so products whose SKUs share a prefix
+        ("KURTI" and "KURTI-RED") never touch each other's rows. Returns
+        {"added", "removed", "updated"} for apply().
+        """
+        sku_idx = SKU_COL - 1
+        new_by_sku = {str(r[sku_idx]): r for r in new_rows}
+        old_skus = set(self.skus(product_id))
+
+        added = [r for sku, r in new_by_sku.items() if sku not in self.index]
+        removed = sorted(old_skus - set(new_by_sku))
+        updated = {}
+        for sku, row in new_by_sku.items():
+            if sku not in self.index:
+                continue
+            old = self.row_values(sku)
+            changes = {}
+            for col, (before, after) in enumerate(zip(old, row), 1):
+                if (before if before is not None else "") != (after if after is not None else ""):
+                    changes[HEADERS[col - 1]] = after
+            if changes:
+                updated[sku] = changes
+        return {"added": added, "removed": removed, "updated": updated}
+
+    def apply(self, added=(), removed=(), updated=None):
+        """Apply a delta and return (xlsx BytesIO, stats)
+
+        `updated` maps SKU → {header name or 1-based column: new value}.
+        Removed rows close up: the rows below them shift up, keeping their
+        order (and each product's variants together), and only those are
+        renumbered. Every other file in the .xlsx is copied compressed.
+        """
+        rows = list(self.rows)
+        index = dict(self.index)
+        touched = set()
+
+        for sku, changes in (updated or {}).items():
+            if sku not in index:
+                continue
+            i = index[sku]
+            rows[i] = self._patch_row(rows[i], i + 2, changes)
+            touched.add(sku)
+
+        holes = {index.pop(sku) for sku in set(removed) if sku in index}
+        if holes:
+            position = {i: sku for sku, i in index.items()}
+            kept = []
+            for i in range(min(holes), len(rows)):
+                if i in holes:
+                    continue
+                new_i = min(holes) + len(kept)
+                kept.append(self._renumber(rows[i], new_i + 2))
+                if i in position:
+                    index[position[i]] = new_i
+                    touched.add(position[i])
+            rows[min(holes):] = kept
+
+        sku_idx = SKU_COL - 1
+        n_added = 0
+        for row in added:
+            sku = str(row[sku_idx])
+            if sku in index:  # Already present: overwrite the whole row in place
+                i = index[sku]
+                rows[i] = render_row(i + 2, row)
+            else:
+                index[sku] = len(rows)
+                rows.append(render_row(len(rows) + 2, row))
+                n_added += 1
+            touched.add(sku)
+
+        head = _DIMENSION_RE.sub(
+            f'<dimension ref="A1:{col_letter(len(HEADERS))}{len(rows) + 1}" />'.encode(), self.head)
+        sheet = head + self.header_row + b"".join(rows) + self.tail
+
+        out = io.BytesIO()
+        with zipfile.ZipFile(io.BytesIO(self.zip_bytes)) as src, \
+                zipfile.ZipFile(out, "w", zipfile.ZIP_DEFLATED) as dst:
+            for info in src.infolist():
+                if info.filename == SHEET_PATH:
+                    dst.writestr(info, sheet)
+                else:
+                    _copy_member(self.zip_bytes, info, dst)
+        out.seek(0)
+
+        stats = {
+            "rows_total": len(rows),
+            "rows_added": n_added,
+            "rows_removed": len(holes),
+            "rows_rewritten": len(touched),
+            "rows_untouched": len(rows) - len(touched),
+        }
+        return out, stats
+
+    def _patch_row(self, row, row_num, changes):
+        cells = {}
+        for m in _CELL_RE.finditer(row):
+            cells[col_number(m.group(1).decode())] = m.group(0)
+        for key, value in changes.items():
+            col = HEADERS.index(key) + 1 if isinstance(key, str) else key
+            style = _STYLE_RE.search(cells[col]) if col in cells else None
+            cell = render_cell(col, row_num, value, style.group(1).decode() if style else None)
+            if cell is None:
+                cells.pop(col, None)
+            else:
+                cells[col] = cell
+        open_tag = row[:row.index(b">") + 1]
+        if open_tag.endswith(b"/>"):
+            open_tag = open_tag[:-2].rstrip() + b">"
+        return open_tag + b"".join(cells[c] for c in sorted(cells)) + b"</row>"
+
+    @staticmethod
+    def _renumber(row, row_num):
+        num = str(row_num).encode()
+        row = _ROW_NUM_RE.sub(lambda m: m.group(1) + num + m.group(3), row, count=1)
+        return _CELL_REF_RE.sub(lambda m: m.group(1) + num + m.group(3), row)
+
+
+def patch_workbook(src, added=(), removed=(), updated=None):
+    """Apply a delta to a generated Meesho workbook; returns (xlsx BytesIO, stats)"""
+    return PatchableWorkbook(src).apply(added, removed, updated)